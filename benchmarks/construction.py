@@ -0,0 +1,150 @@
+"""Micro-benchmark for model construction on the engine's hot paths.
+
+Compares fully validated pydantic construction (what the engines used to do) with the
+trusted ``Memory.trusted()`` constructor, and per-object validation of LLM casts and snapshot
+records with the single-pass ``model_validate`` used at those boundaries. Reports
+operations per second and the speedup.
+
+    python -m benchmarks.construction --seconds 0.5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+from charTraits.character import Character, Emotion, Memory, Relationship
+from charTraits.emotional_engine import EmotionalEngine
+from charTraits.parser import character_from_dict
+from storyEngine.session import character_from_record, character_to_record
+
+CAST_ENTRY = {
+    "name": "Akira", "affiliation": "Hero Academy", "archetype": "Rival", "role": "Deuteragonist",
+    "skills": ["Storm Step", "Iron Will", "Flash Counter"],
+    "memory": ["The night the village burned", "A promise made long ago", "Losing the final match"],
+    "personality_traits": ["Proud", "Stubborn", "Loyal"],
+}
+
+
+def validated_cast_entry(data: Dict) -> Character:
+    """The previous per-object path: each Memory validated, then the Character again"""
+    return Character(
+        name=data["name"], affiliation=data["affiliation"], skills=data["skills"],
+        memory=[Memory(content=content) for content in data["memory"]],
+        personality_traits=data["personality_traits"],
+        archetype=data["archetype"], role=data["role"],
+    )
+
+
+def validated_record(record: Dict) -> Character:
+    """The previous per-object snapshot load"""
+    columns = record["memory"]
+    return Character(
+        name=record["name"], affiliation=record["affiliation"], skills=record["skills"],
+        personality_traits=record["personality_traits"], beliefs=record["beliefs"],
+        goals=record["goals"], backstory=record["backstory"],
+        current_state=record["current_state"], archetype=record["archetype"], role=record["role"],
+        memory=[Memory(content=c, timestamp=t, importance=i, tags=g, related_characters=r)
+                for c, t, i, g, r in zip(columns["content"], columns["timestamp"],
+                                         columns["importance"], columns["tags"], columns["related"])],
+        emotions={n: Emotion(name=n, intensity=v) for n, v in record["emotions"].items()},
+        relationships={o: Relationship(character_name=o, trust=t, friendship=f, history=h,
+                                       interactions=n, positive=p, negative=m)
+                       for o, (t, f, h, n, p, m) in record["relationships"].items()},
+    )
+
+
+def sample_record() -> Dict:
+    character = character_from_dict(CAST_ENTRY)
+    for i in range(50):
+        character.add_memory(f"Memory {i} about the tournament", importance=1 + i % 10,
+                             tags=["tournament"], related_characters=["Mei"])
+    for emotion in ("joy", "anger", "fear", "trust"):
+        character.update_emotion(emotion, 0.4)
+    for other in ("Mei", "Ren", "Sora"):
+        character.update_relationship(other, 0.1, 0.1, "sparred")
+    return character_to_record(character)
+
+
+def rate(fn: Callable[[], object], seconds: float) -> float:
+    """Calls of ``fn`` per second, measured over about ``seconds``"""
+    fn()  # build deferred validators outside the timing
+    calls, batch = 0, 1
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            fn()
+        calls += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+        batch *= 2
+
+
+def run(args) -> Dict:
+    record = sample_record()
+    character = character_from_dict(CAST_ENTRY)
+    emotions = {"joy": 0.1, "anger": -0.05, "trust": 0.02}
+
+    def add_memory_validated():
+        character.memory.append(Memory(content="Saw the rival train at dawn", importance=3,
+                                       tags=["rival"], related_characters=["Mei"]))
+        if character._memory_index is not None:
+            character._memory_index.sync(character.memory)
+        if len(character.memory) > 1000:
+            del character.memory[3:]
+
+    def add_memory_trusted():
+        character.add_memory("Saw the rival train at dawn", 3, ["rival"], ["Mei"])
+        if len(character.memory) > 1000:
+            del character.memory[3:]
+
+    cases = {
+        "memory": (lambda: Memory(content="A promise", timestamp=1.0, importance=3,
+                                  tags=["oath"], related_characters=["Mei"]),
+                   lambda: Memory.trusted("A promise", 1.0, 3, ["oath"], ["Mei"])),
+        "add_memory": (add_memory_validated, add_memory_trusted),
+        "cast_entry": (lambda: validated_cast_entry(CAST_ENTRY),
+                       lambda: character_from_dict(CAST_ENTRY)),
+        "snapshot_character": (lambda: validated_record(record),
+                               lambda: character_from_record(record)),
+    }
+    results = {}
+    for name, (before, after) in cases.items():
+        validated, fast = rate(before, args.seconds), rate(after, args.seconds)
+        results[name] = {"validated_per_sec": round(validated), "fast_per_sec": round(fast),
+                         "speedup": round(fast / validated, 2)}
+    results["emotion_event"] = {
+        "fast_per_sec": round(rate(lambda: EmotionalEngine.process_event(character, "", emotions),
+                                   args.seconds))}
+    return {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Model construction micro-benchmark")
+    parser.add_argument("--seconds", type=float, default=0.5, help="time spent per measurement")
+    parser.add_argument("--output", default="benchmarks/results/construction.json")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None) -> int:
+    args = parse_args(argv)
+    result = run(args)
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    for name, numbers in result["results"].items():
+        if "validated_per_sec" in numbers:
+            print(f"{name:20} {numbers['validated_per_sec']:>10,}/s validated  "
+                  f"{numbers['fast_per_sec']:>10,}/s fast  x{numbers['speedup']}")
+        else:
+            print(f"{name:20} {numbers['fast_per_sec']:>10,}/s")
+    print(f"Saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
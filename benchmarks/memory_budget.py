@@ -0,0 +1,100 @@
+"""Long-run benchmark: per-character memory and CPU while events keep arriving.
+
+Feeds one character a stream of memories and relationship events and reports, at
+checkpoints, how many memories it holds, its heap footprint and the cost per event,
+with and without the MemoryConsolidator. Summaries are extractive (no model server),
+so this measures the bookkeeping alone.
+
+    python -m benchmarks.memory_budget --events 6000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from charTraits.character import Character
+from charTraits.memory_consolidator import MemoryConsolidator
+from charTraits.memory_manager import MemoryManager
+
+OTHERS = ["Mei", "Ren", "Sora", "Daichi"]
+TAGS = ["training", "rivalry", "mission", "festival", "loss"]
+
+
+def simulate(args, consolidate: bool, trace: bool = False) -> List[Dict]:
+    """Checkpoints of one run; ``trace`` records the heap (tracemalloc skews the timings)"""
+    rng = random.Random(args.seed)
+    character = Character(name="Akira", affiliation="Hero Academy", skills=[], personality_traits=[])
+    consolidator = (MemoryConsolidator(budget=args.budget, batch=args.batch)
+                    if consolidate else None)
+    checkpoints = []
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(1, args.events + 1):
+        other = rng.choice(OTHERS)
+        character.add_memory(f"Event {i} with {other} during the {rng.choice(TAGS)}",
+                             importance=rng.choices(range(1, 11), weights=range(10, 0, -1))[0],
+                             tags=[rng.choice(TAGS)], related_characters=[other])
+        character.update_relationship(other, rng.uniform(-0.05, 0.05), rng.uniform(-0.05, 0.05),
+                                      f"event {i}")
+        if consolidator:
+            consolidator.maybe_consolidate(character)
+        MemoryManager.summarize_memories(character)
+        if i % args.checkpoint == 0:
+            elapsed = time.perf_counter() - start
+            checkpoints.append({
+                "events": i,
+                "memories": len(character.memory),
+                "history": sum(len(r.history) for r in character.relationships.values()),
+                "heap_kb": round(tracemalloc.get_traced_memory()[0] / 1024, 1) if trace else None,
+                "us_per_event": round(elapsed / args.checkpoint * 1e6, 1),
+            })
+            start = time.perf_counter()
+    if trace:
+        tracemalloc.stop()
+    return checkpoints
+
+
+def measure(args, consolidate: bool) -> List[Dict]:
+    """Timings from a plain run, heap sizes from a traced rerun with the same seed"""
+    checkpoints = simulate(args, consolidate)
+    for point, traced in zip(checkpoints, simulate(args, consolidate, trace=True)):
+        point["heap_kb"] = traced["heap_kb"]
+    return checkpoints
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-character memory growth benchmark")
+    parser.add_argument("--events", type=int, default=6000)
+    parser.add_argument("--checkpoint", type=int, default=1500, help="events between reports")
+    parser.add_argument("--budget", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmarks/results/memory_budget.json")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None) -> int:
+    args = parse_args(argv)
+    result = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": vars(args),
+              "unbounded": measure(args, consolidate=False),
+              "consolidated": measure(args, consolidate=True)}
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    for mode in ("unbounded", "consolidated"):
+        for point in result[mode]:
+            print(f"{mode:13} {point['events']:>8} events  {point['memories']:>7} memories  "
+                  f"{point['heap_kb']:>9.1f} KB  {point['us_per_event']:>7.1f} us/event")
+    print(f"Saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
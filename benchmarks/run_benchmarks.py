@@ -0,0 +1,226 @@
+"""Offline performance benchmark for the story generator.
+
+Starts the stub LLM server (``--backends`` of them, balanced by ``main.router``), points
+``main`` at it and measures world generation, the character turn loop and panel
+rendering. Results are written as JSON; pass a previous result with ``--baseline`` to
+flag regressions (non-zero exit status).
+
+    python -m benchmarks.run_benchmarks --turns 30 --malformed-rate 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.stub_server import StubConfig, StubServer
+from storyEngine.streaming import CompletableStream
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+
+def describe(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+    }
+
+
+class TimingSwarm:
+    """Wraps the Swarm client and records call latency per stage"""
+
+    def __init__(self, swarm):
+        self.swarm = swarm
+        self.timings: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stage(agent) -> str:
+        if agent.name == "World":
+            return "world_builder" if '"characters"' in str(agent.instructions) else "panels"
+        if agent.name == "Narrator":
+            return "summary"
+        if agent.name == "Memory Keeper":
+            return "memory"
+        return "dialogue"
+
+    def record(self, stage: str, elapsed: float) -> None:
+        with self._lock:
+            self.timings.setdefault(stage, []).append(elapsed)
+
+    def run(self, agent, messages, stream=False, **kwargs):
+        start = time.perf_counter()
+        result = self.swarm.run(agent=agent, messages=messages, stream=stream, **kwargs)
+        if stream:
+            return CompletableStream(self._timed_stream(result, self.stage(agent), start),
+                                     inner=result)
+        self.record(self.stage(agent), time.perf_counter() - start)
+        return result
+
+    def _timed_stream(self, chunks, stage, start):
+        try:
+            yield from chunks
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+
+def run(args) -> Dict:
+    config = StubConfig(latency=args.latency, prefill_tokens_per_sec=args.prefill_tokens_per_sec,
+                        tokens_per_sec=args.tokens_per_sec, malformed_rate=args.malformed_rate,
+                        seed=args.seed, error_rate=args.error_rate)
+    servers = [StubServer(config).start() for _ in range(args.backends)]
+    os.environ["LLM_BASE_URL"] = servers[0].base_url
+    if args.backends > 1:
+        # Route every task across all stubs, as with several local inference servers
+        routes = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump({"backends": [{"name": f"stub{i}", "base_url": server.base_url}
+                                for i, server in enumerate(servers)]}, routes)
+        routes.close()
+        os.environ["LLM_ROUTES"] = routes.name
+    import main
+    from charTraits.parser import stats as parser_stats
+    if args.backends > 1:
+        os.unlink(routes.name)  # read when main was imported
+
+    main.response_cache.enabled = False
+    timing = TimingSwarm(main.get_swarm_client())
+    main.swarm_client = timing
+
+    try:
+        world_times, attempts, fallbacks = [], 0, 0
+        characters = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(args.topics):
+                stats = {}
+                start = time.perf_counter()
+                characters = main.create_story_world(f"benchmark topic {i}", stats=stats)
+                world_times.append(time.perf_counter() - start)
+                attempts += stats["attempts"]
+                fallbacks += stats["fallback"]
+
+            start = time.perf_counter()
+            if args.scenes:
+                story_stats = main.run_scenes(characters, by=args.scenes, max_turns=args.turns,
+                                              speculate=args.speculate, speakers=args.speakers)
+            else:
+                story_stats = main.run_story(characters, stream=args.stream, max_turns=args.turns,
+                                             speculate=args.speculate, speakers=args.speakers)
+            loop_elapsed = time.perf_counter() - start
+    finally:
+        for server in servers:
+            server.stop()
+
+    records = [record for server in servers for record in server.records]
+    dialogue = [r for r in records if r["kind"] == "dialogue" and "error" not in r]
+    prompt_bytes = [r["prompt_bytes"] for r in dialogue]
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "stages": {
+            "create_story_world": describe(world_times),
+            **{stage: describe(values) for stage, values in sorted(timing.timings.items())},
+        },
+        "turns_per_sec": (round(story_stats.get("turns", args.turns) / loop_elapsed, 3)
+                          if loop_elapsed else 0.0),
+        "prompt_bytes_per_turn": {
+            "mean": round(sum(prompt_bytes) / len(prompt_bytes), 1) if prompt_bytes else 0.0,
+            "p95": percentile(prompt_bytes, 95),
+            "last": prompt_bytes[-1] if prompt_bytes else 0,
+        },
+        "prefix_reuse": round(sum(r["shared_prefix_chars"] for r in dialogue)
+                              / max(1, sum(r["prompt_chars"] for r in dialogue)), 3),
+        "speculation": story_stats.get("speculation"),
+        "memory": story_stats.get("memory"),
+        "speakers": story_stats.get("speakers"),
+        "scenes": story_stats if args.scenes else None,
+        "world_generation": {
+            "topics": args.topics,
+            "attempts": attempts,
+            "retries": attempts - args.topics,
+            "fallbacks": fallbacks,
+        },
+        "parser": parser_stats.as_dict(),
+        "governor": main.governor.stats(),
+        "backends": main.router.stats(),
+        "requests": len(records),
+    }
+
+
+def compare(result: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Human-readable regressions of ``result`` against ``baseline``"""
+    regressions = []
+    for stage, current in result["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous and previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{stage} p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+    old_rate = baseline.get("turns_per_sec", 0)
+    if old_rate and result["turns_per_sec"] < old_rate * (1 - threshold):
+        regressions.append(f"turns/sec {old_rate} -> {result['turns_per_sec']}")
+    old_bytes = baseline.get("prompt_bytes_per_turn", {}).get("mean", 0)
+    if old_bytes and result["prompt_bytes_per_turn"]["mean"] > old_bytes * (1 + threshold):
+        regressions.append(f"prompt bytes/turn {old_bytes} -> {result['prompt_bytes_per_turn']['mean']}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline story generator benchmark")
+    parser.add_argument("--topics", type=int, default=5, help="create_story_world runs")
+    parser.add_argument("--turns", type=int, default=20, help="character turns in the story loop")
+    parser.add_argument("--stream", action="store_true", help="benchmark the streaming turn loop")
+    parser.add_argument("--speculate", action="store_true",
+                        help="pre-generate each next turn while the current one is shown")
+    parser.add_argument("--speakers", choices=["round-robin", "priority"], default="round-robin",
+                        help="speaker policy for the story loop")
+    parser.add_argument("--scenes", choices=["affiliation", "relationships"],
+                        help="run the cast as concurrent sub-scenes split this way")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=4000.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of stub requests failing with 503 overloaded")
+    parser.add_argument("--backends", type=int, default=1,
+                        help="stub servers to spread calls over through the router")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmarks/results/latest.json")
+    parser.add_argument("--baseline", help="previous result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change that counts as a regression")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None) -> int:
+    args = parse_args(argv)
+    result = run(args)
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    print(f"Saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
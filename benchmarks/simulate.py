@@ -0,0 +1,199 @@
+"""Headless simulation: the character engines at scale, without any model calls.
+
+Builds a synthetic cast of ``--characters`` characters in communities of
+``--community`` and plays a scripted event stream against it for ``--ticks`` ticks. On
+each tick, the given share of the cast has an interaction with someone in its community
+(RelationshipManager), an emotion event and a mood update (EmotionalEngine), a memory
+write (Character.add_memory, kept within budget by the MemoryConsolidator), and a
+memory query (MemoryRetriever and MemoryManager). The script is built from ``--seed``
+before each tick and is not timed, so runs can be compared.
+
+Reports ticks per second, peak RSS, and time per engine. Each cast size runs in a
+fresh process so its peak RSS is its own.
+
+    python -m benchmarks.simulate --characters 10 1000 10000 100000 --ticks 20
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List
+
+from charTraits.character import Character
+from charTraits.emotional_engine import EmotionalEngine
+from charTraits.memory_consolidator import MemoryConsolidator
+from charTraits.memory_manager import MemoryManager
+from charTraits.memory_retriever import MemoryRetriever
+from charTraits.relationship_manager import RelationshipManager
+
+ENGINES = ("relationships", "emotions", "memory_writes", "consolidation", "memory_queries")
+INTERACTIONS = list(RelationshipManager.INTERACTION_EFFECTS)
+EMOTIONS = list(EmotionalEngine.POSITIVE_EMOTIONS + EmotionalEngine.NEGATIVE_EMOTIONS)
+PLACES = ["market", "dojo", "harbor", "library", "arena", "shrine", "forest", "tower"]
+TOPICS = ["training", "rivalry", "mission", "festival", "loss", "secret", "storm", "duel"]
+
+
+def build_cast(size: int, community: int) -> List[Character]:
+    """``size`` characters; each run of ``community`` characters shares an affiliation"""
+    return [Character(name=f"Character {i}", affiliation=f"Clan {i // community}",
+                      skills=[TOPICS[i % len(TOPICS)]],
+                      personality_traits=[PLACES[i % len(PLACES)]])
+            for i in range(size)]
+
+
+def script_tick(rng: random.Random, size: int, args) -> Dict[str, list]:
+    """One tick of events as plain tuples of cast positions and values"""
+    def actors(share: float) -> List[int]:
+        return rng.sample(range(size), min(size, round(size * share)))
+
+    def partner(i: int) -> int:
+        # Someone else in i's community (the whole cast if i is alone in a short last one)
+        start = i - i % args.community
+        end = min(size, start + args.community)
+        if end - start < 2:
+            start, end = 0, size
+        other = rng.randrange(start, end - 1)
+        return other + 1 if other >= i else other
+
+    return {
+        "interactions": [(i, partner(i), rng.choice(INTERACTIONS), rng.uniform(0.05, 0.5))
+                         for i in actors(args.interactions)],
+        "emotions": [(i, {rng.choice(EMOTIONS): rng.uniform(-0.3, 0.3),
+                          rng.choice(EMOTIONS): rng.uniform(-0.3, 0.3)})
+                     for i in actors(args.emotion_events)],
+        "memories": [(i, partner(i), rng.choice(TOPICS), rng.choice(PLACES),
+                      rng.choices(range(1, 11), weights=range(10, 0, -1))[0])
+                     for i in actors(args.memory_writes)],
+        "queries": [(i, f"{rng.choice(TOPICS)} {rng.choice(PLACES)}")
+                    for i in actors(args.memory_queries)],
+    }
+
+
+def simulate(size: int, args) -> Dict:
+    """Run the script against a cast of ``size`` and time each engine"""
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    cast = build_cast(size, args.community)
+    build_seconds = time.perf_counter() - start
+    consolidator = MemoryConsolidator(budget=args.memory_budget, batch=args.memory_batch)
+    seconds = dict.fromkeys(ENGINES, 0.0)
+    events = dict.fromkeys(ENGINES, 0)
+    script_seconds = 0.0
+
+    for tick in range(args.ticks):
+        start = time.perf_counter()
+        script = script_tick(rng, size, args)
+        script_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i, j, kind, intensity in script["interactions"]:
+            RelationshipManager.process_interaction(cast[i], cast[j], kind, intensity)
+        seconds["relationships"] += time.perf_counter() - start
+        events["relationships"] += len(script["interactions"])
+
+        start = time.perf_counter()
+        for i, changes in script["emotions"]:
+            character = cast[i]
+            EmotionalEngine.process_event(character, "scripted event", changes)
+            character.current_state["mood"] = EmotionalEngine.calculate_mood(character)
+        seconds["emotions"] += time.perf_counter() - start
+        events["emotions"] += len(script["emotions"])
+
+        start = time.perf_counter()
+        for i, j, topic, place, importance in script["memories"]:
+            cast[i].add_memory(f"Tick {tick}: {topic} with {cast[j].name} at the {place}",
+                               importance=importance, tags=[topic],
+                               related_characters=[cast[j].name])
+        seconds["memory_writes"] += time.perf_counter() - start
+        events["memory_writes"] += len(script["memories"])
+
+        start = time.perf_counter()
+        for i, *_ in script["memories"]:
+            consolidator.maybe_consolidate(cast[i])
+        seconds["consolidation"] += time.perf_counter() - start
+        events["consolidation"] += len(script["memories"])
+
+        start = time.perf_counter()
+        for i, query in script["queries"]:
+            MemoryRetriever.top_memories(cast[i], query)
+            MemoryManager.search_memories(cast[i], query)
+        seconds["memory_queries"] += time.perf_counter() - start
+        events["memory_queries"] += len(script["queries"])
+
+    engine_seconds = sum(seconds.values())
+    return {
+        "characters": size,
+        "ticks": args.ticks,
+        "build_seconds": round(build_seconds, 3),
+        "script_seconds": round(script_seconds, 3),
+        "ticks_per_sec": round(args.ticks / engine_seconds, 3) if engine_seconds else 0.0,
+        # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+        "engines": {engine: {"seconds": round(seconds[engine], 3),
+                             "share": round(seconds[engine] / engine_seconds, 3)
+                             if engine_seconds else 0.0,
+                             "events": events[engine],
+                             "us_per_event": round(seconds[engine] / events[engine] * 1e6, 2)
+                             if events[engine] else 0.0}
+                    for engine in ENGINES},
+        "state": {"memories": sum(len(c.memory) for c in cast),
+                  "relationships": sum(len(c.relationships) for c in cast),
+                  "consolidator": consolidator.stats()},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless character engine simulation")
+    parser.add_argument("--characters", type=int, nargs="+", default=[10, 1000, 10000],
+                        help="cast sizes to simulate, each in its own process")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--community", type=int, default=50,
+                        help="characters per affiliation; interactions stay within one")
+    parser.add_argument("--interactions", type=float, default=0.5,
+                        help="share of the cast starting an interaction each tick")
+    parser.add_argument("--emotion-events", type=float, default=0.5,
+                        help="share of the cast with an emotion event each tick")
+    parser.add_argument("--memory-writes", type=float, default=0.5,
+                        help="share of the cast writing a memory each tick")
+    parser.add_argument("--memory-queries", type=float, default=0.1,
+                        help="share of the cast recalling memories each tick")
+    parser.add_argument("--memory-budget", type=int, default=200)
+    parser.add_argument("--memory-batch", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmarks/results/simulate.json")
+    args = parser.parse_args(argv)
+    if min(args.characters) < 2 or args.community < 2:
+        parser.error("casts and communities need at least 2 characters")
+    return args
+
+
+def cli(argv=None) -> int:
+    args = parse_args(argv)
+    runs = []
+    for size in args.characters:
+        # A fresh process per size, so peak RSS is not inherited from a larger cast
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            run = executor.submit(simulate, size, args).result()
+        runs.append(run)
+        shares = "  ".join(f"{engine} {stats['share']:.0%}"
+                           for engine, stats in run["engines"].items())
+        print(f"{size:>8} characters  {run['ticks_per_sec']:>9.2f} ticks/s  "
+              f"{run['peak_rss_mb']:>8.1f} MB peak  {shares}")
+    result = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": vars(args), "runs": runs}
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
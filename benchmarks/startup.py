@@ -0,0 +1,123 @@
+"""Startup-time benchmark: how long imports take before the CLI (or a worker) is usable.
+
+Runs each target in fresh interpreters under ``python -X importtime`` and reports the
+median wall time, the import time, and the modules with the most self time. Nothing
+talks to a model server. Pass a previous result with ``--baseline`` to flag
+regressions (non-zero exit status).
+
+    python -m benchmarks.startup --runs 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# name -> code run in a fresh interpreter
+TARGETS = {
+    "charTraits.parser": "import charTraits.parser",
+    "storyEngine.batch": "import storyEngine.batch",
+    "main": "import main",
+    "cli_help": "import sys; sys.argv = ['main.py', '--help']; import runpy; runpy.run_path('main.py', run_name='__main__')",
+    "first_client": "import main; main.get_swarm_client()",
+}
+
+# (self µs, cumulative µs, module name, nesting depth)
+ImportRecord = Tuple[int, int, str, int]
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        records.append((int(self_us), int(cumulative_us), name.strip(), depth))
+    return records
+
+
+def measure(code: str, cwd: str) -> Tuple[float, List[ImportRecord]]:
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                               capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{completed.stderr[-2000:]}")
+    return elapsed, parse_importtime(completed.stderr)
+
+
+def run(args) -> Dict:
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results, slowest = {}, {}
+    for name in args.targets:
+        walls, imports = [], []
+        records: List[ImportRecord] = []
+        for _ in range(args.runs):
+            wall, records = measure(TARGETS[name], cwd)
+            walls.append(wall)
+            imports.append(sum(cumulative for _, cumulative, _, depth in records if depth == 0))
+        results[name] = {
+            "wall_ms": round(statistics.median(walls) * 1000, 1),
+            "import_ms": round(statistics.median(imports) / 1000, 1),
+            "modules": len(records),
+        }
+        slowest[name] = [{"module": module, "self_ms": round(self_us / 1000, 1)}
+                         for self_us, _, module, _ in sorted(records, reverse=True)[:args.top]]
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "targets": results,
+        "slowest_imports": slowest,
+    }
+
+
+def compare(result: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, current in result["targets"].items():
+        previous = baseline.get("targets", {}).get(name)
+        if previous and current["wall_ms"] > previous["wall_ms"] * (1 + threshold):
+            regressions.append(f"{name} startup {previous['wall_ms']}ms -> {current['wall_ms']}ms")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import/startup time benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per target")
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument("--top", type=int, default=8, help="slowest modules listed per target")
+    parser.add_argument("--output", default="benchmarks/results/startup.json")
+    parser.add_argument("--baseline", help="previous result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change that counts as a regression")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None) -> int:
+    args = parse_args(argv)
+    result = run(args)
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    for name, timing in result["targets"].items():
+        print(f"{name:20} {timing['wall_ms']:8.1f} ms wall  {timing['import_ms']:8.1f} ms imports  "
+              f"({timing['modules']} modules)")
+    print(f"Saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
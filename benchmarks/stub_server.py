@@ -0,0 +1,259 @@
+"""Local OpenAI-compatible stand-in for LM Studio, for offline benchmarks.
+
+Serves ``POST /v1/chat/completions`` (plain and streamed) with canned casts, dialogue,
+panels, summaries and merged memories chosen from the agent's system prompt. Latency,
+generation speed, the rate of malformed cast JSON and of 503 overload errors are
+configurable, and every request is recorded.
+
+    python -m benchmarks.stub_server --port 1234 --tokens-per-sec 40
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+NAMES = ["Akira", "Mei", "Ren", "Sora", "Daichi", "Hana", "Kenji", "Yuki", "Takeshi", "Rin"]
+AFFILIATIONS = ["Hero Academy", "Shadow Guild", "Storm Clan", "Iron Temple"]
+ARCHETYPES = ["Shonen Protagonist", "Rival", "Mentor", "Comic Relief", "Mysterious Ally", "Antagonist"]
+LINES = [
+    "I won't lose to you this time!",
+    "You still don't understand what this power costs.",
+    "Wait, did anyone else hear that?",
+    "Our guild has protected this city for generations.",
+    "Then prove it. Show me your resolve.",
+    "I remember the night the village burned.",
+]
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class StubConfig:
+    def __init__(self, latency: float = 0.05, prefill_tokens_per_sec: float = 2000.0,
+                 tokens_per_sec: float = 200.0, malformed_rate: float = 0.0, seed: int = 0,
+                 error_rate: float = 0.0):
+        self.latency = latency
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        self.tokens_per_sec = tokens_per_sec
+        self.malformed_rate = malformed_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+
+def classify(messages: List[Dict]) -> str:
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    if '"characters"' in system:
+        return "cast"
+    if "manga artist" in system:
+        return "panels"
+    if "running summary" in system:
+        return "summary"
+    if "minor memories" in system:
+        return "memory"
+    return "dialogue"
+
+
+def cast_json(rng: random.Random, malformed: bool) -> str:
+    characters = []
+    for name in rng.sample(NAMES, 4):
+        characters.append({
+            "name": name,
+            "affiliation": rng.choice(AFFILIATIONS),
+            "archetype": rng.choice(ARCHETYPES),
+            "role": "Key player",
+            "skills": [f"{name} Strike", "Focus"],
+            "memory": [rng.choice(LINES), "A promise made long ago"],
+            "personality_traits": ["Determined", "Stubborn"],
+        })
+    text = json.dumps({"characters": characters}, indent=2)
+    if malformed:
+        breakage = rng.choice(["trailing_comma", "comment", "truncate", "garbage"])
+        if breakage == "trailing_comma":
+            text = text.replace('"Stubborn"\n', '"Stubborn",\n')
+        elif breakage == "comment":
+            text = text.replace('"characters": [', '"characters": [ // the cast')
+        elif breakage == "truncate":
+            text = text[:int(len(text) * 0.8)]
+        else:
+            text = "I'm sorry, here are some characters: Akira and Mei."
+    return "Here is your cast:\n" + text
+
+
+def completion_text(kind: str, messages: List[Dict], config: StubConfig) -> str:
+    with config.lock:
+        rng = config.random
+        if kind == "cast":
+            return cast_json(rng, rng.random() < config.malformed_rate)
+        if kind == "panels":
+            return "\n".join(f"PANEL {i}:\n• Picture: {rng.choice(LINES)}\n• Dialogue: {rng.choice(LINES)}"
+                             for i in range(1, 4))
+        if kind == "summary":
+            return " ".join(rng.sample(LINES, 3))
+        if kind == "memory":
+            return rng.choice(LINES)
+        line = " ".join(rng.sample(LINES, 2))
+        # Characters often address someone by name, as model dialogue does
+        return f"{rng.choice(NAMES)}! {line}" if rng.random() < 0.5 else line
+
+
+def shared_prefix(previous: str, current: str) -> int:
+    limit = min(len(previous), len(current))
+    i = 0
+    while i < limit and previous[i] == current[i]:
+        i += 1
+    return i
+
+
+class StubServer:
+    """Runs the stub on a background thread; ``records`` holds one dict per request"""
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.records: List[Dict] = []
+        self._records_lock = threading.Lock()
+        # Last prompt per request kind, to measure how much a per-slot KV cache could reuse
+        self._last_prompt: Dict[str, str] = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def record(self, entry: Dict, messages: List[Dict]) -> None:
+        prompt = "".join(f"{m.get('role')}\n{m.get('content') or ''}\n" for m in messages)
+        with self._records_lock:
+            entry["prompt_chars"] = len(prompt)
+            entry["shared_prefix_chars"] = shared_prefix(self._last_prompt.get(entry["kind"], ""), prompt)
+            self._last_prompt[entry["kind"]] = prompt
+            self.records.append(entry)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                request = json.loads(raw)
+                messages = request.get("messages", [])
+                kind = classify(messages)
+                config = server.config
+                with config.lock:
+                    overloaded = config.error_rate > 0 and config.random.random() < config.error_rate
+                if overloaded:
+                    server.record({"kind": kind, "prompt_bytes": len(raw), "messages": len(messages),
+                                   "completion_tokens": 0, "stream": bool(request.get("stream")),
+                                   "error": 503}, messages)
+                    self._send_json({"error": {"message": "model overloaded", "type": "server_error"}},
+                                    status=503)
+                    return
+                text = completion_text(kind, messages, config)
+                tokens = TOKEN_PATTERN.findall(text)
+                prompt_tokens = max(1, len(raw) // 4)
+                time.sleep(config.latency + prompt_tokens / config.prefill_tokens_per_sec)
+                server.record({"kind": kind, "prompt_bytes": len(raw), "messages": len(messages),
+                               "completion_tokens": len(tokens), "stream": bool(request.get("stream"))},
+                              messages)
+                if request.get("stream"):
+                    self._stream(request, tokens)
+                else:
+                    time.sleep(len(tokens) / config.tokens_per_sec)
+                    self._send_json(self._completion(request, text, prompt_tokens, len(tokens)))
+
+            def _completion(self, request, text, prompt_tokens, completion_tokens):
+                return {
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": text}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                }
+
+            def _send_json(self, body, status=200):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, request, tokens):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                interval = 1.0 / server.config.tokens_per_sec
+                base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": request.get("model", "stub")}
+                try:
+                    for i, token in enumerate(tokens):
+                        delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+                        self._event({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+                        time.sleep(interval)
+                    self._event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client stopped reading early
+                self.close_connection = True
+
+            def _event(self, body):
+                self.wfile.write(f"data: {json.dumps(body)}\n\n".encode())
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible stub for LM Studio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--latency", type=float, default=0.05, help="fixed seconds per request")
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=2000.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="share of cast responses with broken JSON")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of requests answered with 503 overloaded")
+    args = parser.parse_args()
+    config = StubConfig(args.latency, args.prefill_tokens_per_sec, args.tokens_per_sec,
+                        args.malformed_rate, error_rate=args.error_rate)
+    server = StubServer(config, args.host, args.port)
+    print(f"Stub LLM server on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
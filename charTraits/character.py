@@ -1,8 +1,44 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+import heapq
+import time
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_serializer, field_validator
+from typing import ClassVar, Dict, List, Optional
 from datetime import datetime
+from .memory_index import MemoryIndex
+
+# Models build their validators on first use instead of at import time
+LAZY_MODEL = ConfigDict(defer_build=True)
+
+# BaseModel's slot setters, looked up once for _construct. These are pydantic internals,
+# which is why requirements.txt pins the pydantic minor version.
+try:
+    _set_dict = BaseModel.__dict__["__dict__"].__set__
+    _set_fields_set = BaseModel.__dict__["__pydantic_fields_set__"].__set__
+    _set_extra = BaseModel.__dict__["__pydantic_extra__"].__set__
+    _set_private = BaseModel.__dict__["__pydantic_private__"].__set__
+except (KeyError, AttributeError):
+    _set_dict = None
+
+def _construct(cls, values: Dict) -> BaseModel:
+    """Model instance from values the caller guarantees are valid, skipping validation.
+
+    Does what ``model_construct`` does without its per-field default handling; in
+    pydantic 2.14 ``model_construct`` is slower than validating (see
+    ``benchmarks/construction.py``). Only for models without private attributes, and only
+    used for Memory, where it halves the cost of ``add_memory``. Pydantic releases without
+    these slots get ``model_construct``.
+    """
+    if _set_dict is None:
+        return cls.model_construct(**values)
+    model = object.__new__(cls)
+    _set_dict(model, values)
+    _set_fields_set(model, set(values))
+    _set_extra(model, None)
+    _set_private(model, None)
+    return model
 
 class Memory(BaseModel):
+    model_config = LAZY_MODEL
+
     content: str
     timestamp: float = Field(default_factory=lambda: datetime.now().timestamp())
     importance: int = Field(default=1, ge=1, le=10)
@@ -12,25 +48,67 @@ class Memory(BaseModel):
     @classmethod
     def from_string(cls, content: str) -> 'Memory':
         """Create a Memory object from a string"""
-        return cls(
-            content=content,
-            timestamp=datetime.now().timestamp(),
-            importance=1,
-            tags=[],
-            related_characters=[]
-        )
+        return cls.trusted(content)
+
+    @classmethod
+    def trusted(cls, content: str, timestamp: Optional[float] = None, importance: int = 1,
+                tags: Optional[List[str]] = None,
+                related_characters: Optional[List[str]] = None) -> 'Memory':
+        """Unvalidated Memory for engine code that already holds well-typed values"""
+        return _construct(cls, {
+            "content": content,
+            "timestamp": time.time() if timestamp is None else timestamp,
+            "importance": importance,
+            "tags": tags if tags is not None else [],
+            "related_characters": related_characters if related_characters is not None else [],
+        })
 
 class Emotion(BaseModel):
+    model_config = LAZY_MODEL
+
     name: str
     intensity: float = Field(default=0.0, ge=0.0, le=1.0)
     
 class Relationship(BaseModel):
+    """Trust and friendship toward another character.
+
+    ``history`` keeps the last ``HISTORY_LIMIT`` events (older ones are dropped); the
+    counters keep totals over every interaction, including dropped events.
+    """
+    model_config = LAZY_MODEL
+
+    HISTORY_LIMIT: ClassVar[int] = 20
+
     character_name: str
     trust: float = Field(default=0.5, ge=0.0, le=1.0)
     friendship: float = Field(default=0.5, ge=0.0, le=1.0)
     history: List[str] = Field(default_factory=list)
+    interactions: int = 0
+    positive: int = 0
+    negative: int = 0
+
+    @field_validator("history")
+    @classmethod
+    def _trim(cls, history: List[str]) -> List[str]:
+        return history[-cls.HISTORY_LIMIT:]
+
+    def record(self, trust_change: float, friendship_change: float,
+               event: Optional[str] = None) -> None:
+        """Count one interaction and remember its event, dropping the oldest past the limit"""
+        self.interactions += 1
+        change = trust_change + friendship_change
+        if change > 0:
+            self.positive += 1
+        elif change < 0:
+            self.negative += 1
+        if event:
+            self.history.append(event)
+            if len(self.history) > self.HISTORY_LIMIT:
+                del self.history[:-self.HISTORY_LIMIT]
 
 class Character(BaseModel):
+    model_config = LAZY_MODEL
+
     name: str
     affiliation: str
     skills: List[str]
@@ -48,24 +126,54 @@ class Character(BaseModel):
     })
     archetype: str = Field(default="Support Character")
     role: str = Field(default="Secondary Character")
+    _memory_index: Optional[MemoryIndex] = PrivateAttr(default=None)
+
+    @field_serializer("memory", mode="wrap")
+    def _dump_memory(self, memory, handler):
+        # A compacted MemoryStore dumps as the list of Memory models it stands for
+        return handler(memory if isinstance(memory, list) else memory.to_memories())
 
     def add_memory(self, content: str, importance: int = 1, tags: List[str] = None, 
                   related_characters: List[str] = None) -> None:
         """Add a new memory with metadata"""
-        memory = Memory(
-            content=content,
-            importance=importance,
-            tags=tags or [],
-            related_characters=related_characters or []
-        )
+        if not 1 <= importance <= 10:
+            raise ValueError(f"importance must be between 1 and 10, got {importance}")
+        memory = Memory.trusted(content, importance=importance, tags=list(tags or []),
+                                related_characters=list(related_characters or []))
         self.memory.append(memory)
+        # Read the private slot directly; attribute access goes through BaseModel.__getattr__
+        index = (self.__pydantic_private__ or {}).get("_memory_index")
+        if index is not None:
+            index.sync(self.memory)
+
+    def memory_index(self) -> MemoryIndex:
+        """Search index over this character's memories, kept in sync with the memory list"""
+        if self._memory_index is None:
+            self._memory_index = MemoryIndex()
+        self._memory_index.sync(self.memory, verify=True)
+        return self._memory_index
         
+    def compact_memory(self, **kwargs) -> None:
+        """Switch memory to a columnar MemoryStore (for very long-lived characters)"""
+        from .memory_store import MemoryStore
+        if not isinstance(self.memory, MemoryStore):
+            self.memory = MemoryStore.from_memories(self.memory, **kwargs)
+
+    def expand_memory(self) -> None:
+        """Switch memory back to a plain list of Memory models"""
+        if not isinstance(self.memory, list):
+            self.memory = self.memory.to_memories()
+
     def get_recent_memories(self, limit: int = 5) -> List[Memory]:
         """Get most recent memories"""
-        return sorted(self.memory, key=lambda x: x.timestamp, reverse=True)[:limit]
+        if hasattr(self.memory, "recent"):
+            return self.memory.recent(limit)
+        return heapq.nlargest(limit, self.memory, key=lambda x: x.timestamp)
     
     def get_important_memories(self, min_importance: int = 7) -> List[Memory]:
         """Get memories above certain importance threshold"""
+        if hasattr(self.memory, "important"):
+            return self.memory.important(min_importance)
         return [m for m in self.memory if m.importance >= min_importance]
 
     def update_relationship(self, other_character: str, trust_change: float = 0, 
@@ -77,9 +185,7 @@ class Character(BaseModel):
         rel = self.relationships[other_character]
         rel.trust = max(0.0, min(1.0, rel.trust + trust_change))
         rel.friendship = max(0.0, min(1.0, rel.friendship + friendship_change))
-        
-        if event:
-            rel.history.append(event)
+        rel.record(trust_change, friendship_change, event)
 
     def update_emotion(self, emotion: str, intensity: float) -> None:
         """Update character's emotional state"""
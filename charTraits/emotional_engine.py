@@ -1,5 +1,6 @@
-from typing import Dict, List, Optional
-from .character import Character, Emotion
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+from .character import Character
 
 class EmotionalEngine:
     # Base emotions and their opposites
@@ -9,13 +10,16 @@ class EmotionalEngine:
         "trust": "disgust",
         "anticipation": "surprise"
     }
+    POSITIVE_EMOTIONS = ("joy", "trust", "anticipation")
+    NEGATIVE_EMOTIONS = ("sadness", "fear", "disgust", "anger")
     
     @staticmethod
     def process_event(character: Character, event: str, 
                      emotion_changes: Dict[str, float]) -> None:
         """Process an event and update character's emotional state"""
         for emotion, intensity_change in emotion_changes.items():
-            current = character.emotions.get(emotion, Emotion(name=emotion)).intensity
+            existing = character.emotions.get(emotion)
+            current = existing.intensity if existing is not None else 0.0
             new_intensity = max(0.0, min(1.0, current + intensity_change))
             character.update_emotion(emotion, new_intensity)
             
@@ -39,14 +43,122 @@ class EmotionalEngine:
         if not character.emotions:
             return 0.5
             
-        positive_emotions = ["joy", "trust", "anticipation"]
-        negative_emotions = ["sadness", "fear", "disgust", "anger"]
-        
-        positive_sum = sum(character.emotions[e].intensity for e in positive_emotions if e in character.emotions)
-        negative_sum = sum(character.emotions[e].intensity for e in negative_emotions if e in character.emotions)
-        
-        total_emotions = len([e for e in positive_emotions + negative_emotions if e in character.emotions])
+        emotions = character.emotions
+        positive_sum = 0.0
+        negative_sum = 0.0
+        total_emotions = 0
+        for e in EmotionalEngine.POSITIVE_EMOTIONS:
+            if e in emotions:
+                positive_sum += emotions[e].intensity
+                total_emotions += 1
+        for e in EmotionalEngine.NEGATIVE_EMOTIONS:
+            if e in emotions:
+                negative_sum += emotions[e].intensity
+                total_emotions += 1
         if total_emotions == 0:
             return 0.5
             
         return (positive_sum - negative_sum) / total_emotions + 0.5
+
+
+# Every emotion on an EMOTION_PAIRS axis, in matrix column order
+EMOTION_AXES = [e for pair in EmotionalEngine.EMOTION_PAIRS.items() for e in pair]
+
+
+class BatchEmotionalEngine:
+    """Emotional state for a whole cast as one (characters x emotions) intensity matrix.
+
+    Covers the ``EmotionalEngine.EMOTION_PAIRS`` axes; other emotion names on a character
+    are left alone. Work happens on the matrix until ``sync_to_characters`` writes it back.
+    """
+
+    EMOTIONS = EMOTION_AXES
+    INDEX = {name: i for i, name in enumerate(EMOTION_AXES)}
+    # Column of the emotion damped when this one rises (-1: none), as in process_event
+    OPPOSITE = np.array([EMOTION_AXES.index(EmotionalEngine.EMOTION_PAIRS[e])
+                         if e in EmotionalEngine.EMOTION_PAIRS else -1 for e in EMOTION_AXES])
+    # +1 positive, -1 negative, 0 ignored by calculate_mood
+    MOOD_WEIGHTS = np.array([1.0 if e in EmotionalEngine.POSITIVE_EMOTIONS
+                             else -1.0 if e in EmotionalEngine.NEGATIVE_EMOTIONS else 0.0
+                             for e in EMOTION_AXES])
+
+    def __init__(self, characters: Sequence[Character]):
+        self.characters = list(characters)
+        self.rows = {character.name: i for i, character in enumerate(self.characters)}
+        self.intensity = np.zeros((len(self.characters), len(self.EMOTIONS)))
+        # Whether the character has the emotion at all (mood only averages over present ones)
+        self.present = np.zeros(self.intensity.shape, dtype=bool)
+        self.sync_from_characters()
+
+    def sync_from_characters(self) -> None:
+        """Reload the matrix from each character's ``emotions``"""
+        self.intensity.fill(0.0)
+        self.present.fill(False)
+        for row, character in enumerate(self.characters):
+            for name, emotion in character.emotions.items():
+                column = self.INDEX.get(name)
+                if column is not None:
+                    self.intensity[row, column] = emotion.intensity
+                    self.present[row, column] = True
+
+    def sync_to_characters(self) -> None:
+        """Write the matrix back into each character's ``emotions``"""
+        for row, character in enumerate(self.characters):
+            for column in np.flatnonzero(self.present[row]):
+                character.update_emotion(self.EMOTIONS[column], float(self.intensity[row, column]))
+
+    def _select(self, who: Optional[Sequence[Union[int, str]]]) -> Union[slice, np.ndarray]:
+        if who is None:
+            return slice(None)
+        return np.array([self.rows[w] if isinstance(w, str) else w for w in who], dtype=np.intp)
+
+    def apply_event(self, emotion_changes: Dict[str, float],
+                    who: Optional[Sequence[Union[int, str]]] = None,
+                    scale: Optional[np.ndarray] = None) -> None:
+        """Apply ``emotion_changes`` to many characters at once.
+
+        ``who`` selects characters by row or name (default: everyone) and ``scale`` optionally
+        weights the event per selected character. Like ``EmotionalEngine.process_event``,
+        each change is clamped to [0, 1] and damps a present opposite emotion by half its size;
+        all changes are applied before the damping. Emotions off the matrix axes are skipped.
+        """
+        rows = self._select(who)
+        delta = np.zeros(len(self.EMOTIONS))
+        for name, change in emotion_changes.items():
+            column = self.INDEX.get(name)
+            if column is not None:  # emotions off the EMOTION_PAIRS axes are not tracked here
+                delta[column] += change
+        changed = delta != 0
+        damping = np.zeros(len(self.EMOTIONS))
+        for column in np.flatnonzero(changed):
+            opposite = self.OPPOSITE[column]
+            if opposite >= 0:
+                damping[opposite] += abs(delta[column]) / 2
+
+        deltas = delta if scale is None else np.outer(scale, delta)
+        damps = damping if scale is None else np.outer(np.abs(scale), damping)
+
+        present = self.present[rows]
+        present[..., changed] = True
+        values = np.clip(self.intensity[rows] + deltas, 0.0, 1.0)
+        values = np.where(present, np.maximum(0.0, values - damps), values)
+        self.intensity[rows] = values
+        self.present[rows] = present
+
+    def decay(self, rate: float = 0.05) -> None:
+        """Let every emotion fade toward zero by ``rate`` per tick"""
+        self.intensity *= 1.0 - rate
+
+    def moods(self) -> np.ndarray:
+        """``EmotionalEngine.calculate_mood`` for every character"""
+        counted = self.present & (self.MOOD_WEIGHTS != 0)
+        totals = counted.sum(axis=1)
+        scores = (self.intensity * counted) @ self.MOOD_WEIGHTS
+        return np.where(totals > 0, scores / np.maximum(totals, 1) + 0.5, 0.5)
+
+    def dominant_emotions(self) -> List[Optional[str]]:
+        """``EmotionalEngine.get_dominant_emotion`` for every character (ties go to axis order)"""
+        masked = np.where(self.present, self.intensity, -1.0)
+        columns = masked.argmax(axis=1)
+        has_any = self.present.any(axis=1)
+        return [self.EMOTIONS[c] if any_ else None for c, any_ in zip(columns, has_any)]
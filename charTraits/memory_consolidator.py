@@ -0,0 +1,156 @@
+import heapq
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from storyEngine.scheduler import submit_in_context
+
+from .character import Character, Memory
+
+MemoryKey = Tuple[str, float]
+
+
+def memory_key(memory: Memory) -> MemoryKey:
+    """Identifies a memory across rebuilds (MemoryStore items are new objects on each read)"""
+    return memory.content, memory.timestamp
+
+
+def merge_contents(memories: Sequence[Memory], max_chars: int = 400) -> str:
+    """Extractive fallback for an LLM summary: contents by importance, cut to ``max_chars``"""
+    ranked = sorted(memories, key=lambda m: (-m.importance, m.timestamp))
+    text = "; ".join(m.content for m in ranked)
+    return text if len(text) <= max_chars else text[:max_chars - 3].rstrip() + "..."
+
+
+class MemoryConsolidator:
+    """Keeps each character's memory within ``budget`` by merging its weakest memories.
+
+    Once a character holds more than ``budget`` memories, the ``batch`` with the lowest
+    importance-times-recency weight are merged into one consolidated memory and evicted.
+    ``summarize(name, contents)`` writes the merged text on a background thread. The
+    memory list itself is only changed by ``maybe_consolidate`` on the caller's thread,
+    when it picks up a finished summary. Without a summarizer, or when it fails, batches
+    are merged extractively. If summaries fall more than a batch behind, the overflow is
+    merged extractively at once, so a character never holds more than ``budget + batch``.
+    ``on_merge(character, keys, merged)`` is told about every merge (e.g. to log it).
+    """
+
+    TAG = "consolidated"
+
+    def __init__(self, summarize: Optional[Callable[[str, List[str]], str]] = None,
+                 budget: int = 200, batch: int = 20, half_life: float = 3600.0,
+                 on_merge: Optional[Callable[[Character, Set[MemoryKey], Memory], None]] = None):
+        if batch < 2 or budget < batch:
+            raise ValueError("need 2 <= batch <= budget")
+        self.summarize = summarize
+        self.budget = budget
+        self.batch = batch
+        self.half_life = half_life
+        self.on_merge = on_merge
+        self.consolidations = 0
+        self.evicted = 0
+        self.fallbacks = 0
+        # character name -> (summary future, memories it merges)
+        self._pending: Dict[str, Tuple[Future, List[Memory]]] = {}
+        self._executor = (ThreadPoolExecutor(max_workers=1, thread_name_prefix="consolidator")
+                          if summarize else None)
+
+    def maybe_consolidate(self, character: Character, now: Optional[float] = None) -> None:
+        """Apply ``character``'s finished summary, then start another if over budget"""
+        pending = self._pending.get(character.name)
+        if pending is not None and pending[0].done():
+            self._finish(character)
+            pending = None
+        if len(character.memory) <= self.budget:
+            return
+        if pending is None and self._executor is not None:
+            batch = self.select(character, now=now)
+            future = submit_in_context(self._executor, self.summarize,
+                                       character.name, [m.content for m in batch])
+            pending = self._pending[character.name] = (future, batch)
+        limit = self.budget if pending is None else self.budget + self.batch
+        exclude = {memory_key(m) for m in pending[1]} if pending else set()
+        while len(character.memory) > limit:
+            self.fallbacks += 1
+            batch = self.select(character, exclude, now)
+            self.merge(character, batch, merge_contents(batch))
+
+    def select(self, character: Character, exclude: Iterable[MemoryKey] = (),
+               now: Optional[float] = None) -> List[Memory]:
+        """The ``batch`` least important, least recent memories not in ``exclude``"""
+        now = now if now is not None else time.time()
+        half_life = self.half_life
+        exclude = set(exclude)
+
+        def weight(memory: Memory) -> float:
+            age = max(0.0, now - memory.timestamp)
+            return memory.importance * (0.5 + 0.5 * 0.5 ** (age / half_life))
+
+        candidates = (m for m in character.memory if memory_key(m) not in exclude)
+        return heapq.nsmallest(self.batch, candidates, key=weight)
+
+    def merge(self, character: Character, batch: List[Memory], content: str) -> None:
+        """Replace ``batch`` in ``character.memory`` with one consolidated memory"""
+        keys: Set[MemoryKey] = {memory_key(m) for m in batch}
+        merged = Memory.trusted(
+            content,
+            timestamp=max(m.timestamp for m in batch),
+            importance=max(m.importance for m in batch),
+            tags=sorted({tag for m in batch for tag in m.tags} | {self.TAG}),
+            related_characters=sorted({name for m in batch for name in m.related_characters}),
+        )
+        removed = self.replace(character, keys, merged)
+        if not removed:
+            return  # the batch is already gone (e.g. the story was restored meanwhile)
+        self.consolidations += 1
+        self.evicted += removed
+        if self.on_merge:
+            self.on_merge(character, keys, merged)
+
+    @staticmethod
+    def replace(character: Character, keys: Set[MemoryKey], merged: Memory) -> int:
+        """Swap the memories with ``keys`` for ``merged``; returns how many were removed"""
+        memories = character.memory
+        kept = [m for m in memories if memory_key(m) not in keys]
+        removed = len(memories) - len(kept)
+        if not removed:
+            return 0
+        kept.append(merged)
+        if isinstance(memories, list):
+            character.memory = kept
+        else:
+            character.memory = type(memories).from_memories(kept, tags=memories.tags,
+                                                            names=memories.names)
+        return removed
+
+    def _finish(self, character: Character) -> None:
+        future, batch = self._pending.pop(character.name)
+        content = None
+        if not future.cancelled() and future.exception() is None:
+            content = future.result()
+        if not content:
+            self.fallbacks += 1
+            content = merge_contents(batch)
+        self.merge(character, batch, content.strip())
+
+    def flush(self, characters: Iterable[Character], timeout: Optional[float] = None) -> None:
+        """Wait for every pending summary of ``characters`` and apply it"""
+        for character in characters:
+            pending = self._pending.get(character.name)
+            if pending is not None:
+                wait([pending[0]], timeout=timeout)
+                if pending[0].done():
+                    self._finish(character)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "consolidations": self.consolidations,
+            "evicted": self.evicted,
+            "fallbacks": self.fallbacks,
+            "pending": len(self._pending),
+        }
+
+    def close(self) -> None:
+        self._pending.clear()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,160 @@
+import re
+from bisect import bisect_left, insort
+from operator import is_
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from .character import Memory
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Vocabulary words are indexed by their character n-grams of this length, once a
+# character knows enough distinct words for scanning them all to cost more
+GRAM = 3
+GRAM_INDEX_MIN_WORDS = 1024
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a piece of text"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def grams(word: str) -> Set[str]:
+    """The ``GRAM``-character substrings of a word"""
+    return {word[i:i + GRAM] for i in range(len(word) - GRAM + 1)}
+
+
+class MemoryIndex:
+    """Incremental search index over one character's memory list.
+
+    Memories are referred to by their position in ``Character.memory``. Appends are indexed
+    incrementally by ``sync``, and any other change to the list triggers a rebuild. A plain
+    list is checked by the identity of its last item; with ``verify``
+    (``Character.memory_index``), every item is checked when the list object or its length
+    changed. A MemoryStore is append-only, so only a different store object means a rebuild.
+    Substring search goes through the word vocabulary: the words containing a query token
+    lead to the memories through their postings. Past ``GRAM_INDEX_MIN_WORDS`` distinct
+    words, those words are found through their trigrams instead of by a scan.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.lowered: List[str] = []
+        # token -> {position: term frequency}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        # trigram -> vocabulary words containing it; None until the vocabulary is large
+        self.word_grams: Optional[Dict[str, List[str]]] = None
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+        self.tag_postings: Dict[str, Set[int]] = {}
+        self.by_time: List[Tuple[float, int]] = []
+        # The indexed Memory objects, to notice items replaced in place
+        self._items: List["Memory"] = []
+        self._source = None
+
+    def __len__(self) -> int:
+        return len(self.lowered)
+
+    def sync(self, memories: Sequence["Memory"], verify: bool = False) -> None:
+        """Bring the index up to date with ``memories`` (a list or a MemoryStore)"""
+        count = len(self.lowered)
+        if not isinstance(memories, list):
+            # Columnar stores build items on access and only ever grow, so track the store
+            stale = memories is not self._source
+        elif count > len(memories) or len(self._items) != count:
+            stale = True
+        elif verify and (memories is not self._source or len(memories) != count):
+            stale = not all(map(is_, memories, self._items))
+        else:
+            stale = count and memories[count - 1] is not self._items[-1]
+        if stale or count > len(memories):
+            self.clear()
+            count = 0
+        self._source = memories
+        for memory in memories[count:]:
+            self._add(memory)
+
+    def _add(self, memory: "Memory") -> None:
+        position = len(self.lowered)
+        lowered = memory.content.lower()
+        self.lowered.append(lowered)
+
+        tokens = TOKEN_PATTERN.findall(lowered)
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        for token in tokens:
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                if self.word_grams is not None:
+                    self._add_grams(token)
+            postings[position] = postings.get(position, 0) + 1
+        if self.word_grams is None and len(self.postings) >= GRAM_INDEX_MIN_WORDS:
+            self.word_grams = {}
+            for word in self.postings:
+                self._add_grams(word)
+        for tag in memory.tags:
+            self.tag_postings.setdefault(tag, set()).add(position)
+        insort(self.by_time, (memory.timestamp, position))
+        if isinstance(self._source, list):
+            self._items.append(memory)
+
+    def _add_grams(self, word: str) -> None:
+        for gram in grams(word):
+            self.word_grams.setdefault(gram, []).append(word)
+
+    def containing(self, query: str) -> Optional[Set[int]]:
+        """Positions whose content contains ``query`` (case-insensitive); None means all"""
+        query = query.lower()
+        if not query:
+            return None
+        tokens = TOKEN_PATTERN.findall(query)
+        if not tokens:
+            return {i for i, content in enumerate(self.lowered) if query in content}
+        # Each query token lies inside some word of a matching memory, so only memories
+        # with a word containing the longest token can match
+        token = max(tokens, key=len)
+        if self.word_grams is None or len(token) < GRAM:
+            # A small vocabulary, or a token too short for trigrams
+            words = [word for word in self.postings if token in word]
+        else:
+            posted = [self.word_grams.get(gram) for gram in grams(token)]
+            if not all(posted):
+                return set()
+            words = [word for word in min(posted, key=len) if token in word]
+        candidates: Set[int] = set()
+        for word in words:
+            candidates.update(self.postings[word])
+        return {i for i in candidates if query in self.lowered[i]}
+
+    def tagged(self, tags: Iterable[str]) -> Set[int]:
+        """Positions carrying any of ``tags``"""
+        result: Set[int] = set()
+        for tag in tags:
+            result |= self.tag_postings.get(tag, set())
+        return result
+
+    def since(self, timestamp: float) -> Set[int]:
+        """Positions with a timestamp at or after ``timestamp``"""
+        start = bisect_left(self.by_time, (timestamp, -1))
+        return {position for _, position in self.by_time[start:]}
+
+    def search(self, query: str, tags: Optional[List[str]] = None,
+               since: Optional[float] = None) -> List[int]:
+        """Positions matching every given filter, in memory-list order"""
+        filters = []
+        if tags:
+            filters.append(self.tagged(tags))
+        if since is not None:
+            filters.append(self.since(since))
+        matches = self.containing(query)
+        if matches is not None:
+            filters.append(matches)
+        if not filters:
+            return list(range(len(self.lowered)))
+        filters.sort(key=len)
+        result = filters[0]
+        for other in filters[1:]:
+            result = result & other
+        return sorted(result)
@@ -1,3 +1,4 @@
+import heapq
 from typing import List, Optional
 from datetime import datetime, timedelta
 from .character import Memory, Character
@@ -8,39 +9,26 @@ class MemoryManager:
                        tags: Optional[List[str]] = None,
                        timeframe: Optional[timedelta] = None) -> List[Memory]:
         """Search character's memories based on content, tags, and timeframe"""
-        results = []
-        current_time = datetime.now()
+        since = None
+        if timeframe:
+            since = datetime.now().timestamp() - timeframe.total_seconds()
         
-        for memory in character.memory:
-            # Check content match
-            if query.lower() in memory.content.lower():
-                # Check tags if specified
-                if tags and not any(tag in memory.tags for tag in tags):
-                    continue
-                    
-                # Check timeframe if specified
-                if timeframe and (current_time - memory.timestamp) > timeframe:
-                    continue
-                    
-                results.append(memory)
-                
-        return results
+        positions = character.memory_index().search(query, tags=tags, since=since)
+        return [character.memory[i] for i in positions]
 
     @staticmethod
     def summarize_memories(character: Character, topic: Optional[str] = None) -> str:
         """Generate a summary of character's memories, optionally filtered by topic"""
         memories = character.memory
         if topic:
-            memories = [m for m in memories if topic.lower() in m.content.lower()]
+            memories = [memories[i] for i in character.memory_index().search(topic)]
             
         if not memories:
             return f"{character.name} has no relevant memories."
             
-        # Sort by importance and recency
-        memories.sort(key=lambda x: (x.importance, x.timestamp), reverse=True)
+        # Top 5 by importance, then recency: a heap selection, O(n log 5) instead of a full sort
+        top = heapq.nlargest(5, memories, key=lambda x: (x.importance, x.timestamp))
         
-        summary = f"{character.name}'s key memories:\n"
-        for memory in memories[:5]:  # Top 5 memories
-            summary += f"- {memory.content} (Importance: {memory.importance})\n"
-            
-        return summary
+        lines = [f"{character.name}'s key memories:"]
+        lines.extend(f"- {memory.content} (Importance: {memory.importance})" for memory in top)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,67 @@
+import heapq
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .character import Character, Memory
+from .memory_index import tokenize
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from had has have he her his i in is it its me my "
+    "of on or our she so that the their them they this to was we were what with you your".split()
+)
+
+
+class MemoryRetriever:
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+    # Query terms in more than this share of memories carry almost no signal and are skipped
+    MAX_DOC_FREQUENCY = 0.5
+
+    @staticmethod
+    def score_memories(character: Character, query: str) -> Dict[int, float]:
+        """BM25 score of each memory position that shares a term with ``query``"""
+        index = character.memory_index()
+        doc_count = len(index)
+        if not doc_count:
+            return {}
+        avg_length = index.total_length / doc_count or 1.0
+        k1, b = MemoryRetriever.K1, MemoryRetriever.B
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)) - STOPWORDS:
+            postings = index.postings.get(term)
+            if not postings or len(postings) > doc_count * MemoryRetriever.MAX_DOC_FREQUENCY + 1:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            lengths = index.doc_lengths
+            for position, tf in postings.items():
+                norm = tf + k1 * (1 - b + b * lengths[position] / avg_length)
+                scores[position] = scores.get(position, 0.0) + idf * tf * (k1 + 1) / norm
+        return scores
+
+    @staticmethod
+    def top_memories(character: Character, query: str, k: int = 3,
+                     half_life: float = 3600.0, now: Optional[float] = None) -> List[Memory]:
+        """The ``k`` memories most relevant to ``query``, weighted by importance and recency.
+
+        Relevance is BM25; it is scaled up to 2x for importance 10 and decays toward half
+        weight as a memory ages by ``half_life`` seconds.
+        """
+        scores = MemoryRetriever.score_memories(character, query)
+        if not scores:
+            return []
+        now = now if now is not None else datetime.now().timestamp()
+        memories = character.memory
+
+        def weighted(position: int) -> float:
+            memory = memories[position]
+            importance = 1 + (memory.importance - 1) / 9
+            age = max(0.0, now - memory.timestamp)
+            recency = 0.5 + 0.5 * 0.5 ** (age / half_life)
+            return scores[position] * importance * recency
+
+        best = heapq.nlargest(k, scores, key=weighted)
+        return [memories[position] for position in best]
@@ -0,0 +1,128 @@
+from array import array
+from bisect import insort
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional
+
+from .character import Memory
+
+
+class StringTable:
+    """Interns repeated strings (tags, character names) as small integer ids"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: str) -> int:
+        ident = self.ids.get(value)
+        if ident is None:
+            ident = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return ident
+
+
+class MemoryStore(Sequence):
+    """Columnar, append-only memory storage for characters with very long histories.
+
+    Behaves like a read-only list of ``Memory`` that also supports ``append``, so it can
+    replace ``Character.memory`` (see ``Character.compact_memory``). ``Memory`` objects are
+    only built when an item is read. Existing items never change; edits such as
+    consolidation build a new store, which is what ``MemoryIndex`` relies on.
+    """
+
+    def __init__(self, memories: Iterable[Memory] = (), tags: Optional[StringTable] = None,
+                 names: Optional[StringTable] = None):
+        self.contents: List[str] = []
+        self.timestamps = array("d")
+        self.importance = array("b")
+        # CSR-style tag and related-character ids: item i owns ids[offsets[i]:offsets[i + 1]]
+        self.tag_ids = array("i")
+        self.tag_offsets = array("I", [0])
+        self.related_ids = array("i")
+        self.related_offsets = array("I", [0])
+        # Tables can be shared across a cast so each tag/name is stored once
+        self.tags = tags if tags is not None else StringTable()
+        self.names = names if names is not None else StringTable()
+        # Positions ordered by timestamp, and by importance level (1-10) in arrival order
+        self.by_time = array("I")
+        self.by_importance: List[array] = [array("I") for _ in range(11)]
+        self.extend(memories)
+
+    @classmethod
+    def from_memories(cls, memories: Iterable[Memory], **kwargs) -> "MemoryStore":
+        return cls(memories, **kwargs)
+
+    def to_memories(self) -> List[Memory]:
+        return [self._build(i) for i in range(len(self.contents))]
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._build(i) for i in range(*index.indices(len(self.contents)))]
+        if index < 0:
+            index += len(self.contents)
+        if not 0 <= index < len(self.contents):
+            raise IndexError("memory index out of range")
+        return self._build(index)
+
+    def append(self, memory: Memory) -> None:
+        self.add(memory.content, memory.timestamp, memory.importance,
+                 memory.tags, memory.related_characters)
+
+    def extend(self, memories: Iterable[Memory]) -> None:
+        for memory in memories:
+            self.append(memory)
+
+    def add(self, content: str, timestamp: float, importance: int = 1,
+            tags: Iterable[str] = (), related_characters: Iterable[str] = ()) -> int:
+        """Append one memory from raw fields and return its position"""
+        position = len(self.contents)
+        self.contents.append(content)
+        self.timestamps.append(timestamp)
+        self.importance.append(importance)
+        self.tag_ids.extend(self.tags.intern(tag) for tag in tags)
+        self.tag_offsets.append(len(self.tag_ids))
+        self.related_ids.extend(self.names.intern(name) for name in related_characters)
+        self.related_offsets.append(len(self.related_ids))
+
+        if not self.by_time or self.timestamps[self.by_time[-1]] <= timestamp:
+            self.by_time.append(position)
+        else:
+            insort(self.by_time, position, key=self.timestamps.__getitem__)
+        self.by_importance[importance].append(position)
+        return position
+
+    def recent(self, limit: int = 5) -> List[Memory]:
+        """Most recent memories first"""
+        positions = self.by_time[max(0, len(self.by_time) - limit):] if limit > 0 else []
+        return [self._build(i) for i in reversed(positions)]
+
+    def important(self, min_importance: int = 7) -> List[Memory]:
+        """Memories at or above ``min_importance``, in the order they were added"""
+        positions = sorted(p for level in range(max(1, min_importance), 11)
+                           for p in self.by_importance[level])
+        return [self._build(i) for i in positions]
+
+    def top_importance(self, limit: int = 5) -> List[Memory]:
+        """Highest-importance memories, newest first within a level"""
+        result: List[Memory] = []
+        for level in range(10, 0, -1):
+            for position in reversed(self.by_importance[level]):
+                if len(result) == limit:
+                    return result
+                result.append(self._build(position))
+        return result
+
+    def _build(self, i: int) -> Memory:
+        tags = self.tags.values
+        names = self.names.values
+        return Memory.trusted(
+            content=self.contents[i],
+            timestamp=self.timestamps[i],
+            importance=self.importance[i],
+            tags=[tags[t] for t in self.tag_ids[self.tag_offsets[i]:self.tag_offsets[i + 1]]],
+            related_characters=[names[n] for n in
+                                self.related_ids[self.related_offsets[i]:self.related_offsets[i + 1]]]
+        )
@@ -1,110 +1,321 @@
 import json
 import re
-from typing import List
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 from .character import Character
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def parse_characters_from_response(response_text: str) -> List[Character]:
+# A cast needs at least this many characters to be usable
+MIN_CHARACTERS = 2
+
+CODE_FENCE = re.compile(r'```(?:json)?')
+TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+NEXT_VISIBLE = re.compile(r'\s*(\S)')
+BLOCK_SPLIT = re.compile(r'\n(?=Character \d+:|Name:)')
+FIELD_PATTERNS = {
+    'name': re.compile(r'Name:\s*(.+?)(?=\n|$)', re.IGNORECASE),
+    'affiliation': re.compile(r'(?:Affiliation|Tribe|Group):\s*(.+?)(?=\n|$)', re.IGNORECASE),
+    'skills': re.compile(r'Skills:\s*\[?(.+?)\]?(?=\n|$)', re.IGNORECASE),
+    'memory': re.compile(r'Memory:\s*\[?(.+?)\]?(?=\n|$)', re.IGNORECASE),
+    'personality_traits': re.compile(r'(?:Personality Traits|Traits):\s*\[?(.+?)\]?(?=\n|$)', re.IGNORECASE)
+}
+LIST_FIELDS = ('skills', 'memory', 'personality_traits')
+
+CLOSERS = {'{': '}', '[': ']'}
+
+
+class ParserStats:
+    """Process-wide counters for cast parsing"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.characters = 0
+        self.rejected = 0
+        self.comments_removed = 0
+        self.trailing_commas_removed = 0
+        self.truncations_closed = 0
+        self.retries_avoided = 0
+        self.early_stops = 0
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: value for name, value in vars(self).items() if not name.startswith('_')}
+
+
+stats = ParserStats()
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, list):
+        return [item if isinstance(item, str) else str(item.get('content', item))
+                if isinstance(item, dict) else str(item) for item in value]
+    return []
+
+
+def character_from_dict(data: Dict[str, Any]) -> Character:
+    """Build a Character from one LLM-produced JSON object, filling in missing fields
+
+    The whole character, memories included, is validated in a single pass.
     """
-    Parse the LLM's character descriptions into Character objects.
+    return Character.model_validate({
+        'name': data.get('name') or 'Unknown',
+        'affiliation': data.get('affiliation') or data.get('tribe') or data.get('group') or 'Unknown Group',
+        'skills': _as_list(data.get('skills', [])),
+        'memory': [{'content': content} for content in _as_list(data.get('memory', []))],
+        'personality_traits': _as_list(data.get('personality_traits', [])),
+        'archetype': data.get('archetype') or 'Support Character',
+        'role': data.get('role') or 'Secondary Character'
+    })
+
+
+def _scan_state(text: str) -> Tuple[bool, List[str]]:
+    """Whether ``text`` ends inside a string, and its unclosed brackets"""
+    in_string = escaped = False
+    stack: List[str] = []
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in CLOSERS:
+            stack.append(ch)
+        elif ch in '}]' and stack:
+            stack.pop()
+    return in_string, stack
+
+
+def close_truncated(text: str) -> Optional[Any]:
+    """Best-effort parse of a JSON value cut off mid-stream.
+
+    Closes an open string and brackets; if that still fails, drops trailing partial
+    members one comma at a time.
     """
-    characters = []
-    
-    # Clean up the response text to help with JSON parsing
-    cleaned_text = cleanup_text(response_text)
-    logger.info(f"Attempting to parse response: {cleaned_text[:200]}...")
-    
-    try:
-        # Try to find and parse JSON content
-        json_match = re.search(r'\{[\s\S]*\}', cleaned_text)
-        if json_match:
-            data = json.loads(json_match.group(0))
-            char_list = data.get('characters', [])
-            
-            for char in char_list:
-                try:
-                    characters.append(Character(
-                        name=char['name'],
-                        tribe=char['tribe'],
-                        skills=char['skills'],
-                        memory=char['memory'],
-                        personality_traits=char['personality_traits']
-                    ))
-                except KeyError as e:
-                    logger.error(f"Missing required field in character data: {e}")
-                    continue
-                
-    except json.JSONDecodeError:
-        logger.warning("Failed to parse JSON, falling back to regex parsing")
-        # Fallback to regex parsing
-        char_blocks = re.split(r'\n(?=Character \d+:|Name:)', cleaned_text)
-        
-        for block in char_blocks:
-            if not block.strip():
+    for _ in range(8):
+        in_string, stack = _scan_state(text)
+        candidate = text + ('"' if in_string else '') + ''.join(CLOSERS[c] for c in reversed(stack))
+        candidate = TRAILING_COMMA.sub(r'\1', candidate)
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            cut = text.rstrip().rfind(',')
+            if cut <= 0:
+                return None
+            text = text[:cut]
+    return None
+
+
+class CastStreamParser:
+    """Tolerant, incremental reader for the world builder's cast JSON.
+
+    ``feed`` accepts output chunks as they stream in and returns each character as soon
+    as its object closes. Leading prose, comments, code fences, trailing commas and a
+    truncated final object are repaired instead of failing the whole response. Once ``max_characters``
+    valid characters have arrived ``done`` is set so the caller can stop the stream.
+    """
+
+    def __init__(self, max_characters: Optional[int] = None):
+        self.max_characters = max_characters
+        self.characters: List[Character] = []
+        self.done = False
+        self.text = ''
+        self.repairs = 0
+        self._clean: List[str] = []  # text with comments removed
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._comment: Optional[str] = None
+        self._object_start: Optional[int] = None
+        self._root_characters = 0  # characters accepted before the current root opened
+        self._root_closed = False
+
+    def feed(self, chunk: str) -> List[Character]:
+        """Consume a chunk of model output and return characters completed by it"""
+        if self.done or not chunk:
+            return []
+        self.text += chunk
+        return self._scan(final=False)
+
+    def finish(self) -> List[Character]:
+        """Flush the stream, repairing a truncated last character, and record stats"""
+        new = self._scan(final=True) if not self.done else []
+        if not self.done and self._object_start is not None:
+            data = close_truncated(''.join(self._clean[self._object_start:]))
+            if isinstance(data, dict):
+                self.repairs += 1
+                stats.add(truncations_closed=1)
+                new += self._accept(data)
+        if not self.characters and '{' not in self.text:
+            new += self._accept_blocks(self.text)
+        stats.add(responses=1)
+        if self.repairs and len(self.characters) >= MIN_CHARACTERS:
+            stats.add(retries_avoided=1)
+        return new
+
+    def _scan(self, final: bool) -> List[Character]:
+        new: List[Character] = []
+        text = self.text
+        clean = self._clean
+        i = self._pos
+        while i < len(text) and not self._root_closed:
+            ch = text[i]
+            if self._comment == '//':
+                if ch == '\n':
+                    self._comment = None
+                    clean.append(ch)
+                i += 1
+                continue
+            if self._comment == '/*':
+                if ch == '*' and text.startswith('/', i + 1):
+                    self._comment = None
+                    i += 2
+                elif ch == '*' and i + 1 == len(text) and not final:
+                    break
+                else:
+                    i += 1
                 continue
-                
-            try:
-                char_dict = extract_character_info(block)
-                if char_dict:
-                    characters.append(Character(**char_dict))
-            except Exception as e:
-                logger.error(f"Error parsing character block: {e}")
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                clean.append(ch)
+                i += 1
                 continue
-    
-    if not characters:
-        logger.error("No characters could be parsed from the response")
-        # Create a default character as fallback
-        characters.append(Character(
-            name="Default Character",
-            tribe="Unknown",
-            skills=["Adaptability"],
-            memory=["I am a mysterious character"],
-            personality_traits=["Mysterious"]
-        ))
-    
-    return characters
-
-def cleanup_text(text: str) -> str:
-    """Clean up text to help with parsing"""
-    # Remove any markdown formatting
-    text = re.sub(r'```json\s*|\s*```', '', text)
-    # Remove any leading/trailing whitespace
-    text = text.strip()
-    return text
+            if ch == '/' and self._stack:
+                if i + 1 == len(text) and not final:
+                    break  # wait for the next chunk to tell a comment from stray text
+                if text[i + 1:i + 2] in ('/', '*'):
+                    self._comment = text[i:i + 2]
+                    self.repairs += 1
+                    stats.add(comments_removed=1)
+                    i += 2
+                    continue
+            if not self._stack:
+                # Prose or code fences before the JSON starts. The root is a '{', or a '['
+                # holding objects; brackets in prose like "[see below]" are skipped.
+                if ch == '[':
+                    match = NEXT_VISIBLE.match(text, i + 1)
+                    if match is None and not final:
+                        break  # wait for the next chunk to see what the '[' holds
+                    if match is None or match.group(1) != '{':
+                        i += 1
+                        continue
+                if ch in CLOSERS:
+                    self._stack.append(ch)
+                    clean.append(ch)
+                    self._root_characters = len(self.characters)
+                i += 1
+                continue
+            clean.append(ch)
+            i += 1
+            if ch == '"':
+                self._in_string = True
+            elif ch in CLOSERS:
+                if ch == '{' and self._is_cast_array(self._stack):
+                    self._object_start = len(clean) - 1
+                self._stack.append(ch)
+            elif ch in '}]':
+                self._stack.pop()
+                if ch == '}' and self._object_start is not None and self._is_cast_array(self._stack):
+                    new += self._accept_text(''.join(clean[self._object_start:]))
+                    self._object_start = None
+                    if self.done:
+                        break
+                if not self._stack:
+                    if len(self.characters) > self._root_characters:
+                        self._root_closed = True
+                    else:
+                        clean.clear()  # not the cast after all (e.g. "{name}"); keep looking
+        self._pos = i
+        return new
+
+    @staticmethod
+    def _is_cast_array(stack: List[str]) -> bool:
+        """Whether the innermost container holds character objects"""
+        return stack[-1:] == ['['] and len(stack) <= 2
+
+    def _accept_text(self, text: str) -> List[Character]:
+        repaired, count = TRAILING_COMMA.subn(r'\1', text)
+        if count:
+            self.repairs += 1
+            stats.add(trailing_commas_removed=count)
+        try:
+            data = json.loads(repaired)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed character object: {e}")
+            stats.add(rejected=1)
+            return []
+        return self._accept(data)
+
+    def _accept(self, data: Any) -> List[Character]:
+        if not isinstance(data, dict):
+            stats.add(rejected=1)
+            return []
+        try:
+            character = character_from_dict(data)
+        except Exception as e:
+            logger.warning(f"Skipping invalid character: {e}")
+            stats.add(rejected=1)
+            return []
+        self.characters.append(character)
+        stats.add(characters=1)
+        if self.max_characters and len(self.characters) >= self.max_characters:
+            self.done = True
+            stats.add(early_stops=1)
+        return [character]
+
+    def _accept_blocks(self, text: str) -> List[Character]:
+        """Fallback for "Name: ..." style prose instead of JSON"""
+        new: List[Character] = []
+        for block in BLOCK_SPLIT.split(CODE_FENCE.sub('', text)):
+            if block.strip() and FIELD_PATTERNS['name'].search(block):
+                new += self._accept(extract_character_info(block))
+        return new
+
+
+def parse_characters_from_response(response_text: str,
+                                   max_characters: Optional[int] = None) -> List[Character]:
+    """
+    Parse the LLM's character descriptions into Character objects.
+    """
+    parser = CastStreamParser(max_characters=max_characters)
+    parser.feed(response_text)
+    parser.finish()
+    if not parser.characters:
+        logger.error(f"No characters could be parsed from the response: {response_text[:200]}")
+    return parser.characters
+
 
 def extract_character_info(block: str) -> dict:
     """Extract character information from a text block using regex"""
-    patterns = {
-        'name': r'Name:\s*(.+?)(?=\n|$)',
-        'tribe': r'(?:Tribe|Group|Affiliation):\s*(.+?)(?=\n|$)',
-        'skills': r'Skills:\s*\[?(.+?)\]?(?=\n|$)',
-        'memory': r'Memory:\s*\[?(.+?)\]?(?=\n|$)',
-        'personality_traits': r'(?:Personality Traits|Traits):\s*\[?(.+?)\]?(?=\n|$)'
-    }
-    
     result = {}
-    for field, pattern in patterns.items():
-        match = re.search(pattern, block, re.IGNORECASE)
+    for field, pattern in FIELD_PATTERNS.items():
+        match = pattern.search(block)
         if match:
             value = match.group(1).strip()
-            if field in ['skills', 'memory', 'personality_traits']:
-                result[field] = parse_list(value)
-            else:
-                result[field] = value
-        else:
-            # Provide default values for missing fields
-            if field == 'name':
-                result[field] = "Unknown Character"
-            elif field == 'tribe':
-                result[field] = "Unknown Group"
-            else:
-                result[field] = []
-    
+            result[field] = parse_list(value) if field in LIST_FIELDS else value
+        elif field in LIST_FIELDS:
+            result[field] = []
     return result
 
+
 def parse_list(text: str) -> List[str]:
     """Parse a comma-separated or list-like string into a list of strings"""
     # Remove brackets if present
@@ -1,19 +1,23 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from .character import Character, Relationship
 
 class RelationshipManager:
+    # (trust, friendship) change per unit of intensity for each interaction type
+    INTERACTION_EFFECTS = {
+        "positive": (0.1, 0.1),
+        "negative": (-0.1, -0.1),
+        "neutral": (0.0, 0.05),
+        "conflict": (-0.15, -0.05),
+        "cooperation": (0.15, 0.1),
+        "betrayal": (-0.3, -0.2)
+    }
+
     @staticmethod
     def process_interaction(character1: Character, character2: Character, 
                           interaction_type: str, intensity: float = 0.1) -> None:
         """Process an interaction between two characters"""
-        interaction_effects = {
-            "positive": (0.1, 0.1),  # (trust, friendship)
-            "negative": (-0.1, -0.1),
-            "neutral": (0.0, 0.05),
-            "conflict": (-0.15, -0.05),
-            "cooperation": (0.15, 0.1),
-            "betrayal": (-0.3, -0.2)
-        }
+        interaction_effects = RelationshipManager.INTERACTION_EFFECTS
         
         if interaction_type in interaction_effects:
             trust_change, friendship_change = interaction_effects[interaction_type]
@@ -31,7 +35,156 @@ class RelationshipManager:
             return f"{character.name} has no established relationship with {other_character}."
             
         rel = character.relationships[other_character]
-        trust_level = "high" if rel.trust > 0.7 else "moderate" if rel.trust > 0.3 else "low"
-        friendship_level = "strong" if rel.friendship > 0.7 else "moderate" if rel.friendship > 0.3 else "weak"
+        return RelationshipManager.describe(character.name, other_character, rel.trust, rel.friendship)
+
+    @staticmethod
+    def describe(name: str, other_character: str, trust: float, friendship: float) -> str:
+        trust_level = "high" if trust > 0.7 else "moderate" if trust > 0.3 else "low"
+        friendship_level = "strong" if friendship > 0.7 else "moderate" if friendship > 0.3 else "weak"
         
-        return f"{character.name}'s relationship with {other_character}: {trust_level} trust, {friendship_level} friendship."
+        return f"{name}'s relationship with {other_character}: {trust_level} trust, {friendship_level} friendship."
+
+
+class RelationshipMatrix:
+    """Dense trust/friendship matrices for a cast, indexed by character.
+
+    ``trust[i, j]`` is how much character i trusts j. Cells without an established
+    relationship hold the ``Relationship`` defaults and are flagged off in ``known``.
+    Relationships with characters outside the cast are not represented. Interactions
+    applied since the last sync are counted in ``new_interactions``, ``new_positive`` and
+    ``new_negative``, and added to the ``Relationship`` counters by ``sync_to_characters``.
+    """
+
+    INTERACTION_TYPES = list(RelationshipManager.INTERACTION_EFFECTS)
+    TYPE_INDEX = {kind: i for i, kind in enumerate(INTERACTION_TYPES)}
+    EFFECTS = np.array([RelationshipManager.INTERACTION_EFFECTS[t] for t in INTERACTION_TYPES])
+
+    def __init__(self, characters: Sequence[Character]):
+        self.characters = list(characters)
+        self.names = [character.name for character in self.characters]
+        self.rows = {name: i for i, name in enumerate(self.names)}
+        size = len(self.characters)
+        self.trust = np.full((size, size), Relationship.model_fields["trust"].default)
+        self.friendship = np.full((size, size), Relationship.model_fields["friendship"].default)
+        self.known = np.zeros((size, size), dtype=bool)
+        self.new_interactions = np.zeros((size, size), dtype=np.int32)
+        self.new_positive = np.zeros((size, size), dtype=np.int32)
+        self.new_negative = np.zeros((size, size), dtype=np.int32)
+        self.sync_from_characters()
+
+    def sync_from_characters(self) -> None:
+        """Reload the matrices from each character's ``relationships``"""
+        for counts in (self.new_interactions, self.new_positive, self.new_negative):
+            counts.fill(0)
+        for i, character in enumerate(self.characters):
+            for other, rel in character.relationships.items():
+                j = self.rows.get(other)
+                if j is not None:
+                    self.trust[i, j] = rel.trust
+                    self.friendship[i, j] = rel.friendship
+                    self.known[i, j] = True
+
+    def sync_to_characters(self) -> None:
+        """Write every known relationship back into ``Character.relationships``"""
+        for i, j in zip(*np.nonzero(self.known)):
+            character = self.characters[i]
+            other = self.names[j]
+            rel = character.relationships.get(other)
+            if rel is None:
+                rel = character.relationships[other] = Relationship(character_name=other)
+            rel.trust = float(self.trust[i, j])
+            rel.friendship = float(self.friendship[i, j])
+            rel.interactions += int(self.new_interactions[i, j])
+            rel.positive += int(self.new_positive[i, j])
+            rel.negative += int(self.new_negative[i, j])
+        for counts in (self.new_interactions, self.new_positive, self.new_negative):
+            counts.fill(0)
+
+    def index(self, who) -> int:
+        return self.rows[who] if isinstance(who, str) else who
+
+    def process_interactions(self, interactions: Sequence[Tuple]) -> None:
+        """Apply a batch of ``(character1, character2, interaction_type[, intensity])`` at once.
+
+        Effects match ``RelationshipManager.process_interaction`` and are applied in both
+        directions; repeated pairs in one batch are summed before clamping. Unknown
+        interaction types are ignored, as there.
+        """
+        interactions = [item for item in interactions if item[2] in self.TYPE_INDEX]
+        if not interactions:
+            return
+        first = np.array([self.index(item[0]) for item in interactions], dtype=np.intp)
+        second = np.array([self.index(item[1]) for item in interactions], dtype=np.intp)
+        kinds = np.array([self.TYPE_INDEX[item[2]] for item in interactions])
+        intensity = np.array([item[3] if len(item) > 3 else 0.1 for item in interactions])
+        self.apply(first, second, kinds, intensity)
+
+    def apply(self, first: np.ndarray, second: np.ndarray, kinds: np.ndarray,
+              intensity: np.ndarray) -> None:
+        """Vectorized core of ``process_interactions`` on row indices and effect indices"""
+        changes = self.EFFECTS[kinds] * intensity[:, None]
+        rows = np.concatenate([first, second])
+        cols = np.concatenate([second, first])
+        both = np.concatenate([changes, changes])
+        np.add.at(self.trust, (rows, cols), both[:, 0])
+        np.add.at(self.friendship, (rows, cols), both[:, 1])
+        np.add.at(self.new_interactions, (rows, cols), 1)
+        net = both.sum(axis=1)
+        np.add.at(self.new_positive, (rows[net > 0], cols[net > 0]), 1)
+        np.add.at(self.new_negative, (rows[net < 0], cols[net < 0]), 1)
+        self.known[rows, cols] = True
+        # Only the touched cells can have left [0, 1]
+        self.trust[rows, cols] = np.clip(self.trust[rows, cols], 0.0, 1.0)
+        self.friendship[rows, cols] = np.clip(self.friendship[rows, cols], 0.0, 1.0)
+
+    def get_relationship_summary(self, name: str, other_character: str) -> str:
+        """Same text as ``RelationshipManager.get_relationship_summary``, from the matrices"""
+        i = self.rows[name]
+        j = self.rows.get(other_character)
+        if j is None or not self.known[i, j]:
+            return f"{name} has no established relationship with {other_character}."
+        return RelationshipManager.describe(name, other_character,
+                                            self.trust[i, j], self.friendship[i, j])
+
+    def top_k(self, who, k: int = 5, metric: str = "trust",
+              incoming: bool = True) -> List[Tuple[str, float]]:
+        """Strongest relationships involving ``who``.
+
+        With ``incoming`` (default) this answers "who trusts X most"; otherwise "whom does
+        X trust most". ``metric`` is "trust" or "friendship".
+        """
+        x = self.index(who)
+        values = getattr(self, metric)
+        scores = values[:, x] if incoming else values[x]
+        mask = self.known[:, x] if incoming else self.known[x]
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.names[i], float(scores[i])) for i in best]
+
+    def pairs_above(self, threshold: float, metric: str = "trust") -> List[Tuple[str, str]]:
+        """Every established (a, b) where a's ``metric`` toward b is at least ``threshold``"""
+        rows, cols = np.nonzero(self.known & (getattr(self, metric) >= threshold))
+        return [(self.names[i], self.names[j]) for i, j in zip(rows, cols)]
+
+    def ally_clusters(self, threshold: float = 0.7) -> List[List[str]]:
+        """Groups connected by mutual trust and friendship of at least ``threshold``"""
+        allied = self.known & (self.trust >= threshold) & (self.friendship >= threshold)
+        allied &= allied.T
+        parent = list(range(len(self.names)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in zip(*np.nonzero(np.triu(allied, k=1))):
+            parent[find(i)] = find(j)
+        clusters: Dict[int, List[str]] = {}
+        for i in np.flatnonzero(allied.any(axis=1)):
+            clusters.setdefault(find(i), []).append(self.names[i])
+        return list(clusters.values())
@@ -1,27 +1,140 @@
 from charTraits.character import Character, Memory  # Import Memory from character.py
-from swarm import Swarm, Agent
 from charTraits.CharFunctions import add_to_memory
-from openai import OpenAI
+from charTraits.memory_consolidator import MemoryConsolidator
+from charTraits.memory_retriever import MemoryRetriever
+from charTraits.parser import CastStreamParser, MIN_CHARACTERS
+from charTraits.parser import stats as parser_stats
+from storyEngine.context_window import ContextWindow
+from storyEngine.pipeline import PanelPipeline
+from storyEngine.llm_cache import CachedSwarm, ResponseCache
+from storyEngine.streaming import Console, mark_complete, stream_completion
+from storyEngine.tracing import Tracer, TracingSwarm
+from storyEngine.session import SessionState, StorySession
+from storyEngine.prompt_builder import PromptBuilder
+from storyEngine.scheduler import FairScheduler, ScheduledSwarm
+from storyEngine.speculation import Speculator
+from storyEngine.speakers import SPEAKER_POLICIES
+from storyEngine.scenes import PARTITIONS, SceneDirector
+from storyEngine.governor import (CircuitOpenError, Governor, GovernedSwarm, MalformedOutputError,
+                                  RETRYABLE, classify_error)
+from storyEngine.router import RouteConfig, RoutedSwarm, Router
+import os
 import time
-import json
+import argparse
+import threading
 from typing import List, Optional
 from colorama import init, Fore, Style
-import re
 
 # Initialize colorama
 init()
 
-# Initialize client with LM Studio local endpoint
-client = OpenAI(
-    base_url="http://localhost:1234/v1",
-    api_key="not-needed"  # LM Studio doesn't require an API key
+# LM Studio local endpoint (LLM_BASE_URL points the client elsewhere)
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL", "http://localhost:1234/v1")
+LLM_TIMEOUT = 60.0
+DEFAULT_MODEL = "llama-3.2-1b-instruct"
+
+# Optional JSON file routing each task (cast, dialogue, panels, summary, memory) to a model
+# and spreading calls over several servers; without it everything goes to LLM_BASE_URL
+LLM_ROUTES_PATH = os.environ.get("LLM_ROUTES", "llm_routes.json")
+routes = RouteConfig.load(LLM_ROUTES_PATH, default_url=LLM_BASE_URL, default_model=DEFAULT_MODEL)
+
+# Request and token rates the local backend sustains (a small model on LM Studio);
+# set LLM_MAX_RPS / LLM_MAX_TPS to match other hardware, or 0 to disable a limit
+LLM_MAX_RPS = float(os.environ.get("LLM_MAX_RPS", 10))
+LLM_MAX_TPS = float(os.environ.get("LLM_MAX_TPS", 8000))
+
+# Cache identical requests (same model, instructions and messages) in memory and on disk
+LLM_CACHE_PATH = ".cache/llm_responses.sqlite"
+response_cache = ResponseCache(path=LLM_CACHE_PATH)
+
+# Per-call traces and metrics for every LLM interaction (see --trace / --metrics)
+tracer = Tracer()
+
+# Retries with backoff, rate limits and a circuit breaker for every call that reaches the backend
+governor = Governor(
+    requests_per_sec=LLM_MAX_RPS,
+    tokens_per_sec=LLM_MAX_TPS,
+    on_retry=lambda kind, attempt, delay: tracer.event("retry", outcome=kind, attempt=attempt,
+                                                       delay=round(delay, 3))
 )
 
-# Initialize Swarm with the custom client
-swarm_client = Swarm(client=client)
+# The OpenAI client and Swarm are built on first use (get_swarm_client), so importing this
+# module and showing the topic prompt don't wait for the openai package to load
+swarm_client = None
+_swarm_client_lock = threading.Lock()
+
+def build_backend_swarm(base_url):
+    """OpenAI client and Swarm for one inference server"""
+    from openai import OpenAI
+    from swarm import Swarm
+    client = OpenAI(
+        base_url=base_url,
+        api_key="not-needed",  # LM Studio doesn't require an API key
+        timeout=LLM_TIMEOUT,
+        max_retries=0  # the governor owns retries
+    )
+    return Swarm(client=client)
+
+# Picks the server for each call; backend clients are built when first used
+router = Router(routes, make_swarm=build_backend_swarm)
+
+def build_swarm_client(scheduler=None):
+    """Routed backends behind the governor, the response cache and the tracer"""
+    swarm = RoutedSwarm(router)
+    if scheduler:
+        swarm = ScheduledSwarm(swarm, scheduler)
+    return TracingSwarm(CachedSwarm(GovernedSwarm(swarm, governor), response_cache), tracer)
+
+def get_swarm_client():
+    """The shared Swarm client, built on first call unless one was installed already"""
+    global swarm_client
+    if swarm_client is None:
+        with _swarm_client_lock:
+            if swarm_client is None:
+                swarm_client = build_swarm_client()
+    return swarm_client
+
+def preload_llm_modules():
+    """Import the openai/Swarm stack in the background, e.g. while the user types a topic"""
+    threading.Thread(target=__import__, args=("swarm",), name="preload", daemon=True).start()
+
+# Conversation context limits: recent turns kept verbatim, older ones folded into a summary
+CONTEXT_MAX_TURNS = 12
+CONTEXT_TOKEN_BUDGET = 1500
+# When the window overflows, cut it back to this many turns at once so the prompt prefix
+# (and the backend's KV cache) stays valid between cuts
+CONTEXT_EVICT_TO = 6
+
+# The world builder is asked for 3-4 characters; stop reading its output after this many
+MAX_CAST_SIZE = 4
+
+# Memories retrieved into a character's prompt each turn
+MEMORY_TOP_K = 3
+
+# Memories a character keeps; past that, the weakest are merged in batches of this size
+MEMORY_BUDGET = 200
+MEMORY_CONSOLIDATE_BATCH = 20
+
+# Saved stories live in SESSIONS_DIR/<name>; the cast and history are snapshotted this often
+SESSIONS_DIR = "sessions"
+SNAPSHOT_EVERY_TURNS = 25
+
+# Panel renders allowed to run ahead of the dialogue before the loop waits on them
+MAX_PANELS_IN_FLIGHT = 2
+
+# Consecutive failed turns the story loop rides out (with backoff) before it stops
+MAX_TURN_FAILURES = 8
+
+# In scene mode, turns each scene plays between sync points (where groups merge and split)
+SCENE_SYNC_EVERY = 4
+
+# Server mode: LLM calls the local backend serves at once, shared by every session
+SERVER_MAX_CONCURRENCY = 2
+SERVER_MAX_SESSIONS = 64
 
 def create_world_agent():
     """Creates the World agent that transforms conversations into manga panels"""
+    from swarm import Agent
     return Agent(
         name="World",
         instructions="""You are a manga artist who transforms character conversations into visual manga panels.
@@ -34,64 +147,59 @@ def create_world_agent():
         - Use 2-3 panels per scene
         - Focus on the character interactions
         - Keep it simple and visual""",
-        model="llama-3.2-1b-instruct"
+        model=routes.model("panels")
     )
 
-def parse_characters_from_response(response_text):
-    """Parse the LLM's character descriptions into Character objects"""
-    try:
-        # Find the first { and last } to extract just the JSON portion
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}') + 1
-        if start_idx == -1 or end_idx == 0:
-            raise ValueError("No JSON object found in response")
-            
-        json_str = response_text[start_idx:end_idx]
-        
-        # Remove comments and trailing commas
-        json_str = re.sub(r'//.*?\n', '\n', json_str)  # Remove single-line comments
-        json_str = re.sub(r'/\*.*?\*/', '', json_str, flags=re.DOTALL)  # Remove multi-line comments
-        json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)  # Remove trailing commas
-        
-        data = json.loads(json_str)
+def create_summary_agent():
+    """Creates the agent that folds older conversation turns into a running summary"""
+    from swarm import Agent
+    return Agent(
+        name="Narrator",
+        instructions="""You keep a running summary of a manga story.
         
-        characters = []
-        for char_data in data.get('characters', []):
-            # Handle memory field - ensure it's a list of strings
-            memories = char_data.get('memory', [])
-            memory_objects = []
-            
-            # If memory is a single string, convert to list
-            if isinstance(memories, str):
-                memory_objects.append(Memory(content=memories))
-            # If memory is a list, process each item
-            elif isinstance(memories, list):
-                for mem in memories:
-                    if isinstance(mem, str):
-                        memory_objects.append(Memory(content=mem))
-            
-            # Create character object
-            character = Character(
-                name=char_data.get('name', 'Unknown'),
-                affiliation=char_data.get('affiliation', 'Unknown Group'),
-                skills=char_data.get('skills', []),
-                memory=memory_objects,
-                personality_traits=char_data.get('personality_traits', []),
-                archetype=char_data.get('archetype', 'Support Character'),
-                role=char_data.get('role', 'Secondary Character')
-            )
-            characters.append(character)
-            
-        return characters
+        - Merge the new events into the existing summary
+        - Keep every character's goals, conflicts and important reveals
+        - Stay under 150 words
+        - Reply with the summary only""",
+        model=routes.model("summary")
+    )
+
+def summarize_history(summary, turns):
+    """Fold older conversation turns into the running story summary"""
+    transcript = "\n".join(msg["content"] for msg in turns)
+    with Tracer.attributes(stage="summary"):
+        response = get_swarm_client().run(
+            agent=create_summary_agent(),
+            messages=[{
+                "role": "user",
+                "content": f"Story so far:\n{summary or '(nothing yet)'}\n\nNew events:\n{transcript}"
+            }]
+        )
+    return response.messages[-1]["content"].strip()
+
+def create_memory_agent():
+    """Creates the agent that merges a character's minor memories into one"""
+    from swarm import Agent
+    return Agent(
+        name="Memory Keeper",
+        instructions="""You condense a manga character's minor memories into one memory.
         
-    except json.JSONDecodeError as e:
-        print(f"Failed to parse JSON: {e}")
-        print(f"Response text was: {response_text}")
-        return []
-    except Exception as e:
-        print(f"Error parsing characters: {e}")
-        print(f"Response text was: {response_text}")
-        return []
+        - Write it in the character's own voice, as a single memory
+        - Keep names, places and anything that still matters to the story
+        - Stay under 60 words
+        - Reply with the memory only""",
+        model=routes.model("memory")
+    )
+
+def consolidate_memories(name, contents):
+    """Merge several of ``name``'s memories into one consolidated memory"""
+    listed = "\n".join(f"- {content}" for content in contents)
+    with Tracer.attributes(stage="memory"):
+        response = get_swarm_client().run(
+            agent=create_memory_agent(),
+            messages=[{"role": "user", "content": f"Memories of {name}:\n{listed}"}]
+        )
+    return response.messages[-1]["content"].strip()
 
 def add_character(name: str, affiliation: str, skills: List[str], 
                  memory: List[str], personality_traits: List[str],
@@ -110,9 +218,21 @@ def add_character(name: str, affiliation: str, skills: List[str],
     )
     return new_character
 
-def create_story_world(topic, max_retries=3):
-    """Function to generate initial manga story details based on topic"""
+def create_story_world(topic, max_retries=3, stats=None):
+    """Function to generate initial manga story details based on topic
+    
+    Malformed casts are retried at once with a fresh response; backend failures (already
+    retried by the governor) are retried after a jittered backoff. When attempts run out,
+    a default cast is returned. If given, ``stats`` is updated with the number of attempts
+    made and whether the fallback cast was returned.
+    """
+    from swarm import Agent
+    if stats is None:
+        stats = {}
+    stats.setdefault("attempts", 0)
+    stats.setdefault("fallback", 0)
     for attempt in range(max_retries):
+        stats["attempts"] = attempt + 1
         try:
             world_agent = Agent(
                 name="World",
@@ -151,121 +271,538 @@ def create_story_world(topic, max_retries=3):
                 - Memory must be an array of complete strings
                 - All JSON arrays and objects must be properly closed
                 - Make characters that will create interesting dynamics and conflicts""",
-                model="llama-3.2-1b-instruct"
-            )
-            
-            # Get world agent's character creation response
-            response = swarm_client.run(
-                agent=world_agent,
-                messages=[{
-                    "role": "user", 
-                    "content": f"Create an ensemble cast of characters (minimum 3) for a manga about: {topic}"
-                }]
+                model=routes.model("cast")
             )
             
-            # Parse the response and create Character objects
-            characters = parse_characters_from_response(response.messages[-1]["content"])
-            
-            if len(characters) >= 2:  # Ensure we have at least 2 characters
-                return characters
+            # Stream the world agent's character creation response into the cast parser,
+            # which validates characters as they arrive and repairs broken JSON in place
+            with Tracer.attributes(stage="world_builder", attempt=attempt + 1):
+                chunks = get_swarm_client().run(
+                    agent=world_agent,
+                    messages=[{
+                        "role": "user", 
+                        "content": f"Create an ensemble cast of characters (minimum 3) for a manga about: {topic}"
+                    }],
+                    stream=True,
+                    refresh=attempt > 0  # a cached bad response would fail the same way again
+                )
+            parser = CastStreamParser(max_characters=MAX_CAST_SIZE)
+            for chunk in chunks:
+                parser.feed(chunk.get("content") or "")
+                if parser.done:
+                    mark_complete(chunks)  # a full cast: the cache may keep what was read
+                    chunks.close()  # enough characters; stop generating
+                    break
+            parser.finish()
+            characters = parser.characters
+            if len(characters) < MIN_CHARACTERS:
+                outcome = "insufficient"
+            else:
+                outcome = "repaired" if parser.repairs else "ok"
+            tracer.event("parse", stage="world_builder", attempt=attempt + 1, outcome=outcome,
+                         characters=len(characters), repairs=parser.repairs)
             
-            print(f"Attempt {attempt + 1} failed to create enough characters. Retrying...")
-            time.sleep(1)
+            if len(characters) < MIN_CHARACTERS:
+                print(f"Response text was: {parser.text}")
+                raise MalformedOutputError(
+                    f"{len(characters)} usable characters, need {MIN_CHARACTERS}")
+            return characters
             
+        except CircuitOpenError as e:
+            print(f"Attempt {attempt + 1} failed: {e}")
+            if attempt < max_retries - 1:
+                time.sleep(e.retry_after)  # the breaker refuses every call until then
         except Exception as e:
-            print(f"Attempt {attempt + 1} failed with error: {e}")
-            if attempt == max_retries - 1:
-                # Create default characters as fallback
-                return [
-                    Character(
-                        name="Protagonist",
-                        affiliation="Hero Academy",
-                        skills=["Determination", "Hidden Power"],
-                        memory=[Memory(content="A mysterious past")],
-                        personality_traits=["Brave", "Kind"],
-                        archetype="Shonen Protagonist",
-                        role="Main Character"
-                    ),
-                    Character(
-                        name="Rival",
-                        affiliation="Hero Academy",
-                        skills=["Natural Talent", "Competitive Spirit"],
-                        memory=[Memory(content="Seeking redemption")],
-                        personality_traits=["Proud", "Determined"],
-                        archetype="Rival",
-                        role="Deuteragonist"
-                    )
-                ]
-            time.sleep(1)
-
-def create_character_agent(character):
+            kind = classify_error(e)
+            print(f"Attempt {attempt + 1} failed with {kind} error: {e}")
+            if kind not in RETRYABLE:
+                break
+            if kind == "malformed":
+                governor.failed("malformed")  # retried at once: backing off won't fix the output
+            elif attempt < max_retries - 1:
+                time.sleep(governor.backoff.delay(attempt))
+    
+    # Create default characters as fallback
+    stats["fallback"] = 1
+    return [
+        Character(
+            name="Protagonist",
+            affiliation="Hero Academy",
+            skills=["Determination", "Hidden Power"],
+            memory=[Memory(content="A mysterious past")],
+            personality_traits=["Brave", "Kind"],
+            archetype="Shonen Protagonist",
+            role="Main Character"
+        ),
+        Character(
+            name="Rival",
+            affiliation="Hero Academy",
+            skills=["Natural Talent", "Competitive Spirit"],
+            memory=[Memory(content="Seeking redemption")],
+            personality_traits=["Proud", "Determined"],
+            archetype="Rival",
+            role="Deuteragonist"
+        )
+    ]
+
+def panel_request(recent_chat):
+    return [{
+        "role": "user",
+        "content": f"Transform this conversation into manga panels:\n{recent_chat}"
+    }]
+
+def render_panels(world_agent, recent_chat):
+    """Transform a slice of conversation into manga panels"""
+    with Tracer.attributes(stage="panels"):
+        manga_panels = get_swarm_client().run(agent=world_agent, messages=panel_request(recent_chat))
+    return manga_panels.messages[-1]['content']
+
+def print_panels(panels):
+    print(f"\n=== MANGA PANELS ===\n{panels}\n")
+
+def stream_to_channel(agent, messages, channel, header, stage, **kwargs):
+    """Stream a completion token-by-token into a console channel and report its timing"""
+    try:
+        channel.write(header)
+        with Tracer.attributes(stage=stage):
+            result = stream_completion(get_swarm_client(), agent, messages, channel, **kwargs)
+        channel.write(f"\n{Style.DIM}[{result.describe()}]{Style.RESET_ALL}\n")
+        return result.content
+    finally:
+        channel.close()
+
+def create_character_agent(character, prompt_builder=None):
+    """Agent for one character; with a prompt builder, all agents share its cast-wide system prompt"""
+    from swarm import Agent
+    prompt_builder = prompt_builder or PromptBuilder([character])
     return Agent(
         name=character.get_name(),
-        instructions=f"""You are {character.get_name()}.
+        instructions=prompt_builder.system_prompt,
+        model=routes.model("dialogue")
+    )
+
+class StoryTurns:
+    """Turn-by-turn state of one story: cast, shared prompt, context window and speaker order
+    
+    With a ``session``, every turn is logged and the story is snapshotted periodically.
+    With ``speculate``, the next speaker's turn is generated while the current one is shown.
+    ``speakers`` names the policy that picks each next speaker (see SPEAKER_POLICIES).
+    """
+    
+    def __init__(self, characters, state=None, session=None, speculate=False,
+                 speakers="round-robin"):
+        self.characters = characters
+        self.state = state or SessionState("", characters)
+        self.session = session
+        self.prompt_builder = PromptBuilder(characters)
+        self.agents = [create_character_agent(char, self.prompt_builder) for char in characters]
+        self.history = ContextWindow(
+            summarize=summarize_history,
+            max_turns=CONTEXT_MAX_TURNS,
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            evict_to=CONTEXT_EVICT_TO
+        )
+        self.history.restore(self.state.summary, self.state.turns)
+        self.speaker_idx = self.state.speaker_idx % len(self.agents)
+        self.speakers = SPEAKER_POLICIES[speakers](characters)
+        self.panel_counter = 0
+        self.speculator = Speculator(generate_turn) if speculate else None
+        self.consolidator = MemoryConsolidator(consolidate_memories, budget=MEMORY_BUDGET,
+                                               batch=MEMORY_CONSOLIDATE_BATCH,
+                                               on_merge=self.record_merge if session else None)
+    
+    def recent_chat(self):
+        return "\n".join(msg["content"] for msg in self.history[-3:])
+    
+    def next_request(self, measure=True):
+        """Agent and messages for the next speaker's turn"""
+        speaker = self.characters[self.speaker_idx]
+        # Pull the memories most relevant to the last few turns into the prompt's tail
+        memories = MemoryRetriever.top_memories(speaker, self.recent_chat(), k=MEMORY_TOP_K)
+        messages = self.prompt_builder.request(self.history.messages(), speaker, memories, measure)
+        return self.agents[self.speaker_idx], messages
+    
+    def speculate(self):
+        """Start generating the next speaker's turn from the history as it stands"""
+        speaker, messages = self.next_request(measure=False)
+        # Speculative calls yield the backend to real turns waiting at the same priority
+        with self.trace_attributes(), Tracer.attributes(speculative=True), FairScheduler.deferred():
+            self.speculator.start(speaker, messages)
+    
+    def record_merge(self, character, keys, merged):
+        """Log a memory consolidation so resuming between snapshots replays it"""
+        self.session.record("consolidate", character=character.name,
+                            merged=[list(key) for key in keys], content=merged.content,
+                            timestamp=merged.timestamp, importance=merged.importance,
+                            tags=merged.tags, related=merged.related_characters)
+    
+    def trace_attributes(self):
+        return Tracer.attributes(turn=self.state.turn,
+                                 prefix_ratio=round(self.prompt_builder.last_ratio, 3))
+    
+    def commit(self, content):
+        """Record the current speaker's reply and move on to the next speaker
         
-        Your traits:
-        - Skills: {', '.join(character.skills)}
-        - Personality: {', '.join(character.get_personality_traits())}
+        Returns the recent conversation when it is due to be turned into panels, else None.
+        """
+        speaker = self.agents[self.speaker_idx]
+        self.history.append(self.prompt_builder.turn_message(speaker.name, content))
+        # Keep the speaker's memory within budget (summaries are written in the background)
+        self.consolidator.maybe_consolidate(self.characters[self.speaker_idx])
+        self.speaker_idx = self.speakers.advance(self.speaker_idx, content)
+        if self.session:
+            self.session.record("turn", turn=self.state.turn, speaker=speaker.name,
+                                content=self.history[-1]["content"], next_speaker=self.speaker_idx)
+        self.state.turn += 1
+        self.state.speaker_idx = self.speaker_idx
+        if self.session and self.state.turn % SNAPSHOT_EVERY_TURNS == 0:
+            self.session.snapshot(self.state, *self.history.snapshot())
         
-        Just talk naturally with other characters. Be yourself and react to what others say.
-        Keep your responses short and conversational.""",
-        model="llama-3.2-1b-instruct"
-    )
+        # Every 2-3 character interactions, transform into manga panels
+        self.panel_counter += 1
+        if self.panel_counter >= 2:
+            self.panel_counter = 0
+            return self.recent_chat()
+        return None
+    
+    def stats(self):
+        stats = {"prefix_ratio": round(self.prompt_builder.prefix_ratio, 3),
+                 "memory": self.consolidator.stats(),
+                 "speakers": self.speakers.stats()}
+        if self.speculator:
+            stats["speculation"] = self.speculator.stats()
+        return stats
+    
+    def close(self):
+        if self.speculator:
+            self.speculator.close()
+        self.consolidator.close()
+        if self.session:
+            self.session.snapshot(self.state, *self.history.snapshot())
+        self.history.close()
 
-def main():
-    print("=== Manga Story Generator ===")
-    topic = input("What's your manga about? ").strip()
+def generate_turn(speaker, messages):
+    with Tracer.attributes(stage="dialogue"):
+        response = get_swarm_client().run(agent=speaker, messages=messages)
+    return response.messages[-1]['content']
+
+def play_turn(story, speculate=True):
+    """Generate and record the next speaker's turn
+    
+    Uses the story's speculative reply when it was made for this exact request, and (if
+    ``speculate``) starts on the following turn before returning. Returns the speaker's
+    name, what they said, and the conversation due for panels (or None).
+    """
+    speaker, messages = story.next_request()
+    content = None
+    with story.trace_attributes():
+        if story.speculator and story.speculator.pending:
+            content = story.speculator.take(speaker, messages)
+            tracer.event("speculation", stage="dialogue",
+                         outcome="miss" if content is None else "hit")
+        if content is None:
+            content = generate_turn(speaker, messages)
+    panel_chat = story.commit(content)
+    if story.speculator and speculate:
+        story.speculate()
+    return speaker.name, content, panel_chat
+
+def turn_retry_delay(error, failures):
+    """Seconds to wait before retrying a failed turn, or None if the story should stop"""
+    kind = classify_error(error)
+    if failures > MAX_TURN_FAILURES or (kind not in RETRYABLE and kind != "circuit_open"):
+        return None
+    return getattr(error, "retry_after", None) or governor.backoff.delay(failures)
+
+def run_story(characters, stream=False, max_turns=None, session=None, state=None,
+              speculate=False, speakers="round-robin"):
+    """Run the character conversation loop, rendering panels along the way
     
-    # Create characters (keep existing character creation code)
-    characters = create_story_world(topic)
-    character_agents = [create_character_agent(char) for char in characters]
+    Runs until interrupted, or for ``max_turns`` character turns if given. With a
+    ``session``, every turn is logged and the story is snapshotted periodically; ``state``
+    continues a restored story. ``speculate`` pre-generates each next turn while the
+    current one is printed and its panels are queued (non-streamed dialogue only).
+    ``speakers`` is the speaker policy, "round-robin" or "priority".
+    Returns the story's prefix-reuse, memory, speaker and speculation statistics.
+    """
+    story = StoryTurns(characters, state, session, speculate=speculate and not stream,
+                       speakers=speakers)
     world_agent = create_world_agent()
+    # Streams share the terminal through a console that prints them in the order they started
+    console = Console() if stream else None
     
-    conversation_history = []
-    current_speaker_idx = 0
-    panel_counter = 0
+    # Panels render on worker threads while the next character is speaking
+    if stream:
+        panels = PanelPipeline(
+            render=lambda recent_chat, channel: stream_to_channel(
+                world_agent, panel_request(recent_chat), channel, "\n=== MANGA PANELS ===\n", "panels"),
+            emit=lambda panels: None,  # already streamed to the console
+            on_error=lambda e: print(f"Panel error: {e}"),
+            max_in_flight=MAX_PANELS_IN_FLIGHT
+        )
+    else:
+        panels = PanelPipeline(
+            render=lambda recent_chat: render_panels(world_agent, recent_chat),
+            emit=print_panels,
+            on_error=lambda e: print(f"Panel error: {e}"),
+            max_in_flight=MAX_PANELS_IN_FLIGHT
+        )
     
-    while True:
+    turns_run = 0
+    failures = 0
+    retry_delay = 0.0
+    while max_turns is None or turns_run < max_turns:
         try:
+            if retry_delay:
+                time.sleep(retry_delay)
+                retry_delay = 0.0
             # Let characters talk
-            current_speaker = character_agents[current_speaker_idx]
-            response = swarm_client.run(
-                agent=current_speaker,
-                messages=[
-                    *conversation_history,
-                    {"role": "user", "content": "Continue the conversation..."}
-                ]
-            )
-            
-            print(f"\n{current_speaker.name}: {response.messages[-1]['content']}")
-            conversation_history.append({
-                "role": "assistant", 
-                "content": f"{current_speaker.name}: {response.messages[-1]['content']}"
-            })
-            
-            panel_counter += 1
-            
-            # Every 2-3 character interactions, transform into manga panels
-            if panel_counter >= 2:
-                panel_counter = 0
-                recent_chat = "\n".join([msg["content"] for msg in conversation_history[-3:]])
-                
-                manga_panels = swarm_client.run(
-                    agent=world_agent,
-                    messages=[{
-                        "role": "user",
-                        "content": f"Transform this conversation into manga panels:\n{recent_chat}"
-                    }]
-                )
-                
-                print(f"\n=== MANGA PANELS ===\n{manga_panels.messages[-1]['content']}\n")
+            if stream:
+                speaker, messages = story.next_request()
+                with story.trace_attributes():
+                    content = stream_to_channel(speaker, messages, console.open(),
+                                                f"\n{speaker.name}: ", "dialogue")
+                panels.drain_ready()
+                panel_chat = story.commit(content)
+            else:
+                name, content, panel_chat = play_turn(story, speculate=turns_run + 1 != max_turns)
+                # Print panels that finished while this turn was generating, in order
+                panels.drain_ready()
+                print(f"\n{name}: {content}")
             
-            current_speaker_idx = (current_speaker_idx + 1) % len(character_agents)
-            time.sleep(1)
+            if panel_chat:
+                if stream:
+                    panels.submit(panel_chat, console.open())
+                else:
+                    panels.submit(panel_chat)
+            turns_run += 1
+            failures = 0
                 
-        except Exception as e:
-            print(f"Error: {e}")
+        except KeyboardInterrupt:
             break
+        except Exception as e:
+            # Ride out an overloaded or restarting backend instead of ending the story
+            failures += 1
+            retry_delay = turn_retry_delay(e, failures)
+            if retry_delay is None:
+                print(f"Error: {e}")
+                break
+            print(f"Turn failed ({classify_error(e)} error), retrying in {retry_delay:.1f}s: {e}")
+    
+    panels.finish()
+    story.close()
+    prompt_builder = story.prompt_builder
+    if prompt_builder.requests:
+        print(f"Prompt prefix reuse: {prompt_builder.prefix_ratio:.0%} over {prompt_builder.requests} turns")
+    if story.speculator:
+        print(f"Speculation: {story.speculator.describe()}")
+    return story.stats()
+
+def run_scenes(characters, topic="", by="affiliation", sync_every=SCENE_SYNC_EVERY,
+               max_turns=None, speculate=False, speakers="round-robin"):
+    """Run the cast as concurrent sub-scenes, one per group of characters
+    
+    ``by`` picks how the cast is split (see PARTITIONS). Each scene has its own history and
+    panels and plays ``sync_every`` turns between sync points, where groups are formed again
+    and scenes merge or split. Scenes call the backend at the same time, so throughput grows
+    with the backends' capacity. Runs until interrupted, or for about ``max_turns`` turns.
+    Returns the director's statistics.
+    """
+    world_agent = create_world_agent()
+    
+    def new_panels(scene):
+        return PanelPipeline(
+            render=lambda recent_chat: render_panels(world_agent, recent_chat),
+            emit=lambda panels: print(f"\n=== MANGA PANELS: {scene} ===\n{panels}\n"),
+            on_error=lambda e: print(f"Panel error ({scene}): {e}"),
+            max_in_flight=MAX_PANELS_IN_FLIGHT
+        )
+    
+    director = SceneDirector(
+        characters,
+        partition=PARTITIONS[by],
+        new_story=lambda group, summary, turns: StoryTurns(
+            group, SessionState(topic, group, summary, turns), speculate=speculate,
+            speakers=speakers),
+        new_panels=new_panels,
+        play_turn=play_turn,
+        on_turn=lambda scene, name, content: print(f"\n[{scene}] {name}: {content}"),
+        on_error=lambda scene, e: print(f"{scene} stopped: {e}"),
+        retry_delay=turn_retry_delay,
+        sync_every=sync_every,
+        carry_turns=CONTEXT_EVICT_TO
+    )
+    director.run(max_turns)
+    stats = director.stats()
+    print(f"Scenes: {stats['turns']} turns in {stats['rounds']} rounds, "
+          f"{stats['regroups']} regroupings")
+    return stats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manga Story Generator")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always query the model instead of replaying cached responses")
+    parser.add_argument("--stream", action="store_true",
+                        help="print dialogue and panels token-by-token with per-turn timing")
+    parser.add_argument("--batch", metavar="TOPICS",
+                        help="generate a cast for every topic in a file ('-' for stdin) and exit")
+    parser.add_argument("--output", default="casts.jsonl",
+                        help="JSONL file that batch mode appends casts to")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="concurrent world generations in batch mode")
+    parser.add_argument("--session", metavar="NAME",
+                        help="save the story under sessions/NAME, resuming it if it already exists")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="append a JSON-lines trace of every LLM call to FILE")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write LLM call metrics in Prometheus text format to FILE on exit")
+    parser.add_argument("--speculate", action="store_true",
+                        help="generate the next speaker's turn while the current one is shown "
+                             "(non-streamed dialogue)")
+    parser.add_argument("--speakers", choices=list(SPEAKER_POLICIES), default="round-robin",
+                        help="who speaks next: cast order, or whoever the last turn concerns most "
+                             "(mentions, emotion, tension, time since speaking; for large casts)")
+    parser.add_argument("--scenes", choices=list(PARTITIONS),
+                        help="split the cast into groups and run them as concurrent scenes: "
+                             "fixed groups by affiliation, or ally clusters that regroup as "
+                             "characters address each other (not with --stream or --session)")
+    parser.add_argument("--sync-every", type=int, default=SCENE_SYNC_EVERY, metavar="TURNS",
+                        help="turns each scene plays before the groups are formed again")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="host many concurrent stories over HTTP instead of one interactive story")
+    parser.add_argument("--max-concurrency", type=int, default=SERVER_MAX_CONCURRENCY,
+                        help="LLM calls in flight to the backend across all sessions in server mode")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile the main thread and report time spent in non-LLM Python code")
+    args = parser.parse_args()
+    if args.scenes and (args.stream or args.session):
+        parser.error("--scenes can't be combined with --stream or --session")
+    return args
+
+def batch_main(args):
+    """Pre-generate casts for many topics; all workers share the pooled OpenAI client"""
+    from storyEngine.batch import read_topics, run_batch
+    preload_llm_modules()  # overlaps the openai import with reading the topic list
+    topics = read_topics(args.batch)
+    print(f"=== Batch world generation: {len(topics)} topics, {args.workers} workers ===")
+    report = run_batch(
+        topics,
+        generate=lambda topic, stats: create_story_world(topic, stats=stats),
+        output_path=args.output,
+        workers=args.workers
+    )
+    print(report.summary())
+    for topic, reason in report.failures.items():
+        print(f"  failed: {topic!r}: {reason}")
+    print(f"LLM cache: {response_cache.stats()}")
+    print(f"LLM governor: {governor.stats()}")
+    print(f"LLM backends: {router.stats()}")
+    print(f"Cast parser: {parser_stats.as_dict()}")
+    response_cache.close()
+
+def serve_main(args):
+    """Serve stories over HTTP; every session shares the pooled client behind one fair scheduler"""
+    import asyncio
+    from storyEngine.server import StoryServer
+    global swarm_client
+    host, _, port = args.serve.rpartition(":")
+    scheduler = FairScheduler(max_concurrency=args.max_concurrency)
+    # Schedule below the cache so replayed responses don't wait for a backend slot
+    swarm_client = build_swarm_client(scheduler)
+    server = StoryServer(
+        create_cast=create_story_world,
+        new_story=lambda topic, characters: StoryTurns(characters, SessionState(topic, characters),
+                                                       speculate=args.speculate,
+                                                       speakers=args.speakers),
+        play_turn=play_turn,
+        render_panels=lambda recent_chat: render_panels(create_world_agent(), recent_chat),
+        scheduler=scheduler,
+        metrics=tracer.metrics.to_prometheus,
+        backend_stats=lambda: {**governor.stats(), "routes": router.stats()},
+        on_panel_error=lambda session_id, e: tracer.event(
+            "panels", outcome="failed", session=session_id, error=f"{type(e).__name__}: {e}"),
+        max_sessions=SERVER_MAX_SESSIONS
+    )
+    ready = lambda bound_host, bound_port: print(
+        f"=== Story server on http://{bound_host}:{bound_port} "
+        f"({args.max_concurrency} concurrent LLM calls) ===")
+    try:
+        asyncio.run(server.serve(host or "127.0.0.1", int(port), ready=ready))
+    except KeyboardInterrupt:
+        pass
+    print(f"LLM cache: {response_cache.stats()}")
+    print(f"LLM governor: {governor.stats()}")
+    print(f"LLM backends: {router.stats()}")
+    response_cache.close()
+
+def report_profile(profiler):
+    """Print where Python time went, excluding the HTTP/socket wait for the model"""
+    import pstats
+    stats = pstats.Stats(profiler).strip_dirs().sort_stats("tottime")
+    print("\n=== PROFILE (non-LLM code, by own time) ===")
+    stats.print_stats(r"charTraits|storyEngine|main\.py|pydantic|json|re\.py", 30)
+
+def main():
+    args = parse_args()
+    response_cache.enabled = not args.no_cache
+    if args.trace:
+        tracer.open(args.trace)
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    try:
+        if args.batch:
+            batch_main(args)
+            return
+        if args.serve:
+            serve_main(args)
+            return
+        
+        print("=== Manga Story Generator ===")
+        session = StorySession(os.path.join(SESSIONS_DIR, args.session)) if args.session else None
+        if session and session.exists():
+            # Resume from the snapshot and event log; no model calls needed
+            state = session.load()
+            print(f"Resuming '{state.topic}' at turn {state.turn}")
+        else:
+            preload_llm_modules()
+            topic = input("What's your manga about? ").strip()
+            
+            # Create characters (keep existing character creation code)
+            characters = create_story_world(topic)
+            state = SessionState(topic, characters)
+        
+        if session:
+            session.start()
+            session.snapshot(state, state.summary, state.turns)
+        try:
+            if args.scenes:
+                run_scenes(state.characters, state.topic, by=args.scenes,
+                           sync_every=args.sync_every, speculate=args.speculate,
+                           speakers=args.speakers)
+            else:
+                run_story(state.characters, stream=args.stream, session=session, state=state,
+                          speculate=args.speculate, speakers=args.speakers)
+        finally:
+            if session:
+                session.close()
+        print(f"LLM cache: {response_cache.stats()}")
+        print(f"LLM governor: {governor.stats()}")
+        print(f"LLM backends: {router.stats()}")
+        print(f"Cast parser: {parser_stats.as_dict()}")
+        response_cache.close()
+    finally:
+        if profiler:
+            profiler.disable()
+            report_profile(profiler)
+        if args.metrics:
+            with open(args.metrics, "w", encoding="utf-8") as f:
+                f.write(tracer.metrics.to_prometheus())
+        router.close()
+        tracer.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from charTraits.character import Character
+
+# generate(topic, stats) -> cast; the generator records "attempts" and "fallback" in stats
+CastGenerator = Callable[[str, Dict[str, int]], Optional[List[Character]]]
+
+
+def read_topics(path: str) -> List[str]:
+    """Read one topic per line from a file, or from stdin when path is '-'"""
+    if path == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+class BatchReport:
+    """Throughput, retry and failure counts for a batch run.
+
+    Fallback casts are still written out, but are counted in ``fallbacks`` rather than
+    ``succeeded``, so they do not inflate casts/min.
+    """
+
+    def __init__(self):
+        self.topics = 0
+        self.succeeded = 0
+        self.attempts = 0
+        self.fallbacks = 0
+        self.failures: Dict[str, str] = {}
+        self.elapsed = 0.0
+
+    @property
+    def casts_per_min(self) -> float:
+        return self.succeeded / self.elapsed * 60 if self.elapsed else 0.0
+
+    @property
+    def retry_rate(self) -> float:
+        """Extra attempts per topic beyond the first"""
+        return (self.attempts - self.topics) / self.topics if self.topics else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.succeeded}/{self.topics} casts in {self.elapsed:.1f}s "
+                f"({self.casts_per_min:.1f} casts/min), retry rate {self.retry_rate:.2f}, "
+                f"{self.fallbacks} fallback casts, {len(self.failures)} failures")
+
+
+def run_batch(topics: List[str], generate: CastGenerator, output_path: str,
+              workers: int = 4) -> BatchReport:
+    """Generate a cast per topic on a bounded worker pool, writing each one as a JSONL line"""
+    report = BatchReport()
+    report.topics = len(topics)
+    write_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def generate_one(topic: str):
+        stats = {"attempts": 0, "fallback": 0}
+        try:
+            return topic, stats, generate(topic, stats), None
+        except Exception as e:
+            return topic, stats, None, e
+
+    with open(output_path, "a", encoding="utf-8") as output, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cast") as pool:
+        futures = [pool.submit(generate_one, topic) for topic in topics]
+        for future in as_completed(futures):
+            topic, stats, characters, error = future.result()
+            report.attempts += max(1, stats["attempts"])
+            if error is not None or not characters:
+                report.failures[topic] = str(error) if error else "no characters generated"
+                print(f"[batch] FAILED {topic!r} after {stats['attempts']} attempts: "
+                      f"{report.failures[topic]}")
+                continue
+            line = json.dumps({
+                "topic": topic,
+                "attempts": stats["attempts"],
+                "fallback": bool(stats["fallback"]),
+                "characters": [character.model_dump() for character in characters]
+            }, ensure_ascii=False)
+            with write_lock:
+                output.write(line + "\n")
+                output.flush()
+            if stats["fallback"]:
+                report.fallbacks += 1
+            else:
+                report.succeeded += 1
+            print(f"[batch] {topic!r}: {len(characters)} characters in {stats['attempts']} attempts")
+
+    report.elapsed = time.perf_counter() - start
+    return report
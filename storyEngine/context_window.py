@@ -0,0 +1,169 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .scheduler import submit_in_context
+
+Message = Dict[str, str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for budgeting (about 4 characters per token)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+class ContextWindow:
+    """Rolling conversation history: the last turns verbatim plus a running summary of older ones.
+
+    Turns that fall out of the window are handed to ``summarize(summary, turns)`` on a
+    background thread, so appending a turn never waits on the model. With ``evict_to``,
+    an overflowing window is cut back to that many turns in one go rather than sliding by
+    one turn per append, which keeps the prompt prefix stable between cuts.
+    """
+
+    def __init__(self, summarize: Optional[Callable[[str, List[Message]], str]] = None,
+                 max_turns: int = 12, token_budget: int = 1500, min_fold: int = 4,
+                 max_pending: int = 64, evict_to: Optional[int] = None):
+        self.summarize = summarize
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.min_fold = min_fold
+        self.max_pending = max_pending
+        self.evict_to = evict_to
+        self.summary = ""
+        self.folded_turns = 0
+        self.dropped_turns = 0
+        self.failed_folds = 0
+        self._turns: Deque[Tuple[Message, int]] = deque()
+        self._turn_tokens = 0
+        self._pending: List[Message] = []
+        self._folding: List[Message] = []
+        self._future: Optional[Future] = None
+        self._lock = threading.RLock()
+        self._executor = (ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+                          if summarize else None)
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self.messages_verbatim())
+
+    def __getitem__(self, index):
+        return self.messages_verbatim()[index]
+
+    def messages_verbatim(self) -> List[Message]:
+        """Recent turns only, without the summary checkpoint"""
+        with self._lock:
+            return [message for message, _ in self._turns]
+
+    def append(self, message: Message) -> None:
+        """Add a turn, evicting the oldest ones once the window is over budget"""
+        tokens = estimate_tokens(message["content"])
+        with self._lock:
+            self._turns.append((message, tokens))
+            self._turn_tokens += tokens
+            self._evict()
+            self._maybe_fold()
+
+    def snapshot(self) -> Tuple[str, List[Message]]:
+        """The summary and every turn it does not cover yet, oldest first"""
+        with self._lock:
+            return self.summary, [*self._folding, *self._pending,
+                                  *(message for message, _ in self._turns)]
+
+    def restore(self, summary: str, turns: List[Message]) -> None:
+        """Reset to a saved ``snapshot()`` without calling the summarizer"""
+        with self._lock:
+            self.summary = summary
+            self._turns.clear()
+            self._turn_tokens = 0
+            self._pending = []
+            for message in turns:
+                tokens = estimate_tokens(message["content"])
+                self._turns.append((message, tokens))
+                self._turn_tokens += tokens
+            self._evict()
+
+    def messages(self) -> List[Message]:
+        """Messages to send as prompt history: summary checkpoint first, then recent turns"""
+        with self._lock:
+            history = [message for message, _ in self._turns]
+            if self.summary:
+                history.insert(0, {"role": "system", "content": f"Story so far: {self.summary}"})
+            return history
+
+    def prompt_tokens(self) -> int:
+        """Estimated token size of ``messages()``"""
+        with self._lock:
+            return self._turn_tokens + self._summary_tokens()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Fold every pending turn into the summary and wait for it to finish"""
+        failures = self.failed_folds
+        while self.failed_folds == failures:
+            with self._lock:
+                if self._future is None and self._pending and self._executor:
+                    self._submit()
+                future = self._future
+            if future is None:
+                return
+            future.exception(timeout=timeout)
+
+    def close(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _evict(self) -> None:
+        budget = self.token_budget - self._summary_tokens()
+        if len(self._turns) <= self.max_turns and self._turn_tokens <= budget:
+            return
+        max_turns = self.max_turns
+        if self.evict_to is not None:
+            budget = budget * self.evict_to // self.max_turns
+            max_turns = self.evict_to
+        while len(self._turns) > 1 and (len(self._turns) > max_turns
+                                        or self._turn_tokens > budget):
+            evicted, evicted_tokens = self._turns.popleft()
+            self._turn_tokens -= evicted_tokens
+            self._pending.append(evicted)
+        if len(self._pending) > self.max_pending:
+            overflow = len(self._pending) - self.max_pending
+            del self._pending[:overflow]
+            self.dropped_turns += overflow
+
+    def _summary_tokens(self) -> int:
+        return estimate_tokens(self.summary) if self.summary else 0
+
+    def _maybe_fold(self) -> None:
+        if self._executor is None:
+            self.dropped_turns += len(self._pending)
+            self._pending.clear()
+            return
+        if self._future is None and len(self._pending) >= self.min_fold:
+            self._submit()
+
+    def _submit(self) -> None:
+        batch, self._pending = self._pending, []
+        self._folding = batch
+        future = submit_in_context(self._executor, self.summarize, self.summary, batch)
+        self._future = future
+        future.add_done_callback(lambda done: self._on_summary(done, batch))
+
+    def _on_summary(self, future: Future, batch: List[Message]) -> None:
+        with self._lock:
+            self._future = None
+            self._folding = []
+            if future.cancelled():
+                return
+            summary = future.result() if future.exception() is None else None
+            if not summary:
+                # Keep the turns so the next fold retries them
+                self.failed_folds += 1
+                self._pending[:0] = batch
+                return
+            self.summary = summary
+            self.folded_turns += len(batch)
+            if len(self._pending) >= self.min_fold:
+                self._submit()
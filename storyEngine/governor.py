@@ -0,0 +1,321 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .context_window import estimate_tokens
+
+Message = Dict[str, str]
+
+# Failures worth another attempt; anything else (bad request, auth, bugs) is raised at once
+RETRYABLE = frozenset({"timeout", "connection", "rate_limited", "server", "malformed"})
+# Failures that mean the backend itself is struggling: they trip the breaker and slow the rate
+OVERLOAD = frozenset({"timeout", "connection", "rate_limited", "server"})
+
+
+class MalformedOutputError(Exception):
+    """The model answered, but not with anything usable"""
+
+
+class CircuitOpenError(Exception):
+    """The backend failed repeatedly; calls are refused until ``retry_after`` seconds pass"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM backend unavailable, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def classify_error(error: BaseException) -> str:
+    """Bucket an exception from the OpenAI client (or below it) by what went wrong"""
+    if isinstance(error, MalformedOutputError):
+        return "malformed"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    names = [cls.__name__ for cls in type(error).__mro__]
+    # openai.APITimeoutError is also an APIConnectionError, so check timeouts first
+    if isinstance(error, TimeoutError) or any("Timeout" in name for name in names):
+        return "timeout"
+    if isinstance(error, ConnectionError) or any("Connection" in name for name in names):
+        return "connection"
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        return "rate_limited"
+    if isinstance(status, int):
+        return "server" if status >= 500 else "client"
+    if isinstance(error, ValueError):  # JSON decoding and validation errors
+        return "malformed"
+    return "other"
+
+
+class Backoff:
+    """Exponential backoff with full jitter: attempt n waits uniform(0, min(cap, base * 2**n))"""
+
+    def __init__(self, base: float = 0.25, cap: float = 8.0, rng: Optional[random.Random] = None):
+        self.base = base
+        self.cap = cap
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        return self.rng.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Thread-safe token bucket; a rate of 0 disables the limit.
+
+    ``acquire`` may overdraw the bucket, so a request larger than the burst size still
+    goes through. The debt then delays whoever comes next. ``charge`` bills work whose
+    size is only known afterwards, such as completion tokens.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until the bucket is out of debt, then take ``amount``; returns seconds waited"""
+        if not self.rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= min(amount, self.burst):
+                    self._tokens -= amount
+                    return waited
+                wait = (min(amount, self.burst) - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def charge(self, amount: float) -> None:
+        if self.rate:
+            with self._lock:
+                self._refill()
+                self._tokens -= amount
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive overload failures and refuses calls for
+    ``reset_timeout`` seconds; then lets one trial call through (half-open)"""
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 10.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.opens = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self._trial or self.retry_after() == 0 else "open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go to the backend now"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            wait = self.retry_after()
+            if wait > 0 or self._trial:
+                raise CircuitOpenError(wait or self.reset_timeout)
+            self._trial = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                if self.opened_at is None or self._trial:
+                    self.opens += 1
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class Governor:
+    """Retries, rate limits and circuit-breaks calls to one LLM backend.
+
+    Retryable failures are retried with jittered exponential backoff. Requests and
+    tokens per second are capped by token buckets sized for the local backend. On overload
+    failures the rates are halved, then they recover gradually as calls succeed
+    (AIMD). Consecutive overload failures open the circuit breaker so callers fail fast
+    instead of piling onto a dead server.
+    """
+
+    RECOVERY_STEP = 0.1
+    MIN_SCALE = 0.125
+
+    def __init__(self, requests_per_sec: float = 0.0, tokens_per_sec: float = 0.0,
+                 max_retries: int = 3, backoff: Optional[Backoff] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 on_retry: Optional[Callable[[str, int, float], None]] = None):
+        self.requests_per_sec = requests_per_sec
+        self.tokens_per_sec = tokens_per_sec
+        self.requests = TokenBucket(requests_per_sec)
+        self.tokens = TokenBucket(tokens_per_sec, burst=tokens_per_sec * 2)
+        self.max_retries = max_retries
+        self.backoff = backoff or Backoff()
+        self.breaker = breaker or CircuitBreaker()
+        self.on_retry = on_retry
+        self.scale = 1.0
+        self.calls = 0
+        self.retries: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self.throttled_seconds = 0.0
+        self.backoff_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def admit(self, prompt_tokens: int = 0) -> None:
+        """Check the breaker and wait for rate budget before sending a request"""
+        self.breaker.allow()
+        waited = self.requests.acquire() + self.tokens.acquire(prompt_tokens)
+        with self._lock:
+            self.calls += 1
+            self.throttled_seconds += waited
+
+    def succeeded(self, completion_tokens: int = 0) -> None:
+        self.tokens.charge(completion_tokens)
+        self.breaker.record_success()
+        with self._lock:
+            if self.scale < 1.0:
+                self._set_scale(min(1.0, self.scale + self.RECOVERY_STEP))
+
+    def failed(self, kind: str) -> None:
+        with self._lock:
+            self.failures[kind] = self.failures.get(kind, 0) + 1
+            if kind in OVERLOAD:
+                self._set_scale(max(self.MIN_SCALE, self.scale / 2))
+        if kind in OVERLOAD:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()  # the backend answered, even if uselessly
+
+    def _set_scale(self, scale: float) -> None:
+        self.scale = scale
+        self.requests.rate = self.requests_per_sec * scale
+        self.tokens.rate = self.tokens_per_sec * scale
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        """Sleep off the backoff for ``attempt`` and return True if a ``kind`` failure is retried"""
+        if kind not in RETRYABLE or attempt >= self.max_retries:
+            return False
+        delay = self.backoff.delay(attempt)
+        with self._lock:
+            self.retries[kind] = self.retries.get(kind, 0) + 1
+            self.backoff_seconds += delay
+        if self.on_retry:
+            self.on_retry(kind, attempt + 1, delay)
+        time.sleep(delay)
+        return True
+
+    def call(self, fn: Callable, *args, prompt_tokens: int = 0,
+             completion_tokens: Callable = lambda result: 0, **kwargs):
+        """Run ``fn`` under the governor, retrying retryable failures"""
+        attempt = 0
+        while True:
+            self.admit(prompt_tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                self.failed(kind)
+                if self.should_retry(kind, attempt):
+                    attempt += 1
+                    continue
+                raise
+            self.succeeded(completion_tokens(result))
+            return result
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": dict(self.retries),
+                "failures": dict(self.failures),
+                "rate_scale": round(self.scale, 3),
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "backoff_seconds": round(self.backoff_seconds, 3),
+                "circuit": self.breaker.state,
+                "circuit_opens": self.breaker.opens,
+            }
+
+
+def prompt_tokens(agent, messages: List[Message]) -> int:
+    instructions = agent.instructions if isinstance(agent.instructions, str) else ""
+    return estimate_tokens(instructions) + sum(estimate_tokens(m.get("content") or "") for m in messages)
+
+
+class GovernedSwarm:
+    """Swarm client wrapper that sends every call through a Governor. Streamed calls are
+    retried only until their first chunk arrives; after that, a failure goes to the caller."""
+
+    def __init__(self, swarm, governor: Governor):
+        self.swarm = swarm
+        self.governor = governor
+
+    def __getattr__(self, name):
+        return getattr(self.swarm, name)
+
+    def run(self, agent, messages, stream: bool = False, **kwargs):
+        if stream:
+            return self._governed_stream(agent, messages, **kwargs)
+        return self.governor.call(
+            self.swarm.run, agent=agent, messages=messages, prompt_tokens=prompt_tokens(agent, messages),
+            completion_tokens=lambda response: estimate_tokens(response.messages[-1].get("content") or "")
+            if response.messages else 0, **kwargs)
+
+    def _governed_stream(self, agent, messages, **kwargs):
+        governor = self.governor
+        attempt = 0
+        while True:
+            governor.admit(prompt_tokens(agent, messages))
+            chunks = self.swarm.run(agent=agent, messages=messages, stream=True, **kwargs)
+            try:
+                first = next(chunks)
+                break
+            except StopIteration:
+                governor.succeeded()
+                return
+            except Exception as e:
+                chunks.close()
+                kind = classify_error(e)
+                governor.failed(kind)
+                if not governor.should_retry(kind, attempt):
+                    raise
+                attempt += 1
+        tokens = 0
+        try:
+            yield first
+            for chunk in chunks:
+                if chunk.get("content"):
+                    tokens += 1
+                yield chunk
+        except GeneratorExit:
+            governor.succeeded(tokens)
+            raise
+        except Exception as e:
+            governor.failed(classify_error(e))
+            raise
+        else:
+            governor.succeeded(tokens)
+        finally:
+            chunks.close()
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .streaming import CompletableStream
+
+
+Message = Dict[str, Any]
+
+# Message fields that affect the completion; everything else (e.g. Swarm's "sender") is dropped
+_KEY_FIELDS = ("role", "content", "name", "tool_calls", "tool_call_id")
+
+
+def normalize_messages(messages: List[Message]) -> List[Message]:
+    """Strip a message list down to the fields the model actually sees"""
+    normalized = []
+    for message in messages:
+        entry = {}
+        for field in _KEY_FIELDS:
+            value = message.get(field)
+            if value is None:
+                continue
+            entry[field] = value.strip() if isinstance(value, str) else value
+        normalized.append(entry)
+    return normalized
+
+
+def normalize_instructions(instructions: str) -> str:
+    """Drop indentation and blank-line noise from triple-quoted agent instructions"""
+    return "\n".join(line.strip() for line in instructions.strip().splitlines())
+
+
+def cache_key(model: str, instructions: str, messages: List[Message]) -> str:
+    """Content address of a request: model, instructions and normalized messages"""
+    payload = json.dumps(
+        [model, normalize_instructions(instructions), normalize_messages(messages)],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier response cache: an in-memory LRU in front of a SQLite table"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 512,
+                 max_disk_entries: int = 20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.enabled = True
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, List[Message]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = None
+        self._closed = False
+
+    def _database(self):
+        """The SQLite tier, opened on first use so constructing a cache costs nothing"""
+        if self._db is None and self.path and not self._closed:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, payload TEXT, created REAL, last_used REAL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> Optional[List[Message]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+            if self._database() is not None:
+                row = self._db.execute(
+                    "SELECT payload FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    self._db.execute(
+                        "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+                    )
+                    self._db.commit()
+                    messages = json.loads(row[0])
+                    self._remember(key, messages)
+                    self.disk_hits += 1
+                    return messages
+            self.misses += 1
+            return None
+
+    def put(self, key: str, model: str, messages: List[Message]) -> None:
+        with self._lock:
+            self._remember(key, messages)
+            if self._database() is None:
+                return
+            now = time.time()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, model, json.dumps(messages, ensure_ascii=False), now, now)
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._prune_disk()
+            self._db.commit()
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._database() is not None:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, messages: List[Message]) -> None:
+        self._entries[key] = messages
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self) -> None:
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+
+class CachedSwarm:
+    """Drop-in wrapper for ``Swarm`` that serves repeated requests from a ResponseCache.
+
+    Agents with tool functions always go to the backend. Streamed calls are cached once the
+    stream runs to completion, or with the content read so far when the reader marks it
+    ``complete()`` before closing it early; a stream closed without that mark is not
+    cached. A hit is replayed as a single-chunk stream. Pass ``refresh=True`` to skip
+    the lookup (e.g. when retrying after a bad response) while still storing the new result.
+    """
+
+    def __init__(self, swarm, cache: ResponseCache):
+        self.swarm = swarm
+        self.cache = cache
+
+    @property
+    def client(self):
+        return self.swarm.client
+
+    def run(self, agent, messages: List[Message], context_variables: Optional[dict] = None,
+            stream: bool = False, refresh: bool = False, **kwargs):
+        context_variables = context_variables or {}
+        if agent.functions or not self.cache.enabled:
+            return self.swarm.run(agent=agent, messages=messages,
+                                  context_variables=context_variables, stream=stream, **kwargs)
+
+        instructions = (agent.instructions(context_variables) if callable(agent.instructions)
+                        else agent.instructions)
+        model = kwargs.get("model_override") or agent.model
+        key = cache_key(model, instructions, messages)
+        cached = None if refresh else self.cache.get(key)
+        if cached is not None:
+            from swarm.types import Response  # deferred: pulls in the openai package
+            response = Response(messages=cached, agent=agent, context_variables=context_variables)
+            return self._replay(response) if stream else response
+
+        if stream:
+            chunks = self.swarm.run(agent=agent, messages=messages,
+                                    context_variables=context_variables, stream=True, **kwargs)
+            stream = CompletableStream(None)
+            stream.chunks = self._record(key, model, chunks, stream)
+            return stream
+        response = self.swarm.run(agent=agent, messages=messages,
+                                  context_variables=context_variables, **kwargs)
+        self.cache.put(key, model, response.messages)
+        return response
+
+    def _record(self, key: str, model: str, chunks, stream: CompletableStream):
+        parts, sender = [], None
+        try:
+            for chunk in chunks:
+                if "response" in chunk:
+                    self.cache.put(key, model, chunk["response"].messages)
+                    parts = None
+                elif chunk.get("content") and parts is not None:
+                    parts.append(chunk["content"])
+                    sender = chunk.get("sender") or sender
+                yield chunk
+        except GeneratorExit:
+            # The reader had enough (e.g. a full cast): keep what it read for the next run
+            if parts and stream.completed:
+                self.cache.put(key, model, [{"role": "assistant", "content": "".join(parts),
+                                             "sender": sender}])
+            raise
+        finally:
+            # Closing early abandons the backend stream too
+            chunks.close()
+
+    @staticmethod
+    def _replay(response):
+        yield {"delim": "start"}
+        for message in response.messages:
+            if message.get("content"):
+                yield {"content": message["content"], "sender": message.get("sender")}
+        yield {"delim": "end"}
+        yield {"response": response}
@@ -0,0 +1,55 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Optional
+
+from .scheduler import submit_in_context
+
+
+class PanelPipeline:
+    """Renders manga panels in the background while the next character turn is generated.
+
+    Panels are emitted strictly in submission order. ``max_in_flight`` bounds the number of
+    pending renders: submitting past it blocks until the oldest panel is done, which keeps
+    the dialogue from racing ahead of a slow panel backend. Renders run in the submitter's
+    context, so they are traced and scheduled under its session.
+    """
+
+    def __init__(self, render: Callable[..., str], emit: Callable[[str], None],
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 max_in_flight: int = 2, workers: int = 2):
+        self.render = render
+        self.emit = emit
+        self.on_error = on_error
+        self.max_in_flight = max_in_flight
+        self._in_flight: Deque[Future] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="panels")
+
+    def submit(self, *args) -> None:
+        """Queue ``render(*args)``, waiting on the oldest render if too many are pending"""
+        while len(self._in_flight) >= self.max_in_flight:
+            self._emit_next(block=True)
+        self._in_flight.append(submit_in_context(self._executor, self.render, *args))
+
+    def drain_ready(self) -> None:
+        """Emit every finished panel at the head of the queue without blocking"""
+        while self._in_flight and self._in_flight[0].done():
+            self._emit_next(block=False)
+
+    def finish(self) -> None:
+        """Emit all remaining panels and stop the worker threads"""
+        while self._in_flight:
+            self._emit_next(block=True)
+        self._executor.shutdown(wait=True)
+
+    def pending(self) -> int:
+        return len(self._in_flight)
+
+    def _emit_next(self, block: bool) -> None:
+        future = self._in_flight.popleft()
+        try:
+            panels = future.result() if block else future.result(timeout=0)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            return
+        self.emit(panels)
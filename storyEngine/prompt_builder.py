@@ -0,0 +1,89 @@
+from typing import Dict, List, Sequence
+
+from charTraits.character import Character, Memory
+
+Message = Dict[str, str]
+
+
+class PromptBuilder:
+    """Builds character-turn prompts whose prefix stays byte-identical from turn to turn.
+
+    Local backends (LM Studio, llama.cpp) reuse their KV cache for the longest prefix a
+    request shares with the previous one. So the system prompt is one cast-wide string
+    built once and shared by every character. Turns are rendered once, when they are
+    appended. Everything that changes per turn (speaker, retrieved memories) goes into a
+    single trailing message. ``prefix_ratio`` reports how much of each request matched
+    the one before it.
+    """
+
+    def __init__(self, characters: Sequence[Character]):
+        self.system_prompt = self.build_system_prompt(characters)
+        self.requests = 0
+        self.shared_chars = 0
+        self.total_chars = 0
+        self.last_ratio = 0.0
+        self._previous: List[str] = []
+
+    @staticmethod
+    def build_system_prompt(characters: Sequence[Character]) -> str:
+        cast = "\n".join(
+            f"- {c.get_name()} ({c.get_affiliation()}, {c.get_archetype()}): "
+            f"skills: {', '.join(c.skills)}; personality: {', '.join(c.get_personality_traits())}"
+            for c in characters
+        )
+        return f"""You voice the characters of a manga, one line at a time.
+
+The cast:
+{cast}
+
+Stay in character for whoever you are asked to speak as. Just talk naturally with the
+other characters and react to what they say. Keep each reply short and conversational,
+and reply with that character's words only."""
+
+    @staticmethod
+    def turn_message(speaker: str, content: str) -> Message:
+        """History entry for a spoken line; rendered once and never rebuilt"""
+        return {"role": "assistant", "content": f"{speaker}: {content.strip()}"}
+
+    def request(self, history: List[Message], speaker: Character,
+                memories: Sequence[Memory] = (), measure: bool = True) -> List[Message]:
+        """Messages for ``speaker``'s next turn: the append-only history plus one tail message
+
+        Pass ``measure=False`` for requests that may never be sent (speculative turns), so
+        they don't count towards the prefix statistics.
+        """
+        memory_lines = "\n".join(f"- {m.content}" for m in memories) or "- (nothing comes to mind)"
+        tail = {
+            "role": "user",
+            "content": f"Continue the conversation as {speaker.get_name()}.\n"
+                       f"What {speaker.get_name()} remembers right now:\n{memory_lines}"
+        }
+        messages = [*history, tail]
+        if measure:
+            self._measure(messages)
+        return messages
+
+    @property
+    def prefix_ratio(self) -> float:
+        """Share of all prompt characters sent so far that repeated the previous request's prefix"""
+        return self.shared_chars / self.total_chars if self.total_chars else 0.0
+
+    def _measure(self, messages: List[Message]) -> None:
+        parts = [self.system_prompt, *(f"{m['role']}\n{m['content']}" for m in messages)]
+        shared = 0
+        for previous, current in zip(self._previous, parts):
+            if previous == current:
+                shared += len(current)
+                continue
+            limit = min(len(previous), len(current))
+            i = 0
+            while i < limit and previous[i] == current[i]:
+                i += 1
+            shared += i
+            break
+        total = sum(len(part) for part in parts)
+        self.requests += 1
+        self.shared_chars += shared
+        self.total_chars += total
+        self.last_ratio = shared / total if total else 0.0
+        self._previous = parts
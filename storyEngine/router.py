@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .governor import classify_error
+
+# Task classes an agent can be routed by; each maps to one model
+TASKS = ("cast", "dialogue", "panels", "summary", "memory")
+# Failures that mean the server is unreachable (rather than busy or the request bad)
+UNREACHABLE = frozenset({"connection", "timeout"})
+
+
+class Backend:
+    """One OpenAI-compatible inference server; without ``models`` it serves any model"""
+
+    def __init__(self, name: str, base_url: str, models: Optional[List[str]] = None,
+                 weight: float = 1.0):
+        if weight <= 0:
+            raise ValueError(f"backend {name!r}: weight must be positive")
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.models = frozenset(models or ())
+        self.weight = weight
+        self.healthy = True
+        self.outstanding = 0
+        self.calls = 0
+        self.failures = 0
+        self.swarm = None
+
+    def serves(self, model: str) -> bool:
+        return not self.models or model in self.models
+
+    @property
+    def load(self) -> float:
+        return self.outstanding / self.weight
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+class RouteConfig:
+    """Which model each task uses and which servers host which models, e.g. from JSON:
+
+        {"backends": [{"name": "gpu1", "base_url": "http://10.0.0.5:1234/v1",
+                       "models": ["llama-3.2-3b-instruct"], "weight": 2},
+                      {"name": "laptop", "base_url": "http://localhost:1234/v1"}],
+         "tasks": {"dialogue": "llama-3.2-3b-instruct", "panels": "llama-3.2-1b-instruct"},
+         "health_interval": 10}
+
+    Tasks that are not listed use ``default_model``.
+    """
+
+    def __init__(self, backends: List[Backend], tasks: Optional[Dict[str, str]] = None,
+                 default_model: str = "", health_interval: float = 10.0):
+        if not backends:
+            raise ValueError("at least one backend is required")
+        self.backends = backends
+        self.tasks = dict(tasks or {})
+        self.default_model = default_model
+        self.health_interval = health_interval
+        unknown = set(self.tasks) - set(TASKS)
+        if unknown:
+            raise ValueError(f"unknown tasks {sorted(unknown)}; expected some of {list(TASKS)}")
+        for task in TASKS:
+            model = self.model(task)
+            if not any(backend.serves(model) for backend in backends):
+                raise ValueError(f"no backend serves {model!r} (used for {task})")
+
+    @classmethod
+    def load(cls, path: str, default_url: str, default_model: str) -> "RouteConfig":
+        """Read ``path``; without that file, every task goes to ``default_url``"""
+        if not os.path.exists(path):
+            return cls([Backend("default", default_url)], default_model=default_model)
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        backends = [Backend(b.get("name", b["base_url"]), b["base_url"], b.get("models"),
+                            b.get("weight", 1.0))
+                    for b in config.get("backends") or [{"base_url": default_url}]]
+        return cls(backends, config.get("tasks"), config.get("default_model", default_model),
+                   config.get("health_interval", 10.0))
+
+    def model(self, task: str) -> str:
+        return self.tasks.get(task, self.default_model)
+
+
+class Router:
+    """Sends each call to the least-loaded healthy backend that hosts its model.
+
+    Load is requests in flight divided by the backend's weight. Ties go to the backend
+    that last served the same ``affinity`` key (the agent's instructions), whose KV cache
+    likely still holds the prompt prefix, and otherwise rotate. Connection failures and timeouts mark a backend down at once. When more than one
+    backend is configured, a background thread polls ``GET /models`` on each one every
+    ``health_interval`` seconds and brings recovered servers back. If every backend for
+    a model is down, calls still go to one of them; the governor's breaker and backoff
+    take over from there. Each backend's Swarm client is built on first use.
+    """
+
+    PROBE_TIMEOUT = 2.0
+    MAX_AFFINITIES = 1024
+
+    def __init__(self, config: RouteConfig, make_swarm: Callable[[str], object]):
+        self.config = config
+        self.backends = config.backends
+        self.make_swarm = make_swarm
+        self._lock = threading.Lock()
+        self._turn = 0
+        # affinity key -> backend that last served it, oldest first
+        self._affinity: Dict[object, Backend] = {}
+        self._checker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def acquire(self, model: str, affinity=None) -> Backend:
+        """Pick a backend for ``model`` and count the call as in flight there"""
+        self._start_checker()
+        with self._lock:
+            candidates = [b for b in self.backends if b.serves(model)]
+            if not candidates:
+                raise LookupError(f"no backend serves model {model!r}")
+            healthy = [b for b in candidates if b.healthy] or candidates
+            lightest = min(b.load for b in healthy)
+            idle = [b for b in healthy if b.load == lightest]
+            backend = self._affinity.pop(affinity, None)
+            if backend not in idle:
+                self._turn += 1
+                backend = idle[self._turn % len(idle)]
+            if affinity is not None:
+                self._affinity[affinity] = backend
+                if len(self._affinity) > self.MAX_AFFINITIES:
+                    del self._affinity[next(iter(self._affinity))]
+            backend.outstanding += 1
+            backend.calls += 1
+        return backend
+
+    def release(self, backend: Backend, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None:
+                backend.healthy = True
+            else:
+                backend.failures += 1
+                if classify_error(error) in UNREACHABLE:
+                    backend.healthy = False
+
+    def swarm(self, backend: Backend):
+        if backend.swarm is None:
+            with self._lock:
+                if backend.swarm is None:
+                    backend.swarm = self.make_swarm(backend.base_url)
+        return backend.swarm
+
+    def check(self) -> None:
+        """Probe every backend once and update its health"""
+        import urllib.request  # deferred: only the health checker needs it
+        for backend in self.backends:
+            try:
+                with urllib.request.urlopen(f"{backend.base_url}/models",
+                                            timeout=self.PROBE_TIMEOUT) as response:
+                    healthy = response.status == 200
+            except OSError:
+                healthy = False
+            with self._lock:
+                backend.healthy = healthy
+
+    def _start_checker(self) -> None:
+        if self._checker is not None or len(self.backends) < 2 or not self.config.health_interval:
+            return
+        with self._lock:
+            if self._checker is None:
+                self._checker = threading.Thread(target=self._check_forever, name="health-check",
+                                                 daemon=True)
+                self._checker.start()
+
+    def _check_forever(self) -> None:
+        while not self._stop.wait(self.config.health_interval):
+            self.check()
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {backend.name: backend.stats() for backend in self.backends}
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+class RoutedSwarm:
+    """Swarm-compatible client that runs every call on the backend the Router picks"""
+
+    def __init__(self, router: Router):
+        self.router = router
+
+    @property
+    def client(self):
+        return self.router.swarm(self.router.backends[0]).client
+
+    def run(self, agent, messages, stream: bool = False, **kwargs):
+        router = self.router
+        # Agents with the same instructions share a prompt prefix, so keep them together
+        affinity = agent.instructions if isinstance(agent.instructions, str) else agent.name
+        backend = router.acquire(kwargs.get("model_override") or agent.model, affinity)
+        try:
+            result = router.swarm(backend).run(agent=agent, messages=messages, stream=stream,
+                                               **kwargs)
+        except Exception as e:
+            router.release(backend, e)
+            raise
+        if stream:
+            return self._routed_stream(result, backend)
+        router.release(backend)
+        return result
+
+    def _routed_stream(self, chunks, backend: Backend):
+        # Streams connect lazily, so the backend stays busy until the stream ends
+        error = None
+        try:
+            yield from chunks
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            chunks.close()
+            self.router.release(backend, error)
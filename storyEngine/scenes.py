@@ -0,0 +1,241 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from charTraits.character import Character
+
+from .scheduler import submit_in_context
+from .speakers import NameMatcher
+
+Group = List[Character]
+
+
+def merge_small_groups(groups: List[Group], min_size: int = 2) -> List[Group]:
+    """Fold groups too small to hold a conversation into the smallest large-enough group"""
+    large = [group for group in groups if len(group) >= min_size]
+    stragglers = [character for group in groups if len(group) < min_size for character in group]
+    if not large:
+        return [stragglers] if stragglers else []
+    for character in stragglers:
+        min(large, key=len).append(character)
+    return large
+
+
+def by_affiliation(characters: Sequence[Character]) -> List[Group]:
+    """One group per affiliation, in cast order"""
+    groups: Dict[str, Group] = {}
+    for character in characters:
+        groups.setdefault(character.affiliation, []).append(character)
+    return merge_small_groups(list(groups.values()))
+
+
+def by_relationships(characters: Sequence[Character], threshold: float = 0.7) -> List[Group]:
+    """Clusters of mutual allies; everyone else grouped by affiliation"""
+    from charTraits.relationship_manager import RelationshipMatrix  # deferred: pulls in numpy
+    by_name = {character.name: character for character in characters}
+    groups = [[by_name[name] for name in cluster]
+              for cluster in RelationshipMatrix(characters).ally_clusters(threshold)]
+    placed = {character.name for group in groups for character in group}
+    groups.extend(by_affiliation([c for c in characters if c.name not in placed]))
+    return merge_small_groups(groups)
+
+
+PARTITIONS = {"affiliation": by_affiliation, "relationships": by_relationships}
+
+
+class Scene:
+    """One group of characters talking among themselves, with its own story and panels"""
+
+    def __init__(self, name: str, story, panels):
+        self.name = name
+        self.story = story
+        self.panels = panels
+        self.members = frozenset(character.name for character in story.characters)
+        self.turns = 0
+        self.failures = 0
+        # (speaker, mentioned) cast positions since the last sync point
+        self.mentions: List[Tuple[int, int]] = []
+
+    def close(self) -> None:
+        self.panels.finish()
+        self.story.close()
+
+
+class SceneDirector:
+    """Runs a cast as concurrent sub-scenes that merge and split at sync points.
+
+    ``partition(characters)`` splits the cast into groups. Each group becomes a scene
+    with its own story from ``new_story(characters, summary, turns)`` (a StoryTurns) and
+    its own panel pipeline from ``new_panels(scene_name)``. In each round, every scene
+    plays up to ``sync_every`` turns on its own thread, one ``play_turn(story, speculate)``
+    at a time, so the backend sees one call per scene at once. Between rounds is the sync
+    point. First, every character named in a turn counts as an interaction with the
+    speaker (``MENTION_INTERACTION`` at ``MENTION_INTENSITY``, through the
+    RelationshipManager), so characters who keep addressing each other become allies,
+    across scenes too. Then the cast is partitioned again. Scenes whose members are
+    unchanged carry on. The rest close, and each new group starts from the summaries and
+    last ``carry_turns`` turns of the scenes its members came from. Affiliations do not
+    change, so only a relationship-based partition makes scenes merge and split. A scene
+    whose round fails (``retry_delay`` gave up) is reported to ``on_error`` and closed, and
+    its members sit out the rest of the run.
+    """
+
+    MENTION_INTERACTION = "positive"
+    MENTION_INTENSITY = 1.0
+
+    def __init__(self, characters: Sequence[Character],
+                 partition: Callable[[Sequence[Character]], List[Group]],
+                 new_story: Callable, new_panels: Callable[[str], object], play_turn: Callable,
+                 on_turn: Optional[Callable[[str, str, str], None]] = None,
+                 on_error: Optional[Callable[[str, Exception], None]] = None,
+                 retry_delay: Optional[Callable[[Exception, int], Optional[float]]] = None,
+                 sync_every: int = 4, carry_turns: int = 6, max_parallel: int = 16):
+        self.characters = list(characters)
+        self.partition = partition
+        self.new_story = new_story
+        self.new_panels = new_panels
+        self.play_turn = play_turn
+        self.on_turn = on_turn
+        self.on_error = on_error
+        self.retry_delay = retry_delay
+        self.sync_every = sync_every
+        self.carry_turns = carry_turns
+        self.max_parallel = max_parallel
+        self.rows = {character.name: i for i, character in enumerate(self.characters)}
+        self.names = NameMatcher(list(self.rows))
+        self.scenes: List[Scene] = []
+        self.dropped: Set[str] = set()  # members of failed scenes
+        self.failed_scenes = 0
+        self.mentions = 0
+        self.rounds = 0
+        self.regroups = 0
+        self.turns = 0
+        self._stop = threading.Event()
+
+    def apply_mentions(self) -> None:
+        """Turn the mentions the scenes collected this round into relationship changes"""
+        from charTraits.relationship_manager import RelationshipManager  # deferred: pulls in numpy
+        for scene in self.scenes:
+            for speaker, other in scene.mentions:
+                RelationshipManager.process_interaction(
+                    self.characters[speaker], self.characters[other],
+                    self.MENTION_INTERACTION, self.MENTION_INTENSITY)
+            self.mentions += len(scene.mentions)
+            scene.mentions.clear()
+
+    def regroup(self) -> bool:
+        """Sync point: re-partition the cast and rebuild scenes whose members changed"""
+        groups = self.partition([c for c in self.characters if c.name not in self.dropped])
+        current = {scene.members: scene for scene in self.scenes}
+        scenes = []
+        for index, group in enumerate(groups):
+            members = frozenset(character.name for character in group)
+            scene = current.pop(members, None)
+            if scene is None:
+                sources = [s for s in self.scenes if s.members & members]
+                scene = self._open(group, sources, index)
+            scenes.append(scene)
+        changed = bool(current) or len(scenes) != len(self.scenes)
+        for scene in current.values():
+            scene.close()
+        if changed and self.scenes:
+            self.regroups += 1
+        self.scenes = scenes
+        return changed
+
+    def _drop(self, scene: Scene) -> None:
+        """Close a failed scene and keep its members out of later partitions"""
+        scene.close()
+        self.scenes.remove(scene)
+        self.dropped |= scene.members
+        self.failed_scenes += 1
+
+    def _open(self, group: Group, sources: List[Scene], index: int) -> Scene:
+        summaries, turns = [], []
+        for source in sources:
+            summary, recent = source.story.history.snapshot()
+            if summary:
+                summaries.append(f"{source.name}: {summary}")
+            turns.extend(recent[-self.carry_turns:])
+        affiliations = sorted({character.affiliation for character in group})
+        name = f"Scene {index + 1} ({', '.join(affiliations)})"
+        return Scene(name, self.new_story(group, "\n".join(summaries), turns), self.new_panels(name))
+
+    def _play_round(self, scene: Scene, turns: int) -> int:
+        """Play up to ``turns`` turns; ``scene.turns`` counts them even if the round fails"""
+        played = 0
+        try:
+            while played < turns and not self._stop.is_set():
+                try:
+                    name, content, panel_chat = self.play_turn(scene.story, played + 1 < turns)
+                except Exception as e:
+                    scene.failures += 1
+                    delay = self.retry_delay(e, scene.failures) if self.retry_delay else None
+                    if delay is None:
+                        raise
+                    self._stop.wait(delay)
+                    continue
+                scene.failures = 0
+                speaker = self.rows.get(name)
+                if speaker is not None:
+                    scene.mentions.extend((speaker, other) for other in self.names.find(content)
+                                          if other != speaker)
+                scene.panels.drain_ready()
+                if self.on_turn:
+                    self.on_turn(scene.name, name, content)
+                if panel_chat:
+                    scene.panels.submit(panel_chat)
+                played += 1
+        finally:
+            scene.turns += played
+        return played
+
+    def run(self, max_turns: Optional[int] = None) -> None:
+        """Play rounds until ``max_turns`` turns in total, every scene fails, or Ctrl-C"""
+        self.regroup()
+        executor = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="scene")
+        try:
+            while self.scenes:
+                per_scene = self.sync_every
+                if max_turns is not None:
+                    per_scene = min(per_scene, math.ceil((max_turns - self.turns) / len(self.scenes)))
+                futures = [(scene, scene.turns,
+                            submit_in_context(executor, self._play_round, scene, per_scene))
+                           for scene in self.scenes]
+                played = 0
+                failed = []
+                for scene, before, future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed.append(scene)
+                        if self.on_error:
+                            self.on_error(scene.name, e)
+                    played += scene.turns - before
+                self.turns += played
+                self.rounds += 1
+                self.apply_mentions()
+                for scene in failed:
+                    self._drop(scene)
+                done = max_turns is not None and self.turns >= max_turns
+                if done or not played or self._stop.is_set():
+                    break
+                self.regroup()
+        except KeyboardInterrupt:
+            self._stop.set()
+        finally:
+            executor.shutdown(wait=True)
+            for scene in self.scenes:
+                scene.close()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "scenes": len(self.scenes),
+            "rounds": self.rounds,
+            "regroups": self.regroups,
+            "mentions": self.mentions,
+            "failed_scenes": self.failed_scenes,
+            "turns": self.turns,
+            "turns_by_scene": {scene.name: scene.turns for scene in self.scenes},
+        }
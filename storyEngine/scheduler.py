@@ -0,0 +1,201 @@
+import contextlib
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Deque, Dict, Iterator, Optional, Tuple
+
+# (session id, priority) that LLM calls made in this context are scheduled under
+_session: contextvars.ContextVar[Tuple[str, int]] = contextvars.ContextVar(
+    "scheduler_session", default=("default", 0))
+
+
+def submit_in_context(executor: Executor, fn: Callable, *args) -> Future:
+    """``executor.submit(fn, *args)``, run in a copy of the caller's context.
+
+    Worker threads start from an empty context, so without this the work would lose the
+    caller's trace attributes and its FairScheduler session and priority.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+class _Ticket:
+    __slots__ = ("session_id", "priority", "enqueued", "granted")
+
+    def __init__(self, session_id: str, priority: int):
+        self.session_id = session_id
+        self.priority = priority
+        self.enqueued = time.perf_counter()
+        self.granted = False
+
+
+class SessionLoad:
+    """Queue depth and latency of one session's LLM calls"""
+
+    def __init__(self):
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.wait_total = 0.0
+        self.latency_total = 0.0
+        self.last_latency = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        done = self.calls or 1
+        return {
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "mean_wait_ms": round(self.wait_total / done * 1000, 1),
+            "mean_latency_ms": round(self.latency_total / done * 1000, 1),
+            "last_latency_ms": round(self.last_latency * 1000, 1),
+        }
+
+
+class FairScheduler:
+    """Admits at most ``max_concurrency`` LLM calls at a time across all sessions.
+
+    Waiting calls are granted by priority (lower runs first), then round-robin between
+    sessions, so one busy story cannot starve the others. Blocking callers on any thread
+    queue through ``slot()``; the session and priority come from ``session()``.
+    """
+
+    def __init__(self, max_concurrency: int = 2):
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[_Ticket]] = {}
+        self._last_served: Dict[str, int] = {}
+        self._served = itertools.count(1)
+        self._running = 0
+        self._load: Dict[str, SessionLoad] = {}
+
+    @staticmethod
+    @contextlib.contextmanager
+    def session(session_id: str, priority: int = 0) -> Iterator[None]:
+        """Schedule LLM calls made in this block under ``session_id`` and ``priority``"""
+        token = _session.set((session_id, priority))
+        try:
+            yield
+        finally:
+            _session.reset(token)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def deferred(steps: int = 1) -> Iterator[None]:
+        """Schedule LLM calls made in this block ``steps`` priority levels below the current ones"""
+        session_id, priority = _session.get()
+        with FairScheduler.session(session_id, priority + steps):
+            yield
+
+    @contextlib.contextmanager
+    def slot(self, session_id: Optional[str] = None, priority: Optional[int] = None) -> Iterator[None]:
+        """Wait for a backend slot, hold it for the block, and record the call's latency"""
+        current_session, current_priority = _session.get()
+        ticket = _Ticket(session_id or current_session,
+                         current_priority if priority is None else priority)
+        with self._cond:
+            load = self._load.setdefault(ticket.session_id, SessionLoad())
+            self._queues.setdefault(ticket.session_id, deque()).append(ticket)
+            load.waiting += 1
+            self._grant()
+            try:
+                while not ticket.granted:
+                    self._cond.wait()
+            except BaseException:
+                if not ticket.granted:
+                    self._queues[ticket.session_id].remove(ticket)
+                    load.waiting -= 1
+                    raise
+                self._running -= 1
+                load.in_flight -= 1
+                self._grant()
+                raise
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except GeneratorExit:  # a stream closed early by its reader
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            with self._cond:
+                self._running -= 1
+                load.in_flight -= 1
+                load.calls += 1
+                load.failures += failed
+                load.latency_total += latency
+                load.last_latency = latency
+                self._grant()
+
+    def _grant(self) -> None:
+        """Hand free slots to the best waiting tickets; the condition's lock must be held"""
+        granted = False
+        while self._running < self.max_concurrency:
+            ready = [sid for sid, queue in self._queues.items() if queue]
+            if not ready:
+                break
+            sid = min(ready, key=lambda s: (self._queues[s][0].priority, self._last_served.get(s, 0)))
+            ticket = self._queues[sid].popleft()
+            ticket.granted = granted = True
+            self._last_served[sid] = next(self._served)
+            self._running += 1
+            load = self._load[sid]
+            load.waiting -= 1
+            load.in_flight += 1
+            load.wait_total += time.perf_counter() - ticket.enqueued
+        if granted:
+            self._cond.notify_all()
+
+    def load(self, session_id: str) -> Dict[str, float]:
+        with self._cond:
+            return self._load.get(session_id, SessionLoad()).as_dict()
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": self._running,
+                "waiting": sum(len(queue) for queue in self._queues.values()),
+                "sessions": {sid: load.as_dict() for sid, load in self._load.items()},
+            }
+
+    def forget(self, session_id: str) -> None:
+        """Drop an idle session's queue and counters"""
+        with self._cond:
+            if not self._queues.get(session_id):
+                self._queues.pop(session_id, None)
+                self._last_served.pop(session_id, None)
+                self._load.pop(session_id, None)
+
+
+class ScheduledSwarm:
+    """Swarm client wrapper that runs every call inside a scheduler slot; a streamed call
+    holds its slot until the stream is exhausted or closed"""
+
+    def __init__(self, swarm, scheduler: FairScheduler):
+        self.swarm = swarm
+        self.scheduler = scheduler
+
+    def __getattr__(self, name):
+        return getattr(self.swarm, name)
+
+    def run(self, agent, messages, stream: bool = False, **kwargs):
+        if stream:
+            return self._scheduled_stream(agent, messages, **kwargs)
+        with self.scheduler.slot():
+            return self.swarm.run(agent=agent, messages=messages, **kwargs)
+
+    def _scheduled_stream(self, agent, messages, **kwargs):
+        with self.scheduler.slot():
+            chunks = self.swarm.run(agent=agent, messages=messages, stream=True, **kwargs)
+            try:
+                yield from chunks
+            finally:
+                chunks.close()
@@ -0,0 +1,307 @@
+import asyncio
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from charTraits.character import Character
+
+from .scheduler import FairScheduler
+from .tracing import Tracer
+
+# play_turn(story) -> (speaker, content, conversation due for panels or None)
+TurnPlayer = Callable[[Any], Tuple[str, str, Optional[str]]]
+
+MAX_TURNS_PER_REQUEST = 20
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def int_field(body: Dict[str, Any], name: str, default: int) -> int:
+    """Integer field of a request body; anything else is the client's error (400)"""
+    value = body.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise HttpError(400, f"{name!r} must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise HttpError(400, f"{name!r} must be an integer") from None
+
+
+class ServedSession:
+    """One hosted story: its cast and turn state, plus per-session queue and latency stats"""
+
+    def __init__(self, session_id: str, topic: str, priority: int, characters: List[Character], story):
+        self.id = session_id
+        self.topic = topic
+        self.priority = priority
+        self.characters = characters
+        self.story = story
+        self.lock = asyncio.Lock()  # turns of one story run one at a time
+        self.transcript: List[Dict[str, str]] = []
+        self.panels: List[str] = []
+        self.panel_errors: List[str] = []
+        self.queued_turns = 0
+        self.turn_latency_total = 0.0
+        self.last_turn_latency = 0.0
+        self.created = time.time()
+
+
+class StoryServer:
+    """Asyncio HTTP server hosting many concurrent stories in one process.
+
+    Blocking story work runs on a thread pool; every LLM call it makes goes through the
+    shared ``scheduler``, which bounds what reaches the model backend and keeps sessions
+    fair. Routes (JSON in and out)::
+
+        POST   /sessions              {"topic": ..., "priority": 0} -> new session and cast
+        GET    /sessions              all sessions
+        GET    /sessions/<id>         cast, turn count, queue depth and latency
+        POST   /sessions/<id>/turns   {"count": 1} -> the new turns
+        DELETE /sessions/<id>
+        GET    /stats                 scheduler load per session and backend health
+        GET    /metrics               Prometheus text, if a metrics callable was given
+    """
+
+    def __init__(self, create_cast: Callable[[str], List[Character]],
+                 new_story: Callable[[str, List[Character]], Any], play_turn: TurnPlayer,
+                 scheduler: FairScheduler, render_panels: Optional[Callable[[str], str]] = None,
+                 metrics: Optional[Callable[[], str]] = None,
+                 backend_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+                 on_panel_error: Optional[Callable[[str, BaseException], None]] = None,
+                 max_sessions: int = 64):
+        self.create_cast = create_cast
+        self.new_story = new_story
+        self.play_turn = play_turn
+        self.render_panels = render_panels
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.backend_stats = backend_stats
+        self.on_panel_error = on_panel_error
+        self.max_sessions = max_sessions
+        self.panel_failures = 0
+        self.sessions: Dict[str, ServedSession] = {}
+        # Sessions whose cast is still being created; they count toward max_sessions
+        self._creating = 0
+        self._ids = itertools.count(1)
+        self._background: set = set()
+        # Threads mostly wait on the scheduler or the backend, so allow one per session
+        self._executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="stories")
+
+    async def _call(self, session_id: str, priority: int, fn: Callable, *args):
+        """Run blocking ``fn`` on the pool with its LLM calls scheduled under the session"""
+        def scheduled():
+            with FairScheduler.session(session_id, priority), Tracer.attributes(session=session_id):
+                return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, scheduled)
+
+    async def create_session(self, topic: str, priority: int = 0) -> ServedSession:
+        if len(self.sessions) + self._creating >= self.max_sessions:
+            raise HttpError(503, f"session limit of {self.max_sessions} reached")
+        session_id = f"s{next(self._ids)}"
+        # Hold the slot across the awaits so concurrent requests can't exceed the limit
+        self._creating += 1
+        try:
+            characters = await self._call(session_id, priority, self.create_cast, topic)
+            if not characters:
+                raise HttpError(500, "could not create a cast for this topic")
+            story = await self._call(session_id, priority, self.new_story, topic, characters)
+            session = ServedSession(session_id, topic, priority, characters, story)
+            self.sessions[session_id] = session
+        except BaseException:
+            # Failed, timed out or cancelled before it was registered: drop its scheduler state
+            self.scheduler.forget(session_id)
+            raise
+        finally:
+            self._creating -= 1
+        return session
+
+    async def run_turns(self, session: ServedSession, count: int) -> List[Dict[str, str]]:
+        session.queued_turns += count
+        turns = []
+        try:
+            async with session.lock:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    speaker, content, panel_chat = await self._call(
+                        session.id, session.priority, self.play_turn, session.story)
+                    session.last_turn_latency = time.perf_counter() - start
+                    session.turn_latency_total += session.last_turn_latency
+                    session.queued_turns -= 1
+                    turn = {"speaker": speaker, "content": content}
+                    session.transcript.append(turn)
+                    turns.append(turn)
+                    if panel_chat and self.render_panels:
+                        self._spawn(self._render(session, panel_chat), session)
+        finally:
+            session.queued_turns -= count - len(turns)
+        return turns
+
+    async def _render(self, session: ServedSession, recent_chat: str) -> None:
+        # Panels can wait: they queue behind every session's dialogue at the same priority
+        panels = await self._call(session.id, session.priority + 1, self.render_panels, recent_chat)
+        session.panels.append(panels)
+
+    def _spawn(self, coroutine, session: ServedSession) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._background.add(task)
+        task.add_done_callback(lambda done: self._finished(session, done))
+
+    def _finished(self, session: ServedSession, task: asyncio.Task) -> None:
+        """Done callback for a background panel render: surface its error, if any"""
+        self._background.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        self.panel_failures += 1
+        session.panel_errors.append(f"{type(error).__name__}: {error}")
+        print(f"[server] panels for session {session.id} failed: {type(error).__name__}: {error}")
+        if self.on_panel_error:
+            self.on_panel_error(session.id, error)
+
+    async def close_session(self, session: ServedSession) -> None:
+        self.sessions.pop(session.id, None)
+        async with session.lock:
+            close = getattr(session.story, "close", None)
+            if close:
+                await asyncio.get_running_loop().run_in_executor(self._executor, close)
+        self.scheduler.forget(session.id)
+
+    def describe(self, session: ServedSession, transcript: bool = False) -> Dict[str, Any]:
+        turns = len(session.transcript)
+        info = {
+            "id": session.id,
+            "topic": session.topic,
+            "priority": session.priority,
+            "cast": [{"name": c.name, "archetype": c.archetype, "role": c.role,
+                      "affiliation": c.affiliation} for c in session.characters],
+            "turn_count": turns,
+            "panel_count": len(session.panels),
+            "panel_errors": session.panel_errors,
+            "queued_turns": session.queued_turns,
+            "mean_turn_latency_ms": round(session.turn_latency_total / turns * 1000, 1) if turns else 0.0,
+            "last_turn_latency_ms": round(session.last_turn_latency * 1000, 1),
+            "llm": self.scheduler.load(session.id),
+        }
+        story_stats = getattr(session.story, "stats", None)
+        if story_stats:
+            info["story"] = story_stats()
+        if transcript:
+            info["transcript"] = session.transcript
+            info["panels"] = session.panels
+        return info
+
+    def _session(self, session_id: str) -> ServedSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, f"no session {session_id!r}")
+        return session
+
+    async def route(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Any]:
+        parts = [part for part in path.split("/") if part]
+        if parts == ["stats"] and method == "GET":
+            stats = {"sessions": len(self.sessions), "panel_failures": self.panel_failures,
+                     "scheduler": self.scheduler.stats()}
+            if self.backend_stats:
+                stats["backend"] = self.backend_stats()
+            return 200, stats
+        if parts == ["metrics"] and method == "GET" and self.metrics:
+            return 200, self.metrics()
+        if parts == ["sessions"]:
+            if method == "GET":
+                return 200, [self.describe(s) for s in self.sessions.values()]
+            if method == "POST":
+                topic = str(body.get("topic") or "").strip()
+                if not topic:
+                    raise HttpError(400, "'topic' is required")
+                session = await self.create_session(topic, int_field(body, "priority", 0))
+                return 201, self.describe(session)
+        elif len(parts) == 2 and parts[0] == "sessions":
+            session = self._session(parts[1])
+            if method == "GET":
+                return 200, self.describe(session, transcript=True)
+            if method == "DELETE":
+                await self.close_session(session)
+                return 200, {"closed": session.id}
+        elif len(parts) == 3 and parts[0] == "sessions" and parts[2] == "turns":
+            session = self._session(parts[1])
+            if method == "POST":
+                count = int_field(body, "count", 1)
+                if not 1 <= count <= MAX_TURNS_PER_REQUEST:
+                    raise HttpError(400, f"'count' must be between 1 and {MAX_TURNS_PER_REQUEST}")
+                turns = await self.run_turns(session, count)
+                return 200, {"turns": turns, **self.describe(session)}
+        else:
+            raise HttpError(404, f"no route for {path}")
+        raise HttpError(405, f"{method} not allowed on {path}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection, keeping it alive between requests"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length") or 0))
+                status, payload = await self._respond(method.upper(), target.split("?", 1)[0], raw)
+                if isinstance(payload, str):
+                    data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+                else:
+                    data, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: {content_type}\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method: str, path: str, raw: bytes) -> Tuple[int, Any]:
+        try:
+            body = json.loads(raw) if raw.strip() else {}
+        except ValueError as e:  # bad JSON or encoding; errors from the story itself are not 400s
+            return 400, {"error": f"invalid JSON body: {e}"}
+        if not isinstance(body, dict):
+            return 400, {"error": "request body must be a JSON object"}
+        try:
+            return await self.route(method, path, body)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after is not None:  # the backend is shedding load; ask the client to come back
+                return 503, {"error": str(e), "retry_after": round(retry_after, 1)}
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765,
+                    ready: Optional[Callable[[str, int], None]] = None) -> None:
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready:
+            ready(*server.sockets[0].getsockname()[:2])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in list(self._background):
+                task.cancel()
+            for session in list(self.sessions.values()):
+                await self.close_session(session)
+            self._executor.shutdown(wait=False, cancel_futures=True)
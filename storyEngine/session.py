@@ -0,0 +1,237 @@
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+
+    def _dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib encoder is slower but compatible
+    import json
+
+    def _dumps(value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    _loads = json.loads
+
+from charTraits.character import Character, Memory
+from charTraits.memory_consolidator import MemoryConsolidator
+
+SNAPSHOT_FILE = "snapshot.bin"
+LOG_FILE = "events.log"
+
+
+def character_to_record(character: Character) -> Dict[str, Any]:
+    """Compact, JSON-native form of a character with memories stored column-wise"""
+    memories = list(character.memory)
+    return {
+        "name": character.name,
+        "affiliation": character.affiliation,
+        "skills": list(character.skills),
+        "personality_traits": list(character.personality_traits),
+        "beliefs": list(character.beliefs),
+        "goals": list(character.goals),
+        "backstory": character.backstory,
+        "current_state": dict(character.current_state),
+        "archetype": character.archetype,
+        "role": character.role,
+        "memory": {
+            "content": [m.content for m in memories],
+            "timestamp": [m.timestamp for m in memories],
+            "importance": [m.importance for m in memories],
+            "tags": [m.tags for m in memories],
+            "related": [m.related_characters for m in memories],
+        },
+        "emotions": {name: e.intensity for name, e in character.emotions.items()},
+        "relationships": {other: [r.trust, r.friendship, list(r.history),
+                                  r.interactions, r.positive, r.negative]
+                          for other, r in character.relationships.items()},
+    }
+
+
+def character_from_record(record: Dict[str, Any]) -> Character:
+    """Rebuild a character from its record, validating it (memories included) in one pass"""
+    columns = record["memory"]
+    return Character.model_validate({
+        "name": record["name"],
+        "affiliation": record["affiliation"],
+        "skills": record["skills"],
+        "personality_traits": record["personality_traits"],
+        "beliefs": record["beliefs"],
+        "goals": record["goals"],
+        "backstory": record["backstory"],
+        "current_state": record["current_state"],
+        "archetype": record["archetype"],
+        "role": record["role"],
+        "memory": [
+            {"content": content, "timestamp": timestamp, "importance": importance,
+             "tags": tags, "related_characters": related}
+            for content, timestamp, importance, tags, related in zip(
+                columns["content"], columns["timestamp"], columns["importance"],
+                columns["tags"], columns["related"])
+        ],
+        "emotions": {name: {"name": name, "intensity": value}
+                     for name, value in record["emotions"].items()},
+        "relationships": {other: relationship_from_record(other, fields)
+                          for other, fields in record["relationships"].items()},
+    })
+
+
+def relationship_from_record(other: str, fields: List[Any]) -> Dict[str, Any]:
+    """Relationship fields from a record; older snapshots store only [trust, friendship, history]"""
+    trust, friendship, history, *counters = fields
+    interactions, positive, negative = counters or (len(history), 0, 0)
+    return {"character_name": other, "trust": trust, "friendship": friendship,
+            "history": history, "interactions": interactions, "positive": positive,
+            "negative": negative}
+
+
+def apply_event(state: "SessionState", event: Dict[str, Any]) -> None:
+    """Replay one logged event onto a restored session"""
+    kind = event["kind"]
+    if kind == "turn":
+        state.turns.append({"role": "assistant", "content": event["content"]})
+        state.speaker_idx = event["next_speaker"]
+        state.turn = event["turn"] + 1
+        return
+    character = state.by_name().get(event["character"])
+    if character is None:
+        return
+    if kind == "consolidate":
+        merged = Memory.trusted(event["content"], event["timestamp"], event["importance"],
+                                event["tags"], event["related"])
+        MemoryConsolidator.replace(character, {tuple(key) for key in event["merged"]}, merged)
+
+
+class SessionState:
+    """Everything needed to continue a story without calling the model"""
+
+    def __init__(self, topic: str, characters: List[Character], summary: str = "",
+                 turns: Optional[List[Dict]] = None, speaker_idx: int = 0, turn: int = 0):
+        self.topic = topic
+        self.characters = characters
+        self.summary = summary
+        self.turns = turns or []
+        self.speaker_idx = speaker_idx
+        self.turn = turn
+
+    def by_name(self) -> Dict[str, Character]:
+        return {character.name: character for character in self.characters}
+
+
+class StorySession:
+    """Snapshot plus append-only event log for one story, written off the turn loop.
+
+    Events are queued and flushed in batches by a writer thread. A snapshot replaces the
+    log: once it is on disk, the events it already covers are truncated away.
+    """
+
+    def __init__(self, directory: str, flush_every: int = 16, flush_interval: float = 1.0):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.seq = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.directory, LOG_FILE)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snapshot_path)
+
+    def load(self) -> SessionState:
+        """Restore the last snapshot and replay the events logged after it"""
+        with open(self.snapshot_path, "rb") as f:
+            snapshot = _loads(f.read())
+        state = SessionState(
+            topic=snapshot["topic"],
+            characters=[character_from_record(r) for r in snapshot["characters"]],
+            summary=snapshot["summary"],
+            turns=snapshot["turns"],
+            speaker_idx=snapshot["speaker_idx"],
+            turn=snapshot["turn"],
+        )
+        self.seq = snapshot["seq"]
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        event = _loads(line)
+                    except ValueError:
+                        break  # torn final write
+                    if event["seq"] > snapshot["seq"]:
+                        apply_event(state, event)
+                        self.seq = event["seq"]
+        return state
+
+    def start(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_loop, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, kind: str, **fields) -> None:
+        """Queue an event; the caller never waits on disk"""
+        self.seq += 1
+        self._queue.put(("event", {"seq": self.seq, "kind": kind, "time": time.time(), **fields}))
+
+    def snapshot(self, state: SessionState, summary: str, turns: List[Dict]) -> None:
+        """Queue a snapshot of ``state``; encoding and writing happen on the writer thread"""
+        self._queue.put(("snapshot", {
+            "seq": self.seq,
+            "topic": state.topic,
+            "characters": [character_to_record(c) for c in state.characters],
+            "summary": summary,
+            "turns": list(turns),
+            "speaker_idx": state.speaker_idx,
+            "turn": state.turn,
+        }))
+
+    def close(self) -> None:
+        if self._writer:
+            self._queue.put(("close", None))
+            self._writer.join()
+            self._writer = None
+
+    def _write_loop(self) -> None:
+        pending: List[bytes] = []
+        deadline = time.monotonic() + self.flush_interval
+        with open(self.log_path, "ab") as log:
+            while True:
+                try:
+                    kind, payload = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    kind, payload = "tick", None
+                if kind == "event":
+                    pending.append(_dumps(payload) + b"\n")
+                if pending and (kind != "event" or len(pending) >= self.flush_every):
+                    log.write(b"".join(pending))
+                    log.flush()
+                    pending.clear()
+                if kind == "snapshot":
+                    self._write_snapshot(payload)
+                    # Everything logged so far is in the snapshot now
+                    log.truncate(0)
+                    log.seek(0)
+                if kind == "close":
+                    return
+                if kind != "event":
+                    deadline = time.monotonic() + self.flush_interval
+
+    def _write_snapshot(self, snapshot: Dict) -> None:
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(_dumps(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
@@ -0,0 +1,183 @@
+import heapq
+import re
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from charTraits.character import Character
+
+WORD_PATTERN = re.compile(r"\w+")
+# Name words that are also titles or everyday words, so they never identify anyone alone
+NAME_STOPWORDS = frozenset(
+    "the a an of and de la le von van da del el al no san kun chan sama sensei "
+    "mr mrs ms miss dr doctor sir lady lord master captain general professor "
+    "king queen prince princess young old big little".split()
+)
+
+
+class NameMatcher:
+    """Finds the characters a piece of text names.
+
+    A character is matched by their full name, or by a single word of it that no other
+    character's name shares, is not a title or everyday word (NAME_STOPWORDS), and has
+    at least three letters. "Akira 0" to "Akira 3" are only told apart by full name, and
+    "Captain Ryu" is matched by "Ryu" but not by "captain".
+    """
+
+    def __init__(self, names: Sequence[str]):
+        # first word -> (full name as words, index)
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        owners: Dict[str, Set[int]] = {}
+        for index, name in enumerate(names):
+            words = tuple(WORD_PATTERN.findall(name.lower()))
+            if not words:
+                continue
+            self._phrases.setdefault(words[0], []).append((words, index))
+            for word in words:
+                owners.setdefault(word, set()).add(index)
+        self._by_word = {word: next(iter(indices)) for word, indices in owners.items()
+                         if len(indices) == 1 and len(word) >= 3 and not word.isdigit()
+                         and word not in NAME_STOPWORDS}
+
+    def find(self, text: str) -> Set[int]:
+        """Indices of the characters ``text`` names"""
+        words = WORD_PATTERN.findall(text.lower())
+        found: Set[int] = set()
+        for position, word in enumerate(words):
+            index = self._by_word.get(word)
+            if index is not None:
+                found.add(index)
+            for phrase, index in self._phrases.get(word, ()):
+                if tuple(words[position:position + len(phrase)]) == phrase:
+                    found.add(index)
+        return found
+
+
+class RoundRobinSpeakers:
+    """Every character in cast order, one turn each"""
+
+    def __init__(self, characters: Sequence[Character]):
+        self.size = len(characters)
+
+    def advance(self, speaker: int, content: str) -> int:
+        """Index of who speaks after ``speaker`` said ``content``"""
+        return (speaker + 1) % self.size
+
+    def stats(self) -> Dict[str, object]:
+        return {"policy": "round_robin"}
+
+
+class PrioritySpeakers:
+    """Picks the character the last turn most concerns, so large casts only spend calls
+    on characters who matter to the scene.
+
+    A candidate's score adds up:
+
+    - ``MENTION`` if the last turn named them,
+    - ``EMOTION`` times the intensity of their dominant emotion,
+    - ``TENSION`` times how little they and the last speaker trust and like each other,
+    - ``WAIT`` for every turn since they last spoke, so nobody is silent forever.
+
+    The waiting term grows by the same amount for everyone each turn, so the heap is
+    keyed by ``score - WAIT * turn_last_spoken`` and only the characters a turn touches
+    (the speaker, whoever was mentioned, the speaker's relationships, and last turn's
+    boosted characters) are re-keyed. Each pick is O(log n) plus that handful of
+    updates; outdated heap entries are skipped on pop. Emotions changed outside the
+    story loop count once the character is next touched, or after ``touch``.
+    """
+
+    MENTION = 1.0
+    EMOTION = 0.5
+    TENSION = 0.5
+    WAIT = 0.1
+
+    def __init__(self, characters: Sequence[Character]):
+        from charTraits.emotional_engine import EmotionalEngine  # deferred: pulls in numpy
+        self.dominant_emotion = EmotionalEngine.get_dominant_emotion
+        self.characters = list(characters)
+        self.turn = 0
+        self.last_spoke = [0] * len(self.characters)
+        self.boost = [0.0] * len(self.characters)
+        self._boosted: Set[int] = set()
+        self.names = NameMatcher([character.name for character in self.characters])
+        self.rows = {character.name: i for i, character in enumerate(self.characters)}
+        self._versions = [0] * len(self.characters)
+        self._heap: List[Tuple[float, int, int]] = []
+        for i in range(len(self.characters)):
+            self._push(i)
+
+    def score(self, index: int) -> float:
+        """Current score of character ``index`` without the waiting term"""
+        character = self.characters[index]
+        dominant = self.dominant_emotion(character)
+        emotion = character.emotions[dominant].intensity if dominant else 0.0
+        return self.boost[index] + self.EMOTION * emotion
+
+    def _push(self, index: int) -> None:
+        self._versions[index] += 1
+        key = self.score(index) - self.WAIT * self.last_spoke[index]
+        heapq.heappush(self._heap, (-key, index, self._versions[index]))
+
+    def touch(self, indices: Iterable[int]) -> None:
+        """Re-score characters whose emotions or relationships changed elsewhere"""
+        for index in indices:
+            self._push(index)
+
+    def mentioned(self, content: str) -> Set[int]:
+        """Characters named in ``content``"""
+        return self.names.find(content)
+
+    def tension(self, speaker: int) -> Dict[int, float]:
+        """Characters the speaker has a relationship with, and how strained it is (0-1)"""
+        tensions = {}
+        for other, rel in self.characters[speaker].relationships.items():
+            index = self.rows.get(other)
+            if index is not None:
+                tensions[index] = 1.0 - (rel.trust + rel.friendship) / 2
+        return tensions
+
+    def advance(self, speaker: int, content: str) -> int:
+        """Index of who speaks after ``speaker`` said ``content``"""
+        self.turn += 1
+        self.last_spoke[speaker] = self.turn
+        touched = {speaker} | self._boosted
+        for index in self._boosted:
+            self.boost[index] = 0.0
+        boosted = set()
+        for index in self.mentioned(content) - {speaker}:
+            self.boost[index] += self.MENTION
+            boosted.add(index)
+        for index, strain in self.tension(speaker).items():
+            if index != speaker and strain > 0:
+                self.boost[index] += self.TENSION * strain
+                boosted.add(index)
+        self._boosted = boosted
+        self.touch(touched | boosted)
+        if len(self._heap) > 4 * len(self.characters) + 16:
+            self._compact()
+        return self._pop_best(exclude=speaker)
+
+    def _pop_best(self, exclude: int) -> int:
+        heap = self._heap
+        skipped = None
+        while True:
+            _, index, version = heap[0]
+            if version != self._versions[index]:
+                heapq.heappop(heap)
+                continue
+            if index == exclude and len(self.characters) > 1:
+                skipped = heapq.heappop(heap)
+                continue
+            if skipped is not None:
+                heapq.heappush(heap, skipped)
+            return index
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if entry[2] == self._versions[entry[1]]]
+        heapq.heapify(self._heap)
+
+    def stats(self) -> Dict[str, object]:
+        spoken = sum(1 for turn in self.last_spoke if turn)
+        return {"policy": "priority", "characters": len(self.characters),
+                "characters_spoken": spoken, "heap_entries": len(self._heap)}
+
+
+SPEAKER_POLICIES = {"round-robin": RoundRobinSpeakers, "priority": PrioritySpeakers}
@@ -0,0 +1,102 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .scheduler import submit_in_context
+
+Message = Dict[str, str]
+
+
+class Speculator:
+    """Generates the next speaker's turn ahead of time from the history known so far.
+
+    ``start()`` sends the request for a predicted turn in the background. When that turn
+    comes up, ``take()`` is given the request as it stands by then. If nothing diverged
+    (same speaker, byte-identical messages), the speculative reply is used, and the time
+    it ran ahead counts as saved. Otherwise it is cancelled and its cost counts as waste.
+    """
+
+    def __init__(self, generate: Callable[..., str]):
+        self.generate = generate
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.wasted_seconds = 0.0
+        self._key = None
+        self._future: Optional[Future] = None
+        self._started = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+
+    @property
+    def pending(self) -> bool:
+        return self._future is not None
+
+    def start(self, agent, messages: List[Message]) -> None:
+        """Begin generating ``agent``'s reply to ``messages``, replacing any earlier guess"""
+        self.cancel()
+        self._key = (agent.name, messages)
+        self._started = time.perf_counter()
+        self._future = submit_in_context(self._executor, self._timed, agent, messages)
+
+    def _timed(self, agent, messages: List[Message]):
+        start = time.perf_counter()
+        content = self.generate(agent, messages)
+        return content, time.perf_counter() - start
+
+    def take(self, agent, messages: List[Message]) -> Optional[str]:
+        """The speculative reply if it was made for exactly this request, else None"""
+        future, key = self._future, self._key
+        if future is None:
+            return None
+        self._future = self._key = None
+        if key != (agent.name, messages):
+            self._discard(future)
+            return None
+        wait_start = time.perf_counter()
+        try:
+            content, duration = future.result()
+        except Exception:
+            self.misses += 1
+            self.wasted_seconds += time.perf_counter() - self._started
+            return None
+        self.hits += 1
+        self.saved_seconds += max(0.0, duration - (time.perf_counter() - wait_start))
+        return content
+
+    def cancel(self) -> None:
+        """Drop the pending guess, counting it as wasted"""
+        if self._future is not None:
+            self._discard(self._future)
+            self._future = self._key = None
+
+    def _discard(self, future: Future) -> None:
+        self.misses += 1
+        if future.cancel():
+            return  # never reached the backend
+        if future.done() and future.exception() is None:
+            self.wasted_seconds += future.result()[1]
+        else:
+            # A running call can't be interrupted; charge what it has cost so far
+            self.wasted_seconds += time.perf_counter() - self._started
+
+    @property
+    def hit_rate(self) -> float:
+        attempts = self.hits + self.misses
+        return self.hits / attempts if attempts else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "saved_seconds": round(self.saved_seconds, 3),
+            "wasted_seconds": round(self.wasted_seconds, 3),
+        }
+
+    def describe(self) -> str:
+        return (f"{self.hits}/{self.hits + self.misses} hits ({self.hit_rate:.0%}), "
+                f"{self.saved_seconds:.1f}s saved, {self.wasted_seconds:.1f}s wasted")
+
+    def close(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,149 @@
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+
+class Console:
+    """Serializes concurrent token streams onto one terminal in the order they were opened.
+
+    The oldest open channel writes straight through; later channels buffer until every
+    channel ahead of them has closed, so dialogue and panels never interleave mid-line.
+    """
+
+    def __init__(self, write: Callable[[str], object] = None, flush: Callable[[], object] = None):
+        self._write = write or sys.stdout.write
+        self._flush = flush or sys.stdout.flush
+        self._channels: Deque["Channel"] = deque()
+        self._lock = threading.Lock()
+
+    def open(self) -> "Channel":
+        channel = Channel(self)
+        with self._lock:
+            self._channels.append(channel)
+        return channel
+
+    def _emit(self, text: str) -> None:
+        self._write(text)
+        self._flush()
+
+    def _on_write(self, channel: "Channel", text: str) -> None:
+        with self._lock:
+            if self._channels and self._channels[0] is channel:
+                self._emit(text)
+            else:
+                channel._buffer.append(text)
+
+    def _on_close(self, channel: "Channel") -> None:
+        with self._lock:
+            channel._closed = True
+            # Hand the terminal to the next channels, flushing whatever they buffered
+            while self._channels and self._channels[0]._closed:
+                self._channels.popleft()
+                if self._channels:
+                    head = self._channels[0]
+                    if head._buffer:
+                        self._emit("".join(head._buffer))
+                        head._buffer.clear()
+
+
+class Channel:
+    """One ordered output stream on a Console"""
+
+    def __init__(self, console: Console):
+        self._console = console
+        self._buffer: List[str] = []
+        self._closed = False
+
+    def write(self, text: str) -> None:
+        if text:
+            self._console._on_write(self, text)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._console._on_close(self)
+
+
+class CompletableStream:
+    """A chunk iterator whose reader can mark the output complete before closing it early.
+
+    ``complete()`` is passed on to ``inner`` when that is a CompletableStream too, so a
+    mark set on the outermost client wrapper reaches the ones underneath it.
+    """
+
+    def __init__(self, chunks, inner=None):
+        self.chunks = chunks
+        self.inner = inner
+        self.completed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.chunks)
+
+    def complete(self) -> None:
+        self.completed = True
+        if isinstance(self.inner, CompletableStream):
+            self.inner.complete()
+
+    def close(self) -> None:
+        self.chunks.close()
+
+
+def mark_complete(chunks) -> None:
+    """Mark a streamed call's output complete, when its client supports that"""
+    if isinstance(chunks, CompletableStream):
+        chunks.complete()
+
+
+class StreamResult:
+    """Final text of a streamed completion plus its timing"""
+
+    def __init__(self, content: str, tokens: int, time_to_first_token: Optional[float],
+                 duration: float):
+        self.content = content
+        self.tokens = tokens
+        self.time_to_first_token = time_to_first_token
+        self.duration = duration
+
+    @property
+    def tokens_per_sec(self) -> float:
+        if self.time_to_first_token is None:
+            return 0.0
+        generating = self.duration - self.time_to_first_token
+        return self.tokens / generating if generating > 0 else 0.0
+
+    def describe(self) -> str:
+        ttft = f"{self.time_to_first_token:.2f}s" if self.time_to_first_token is not None else "n/a"
+        return f"TTFT {ttft}, {self.tokens} tokens, {self.tokens_per_sec:.1f} tok/s"
+
+
+def stream_completion(swarm_client, agent, messages, channel: Optional[Channel] = None,
+                      **kwargs) -> StreamResult:
+    """Run an agent with ``stream=True``, writing each token to ``channel`` as it arrives.
+
+    Every content delta counts as one token. The caller owns (and closes) the channel.
+    """
+    start = time.perf_counter()
+    first_token = None
+    tokens = 0
+    parts = []
+    response = None
+    for chunk in swarm_client.run(agent=agent, messages=messages, stream=True, **kwargs):
+        if "response" in chunk:
+            response = chunk["response"]
+            continue
+        content = chunk.get("content")
+        if not content:
+            continue
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        tokens += 1
+        parts.append(content)
+        if channel:
+            channel.write(content)
+
+    content = response.messages[-1]["content"] if response and response.messages else "".join(parts)
+    return StreamResult(content, tokens, first_token, time.perf_counter() - start)
@@ -0,0 +1,225 @@
+import contextlib
+import contextvars
+import itertools
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .context_window import estimate_tokens
+from .streaming import CompletableStream
+
+# Extra fields (stage, attempt, ...) attached to every call traced in this context
+_attributes: contextvars.ContextVar[Dict] = contextvars.ContextVar("trace_attributes", default={})
+# Id of the most recent call traced in this context, so follow-up events can refer to it
+_last_call: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("trace_last_call", default=None)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelSet, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Counters and histograms keyed by label set, exportable as Prometheus text"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[LabelSet, float]] = {}
+        self.histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+
+    def inc(self, name: str, amount: float = 1, help: str = "", **labels) -> None:
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _labels(**labels)
+            series[key] = series.get(key, 0) + amount
+            self.help.setdefault(name, help)
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS, help: str = "",
+                **labels) -> None:
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _labels(**labels)
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+            self.help.setdefault(name, help)
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# HELP {name} {self.help.get(name, '')}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# HELP {name} {self.help.get(name, '')}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    """Collects per-call LLM traces as JSON lines and aggregates them into Metrics"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.metrics = Metrics()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            self.open(path)
+
+    def open(self, path: str) -> None:
+        self._file = open(path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    @contextlib.contextmanager
+    def attributes(**fields) -> Iterator[None]:
+        """Attach ``fields`` (e.g. stage, attempt) to calls and events traced in this block"""
+        token = _attributes.set({**_attributes.get(), **fields})
+        try:
+            yield
+        finally:
+            _attributes.reset(token)
+
+    def next_call_id(self) -> int:
+        call_id = next(self._ids)
+        _last_call.set(call_id)
+        return call_id
+
+    def emit(self, record: Dict) -> None:
+        if self._file is None:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file:
+                self._file.write(line + "\n")
+
+    def record_call(self, record: Dict) -> None:
+        stage = record.get("stage", record["agent"])
+        self.emit(record)
+        self.metrics.inc("storygen_llm_calls_total", help="LLM calls by stage and outcome",
+                         stage=stage, agent=record["agent"], status=record["status"])
+        self.metrics.inc("storygen_llm_prompt_chars_total", record["prompt_chars"],
+                         help="Characters sent in prompts", stage=stage)
+        self.metrics.observe("storygen_llm_latency_seconds", record["latency"],
+                             help="Wall-clock latency of LLM calls", stage=stage)
+        if record["status"] == "ok":
+            self.metrics.observe("storygen_llm_completion_tokens", record["completion_tokens"],
+                                 buckets=TOKEN_BUCKETS, help="Completion tokens per call", stage=stage)
+
+    def event(self, name: str, **fields) -> None:
+        """Record a follow-up event, such as how a call's output parsed"""
+        record = {"event": name, "time": time.time(), "call_id": _last_call.get(),
+                  **_attributes.get(), **fields}
+        self.emit(record)
+        if "outcome" in fields:
+            self.metrics.inc(f"storygen_{name}_outcomes_total", help=f"{name} outcomes",
+                             outcome=fields["outcome"])
+
+
+class TracingSwarm:
+    """Swarm client wrapper that traces every call: agent, model, prompt size, completion
+    tokens, latency, attempt and status. Completion tokens are estimated from the reply
+    text, or counted per chunk when streaming."""
+
+    def __init__(self, swarm, tracer: Tracer):
+        self.swarm = swarm
+        self.tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self.swarm, name)
+
+    def run(self, agent, messages, stream: bool = False, **kwargs):
+        record = {
+            "event": "llm_call",
+            "call_id": self.tracer.next_call_id(),
+            "time": time.time(),
+            "agent": agent.name,
+            "model": kwargs.get("model_override") or agent.model,
+            "prompt_messages": len(messages),
+            "prompt_chars": sum(len(m.get("content") or "") for m in messages),
+            "stream": stream,
+            **_attributes.get(),
+        }
+        start = time.perf_counter()
+        try:
+            result = self.swarm.run(agent=agent, messages=messages, stream=stream, **kwargs)
+        except BaseException as e:
+            self._finish(record, start, 0, e)
+            raise
+        if stream:
+            return CompletableStream(self._traced_stream(result, record, start), inner=result)
+        content = result.messages[-1].get("content") if result.messages else ""
+        self._finish(record, start, estimate_tokens(content) if content else 0)
+        return result
+
+    def _traced_stream(self, chunks, record, start):
+        tokens = 0
+        error = None
+        try:
+            for chunk in chunks:
+                if chunk.get("content"):
+                    if tokens == 0:
+                        record["time_to_first_token"] = round(time.perf_counter() - start, 4)
+                    tokens += 1
+                yield chunk
+        except GeneratorExit:
+            record["closed_early"] = True
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            chunks.close()
+            self._finish(record, start, tokens, error)
+
+    def _finish(self, record: Dict, start: float, tokens: int,
+                error: Optional[BaseException] = None) -> None:
+        record["latency"] = round(time.perf_counter() - start, 4)
+        record["completion_tokens"] = tokens
+        record["status"] = "ok" if error is None else type(error).__name__
+        if error is not None:
+            record["error"] = str(error)
+        self.tracer.record_call(record)
@@ -0,0 +1,212 @@
+import random
+
+import pytest
+
+from storyEngine import governor as governor_module
+from storyEngine.governor import (Backoff, CircuitBreaker, CircuitOpenError, GovernedSwarm, Governor,
+                                  MalformedOutputError, TokenBucket, classify_error)
+
+
+class FakeClock:
+    """Stands in for the ``time`` module: sleeping just moves the clock forward"""
+
+    TICK = 1e-6  # like a real clock, even the shortest sleep takes some time
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(seconds, self.TICK)
+        self.slept += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(governor_module, "time", clock)
+    return clock
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+class Agent:
+    name = "Tester"
+    instructions = "Be brief."
+
+
+@pytest.mark.parametrize("error, kind", [
+    (TimeoutError(), "timeout"),
+    (APITimeoutError(), "timeout"),
+    (ConnectionResetError(), "connection"),
+    (StatusError(429), "rate_limited"),
+    (StatusError(503), "server"),
+    (StatusError(400), "client"),
+    (ValueError("bad JSON"), "malformed"),
+    (MalformedOutputError("no cast"), "malformed"),
+    (CircuitOpenError(1.0), "circuit_open"),
+    (RuntimeError("bug"), "other"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_backoff_stays_under_its_capped_ceiling():
+    backoff = Backoff(base=0.25, cap=2.0, rng=random.Random(7))
+    for attempt in range(8):
+        ceiling = min(2.0, 0.25 * 2 ** attempt)
+        assert all(0 <= backoff.delay(attempt) <= ceiling for _ in range(50))
+
+
+def test_token_bucket_waits_off_its_debt(clock):
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.1)
+    bucket.charge(2)  # e.g. completion tokens billed afterwards
+    assert bucket.acquire() == pytest.approx(0.3)
+    assert TokenBucket(rate=0).acquire(1000) == 0.0
+
+
+def test_breaker_opens_after_threshold_failures(clock):
+    breaker = CircuitBreaker(threshold=3, reset_timeout=10.0)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opens == 1
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.allow()
+    assert raised.value.retry_after == pytest.approx(10.0)
+
+
+def test_breaker_half_open_trial(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10.0)
+    breaker.record_failure()
+    clock.now += 10.0
+    assert breaker.state == "half_open"
+    breaker.allow()  # the one trial call
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_failure()  # the trial failed: open again for a full timeout
+    assert breaker.state == "open"
+    assert breaker.opens == 2
+    clock.now += 10.0
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.allow()
+
+
+def test_overload_halves_the_rates_and_success_recovers_them(clock):
+    governor = Governor(requests_per_sec=8, tokens_per_sec=800,
+                        breaker=CircuitBreaker(threshold=100))
+    governor.failed("server")
+    assert governor.scale == 0.5
+    assert (governor.requests.rate, governor.tokens.rate) == (4, 400)
+    for _ in range(10):
+        governor.failed("rate_limited")
+    assert governor.scale == Governor.MIN_SCALE
+    for _ in range(3):
+        governor.succeeded()
+    assert governor.scale == pytest.approx(Governor.MIN_SCALE + 3 * Governor.RECOVERY_STEP)
+    for _ in range(20):
+        governor.succeeded()
+    assert governor.scale == 1.0
+    assert governor.requests.rate == 8
+
+
+def test_malformed_output_neither_slows_nor_trips(clock):
+    governor = Governor(breaker=CircuitBreaker(threshold=2))
+    governor.failed("server")
+    governor.failed("malformed")  # the backend answered: the failure streak is broken
+    governor.failed("server")
+    assert governor.scale == 0.25
+    assert governor.breaker.state == "closed"
+    assert governor.failures == {"server": 2, "malformed": 1}
+
+
+def test_call_retries_retryable_failures(clock):
+    governor = Governor(max_retries=3, backoff=Backoff(base=1.0, rng=random.Random(1)))
+    outcomes = [ConnectionResetError(), StatusError(503), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert governor.call(flaky) == "ok"
+    assert governor.retries == {"connection": 1, "server": 1}
+    assert governor.calls == 3
+    assert clock.slept == pytest.approx(governor.backoff_seconds)
+
+
+def test_call_raises_client_errors_and_gives_up_after_max_retries(clock):
+    governor = Governor(max_retries=2, backoff=Backoff(base=0.0),
+                        breaker=CircuitBreaker(threshold=100))
+    calls = []
+
+    def failing(error):
+        calls.append(error)
+        raise error
+
+    with pytest.raises(StatusError):
+        governor.call(failing, StatusError(400))
+    assert len(calls) == 1
+    with pytest.raises(TimeoutError):
+        governor.call(failing, TimeoutError())
+    assert len(calls) == 1 + 3
+
+
+def test_open_breaker_fails_fast(clock):
+    governor = Governor(max_retries=0, breaker=CircuitBreaker(threshold=1, reset_timeout=5.0))
+    with pytest.raises(TimeoutError):
+        governor.call(lambda: (_ for _ in ()).throw(TimeoutError()))
+    with pytest.raises(CircuitOpenError):
+        governor.call(lambda: "never sent")
+    assert governor.stats()["circuit"] == "open"
+
+
+class StreamingSwarm:
+    """Fake Swarm whose streamed runs follow a script of chunk lists"""
+
+    def __init__(self, *scripts):
+        self.scripts = list(scripts)
+
+    def run(self, agent, messages, stream=False, **kwargs):
+        script = self.scripts.pop(0)
+
+        def chunks():
+            for item in script:
+                if isinstance(item, Exception):
+                    raise item
+                yield {"content": item}
+        return chunks()
+
+
+def test_streams_are_retried_only_before_their_first_chunk(clock):
+    governor = Governor(backoff=Backoff(base=0.0))
+    swarm = GovernedSwarm(StreamingSwarm([ConnectionResetError()], ["Hel", "lo"]), governor)
+    chunks = swarm.run(Agent(), [{"role": "user", "content": "Hi"}], stream=True)
+    assert [chunk["content"] for chunk in chunks] == ["Hel", "lo"]
+    assert governor.retries == {"connection": 1}
+
+    swarm = GovernedSwarm(StreamingSwarm(["Hel", ConnectionResetError()]), governor)
+    chunks = swarm.run(Agent(), [{"role": "user", "content": "Hi"}], stream=True)
+    assert next(chunks)["content"] == "Hel"
+    with pytest.raises(ConnectionResetError):
+        next(chunks)
+    assert governor.retries == {"connection": 1}
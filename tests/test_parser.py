@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from charTraits.parser import CastStreamParser, close_truncated, parse_characters_from_response
+
+CAST = json.dumps({"characters": [
+    {"name": "Akira", "affiliation": "Hero Academy", "skills": ["Flame Fist"],
+     "memory": ["Lost a duel"], "personality_traits": ["Brave"]},
+    {"name": "Mei", "affiliation": "Shadow Guild", "skills": ["Stealth"],
+     "memory": ["A broken promise"], "personality_traits": ["Calm"]},
+    {"name": "Ren", "affiliation": "Hero Academy", "skills": ["Healing"],
+     "memory": [], "personality_traits": ["Kind"]},
+]}, indent=2)
+NAMES = ["Akira", "Mei", "Ren"]
+
+
+def names(characters):
+    return [character.name for character in characters]
+
+
+def parse_streamed(text, chunk_size=1, **kwargs):
+    parser = CastStreamParser(**kwargs)
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start:start + chunk_size])
+    parser.finish()
+    return parser
+
+
+@pytest.mark.parametrize("text", [
+    CAST,
+    "```json\n" + CAST + "\n```",
+    "Sure [see below]: " + CAST,
+    "Here is the cast, with {name} filled in:\n" + CAST,
+    CAST + "\nWant [more] characters?",
+    json.dumps(json.loads(CAST)["characters"]),
+], ids=["plain", "fenced", "bracketed-prose", "brace-prose", "trailing-prose", "bare-array"])
+def test_parses_whole_and_streamed(text):
+    assert names(parse_characters_from_response(text)) == NAMES
+    for chunk_size in (1, 7, 64):
+        assert names(parse_streamed(text, chunk_size).characters) == NAMES
+
+
+def test_characters_arrive_as_their_objects_close():
+    parser = CastStreamParser()
+    end_of_first = CAST.index("}") + 1
+    assert parser.feed(CAST[:end_of_first - 1]) == []
+    assert names(parser.feed(CAST[end_of_first - 1:end_of_first])) == ["Akira"]
+
+
+def test_repairs_comments_and_trailing_commas():
+    text = ('{"characters": [\n'
+            '  {"name": "Akira", "affiliation": "A", "skills": ["x",],}, // the hero\n'
+            '  /* the rival */ {"name": "Mei", "affiliation": "B"},\n'
+            ']}')
+    parser = parse_streamed(text)
+    assert names(parser.characters) == ["Akira", "Mei"]
+    assert parser.characters[0].skills == ["x"]
+    assert parser.repairs >= 2
+
+
+def test_slashes_inside_strings_are_kept():
+    text = '{"characters": [{"name": "Akira", "affiliation": "http://a.b/*c*/"}]}'
+    assert parse_streamed(text).characters[0].affiliation == "http://a.b/*c*/"
+
+
+def test_closes_a_truncated_last_character():
+    text = CAST[:CAST.index('"Healing"') + len('"Heal')]
+    parser = parse_streamed(text, chunk_size=16)
+    assert names(parser.characters) == NAMES
+    assert parser.characters[-1].skills == ["Heal"]
+    assert parser.repairs == 1
+
+
+def test_stops_once_max_characters_arrive():
+    parser = CastStreamParser(max_characters=2)
+    for ch in CAST:
+        parser.feed(ch)
+        if parser.done:
+            break
+    assert parser.done
+    assert names(parser.characters) == ["Akira", "Mei"]
+    assert parser.feed('{"name": "Late"}') == []
+
+
+def test_skips_invalid_objects_and_keeps_the_rest():
+    text = '{"characters": [{"name": "Akira", "affiliation": "A"}, {"name": ], {"name": "Mei"}]}'
+    assert names(parse_streamed(text).characters) == ["Akira", "Mei"]
+
+
+def test_falls_back_to_name_blocks_without_json():
+    text = ("Character 1:\nName: Akira\nAffiliation: Hero Academy\nSkills: [Flame Fist, Speed]\n"
+            "Character 2:\nName: Mei\nGroup: Shadow Guild\nTraits: Calm, Sly")
+    characters = parse_characters_from_response(text)
+    assert names(characters) == ["Akira", "Mei"]
+    assert characters[0].skills == ["Flame Fist", "Speed"]
+    assert characters[1].affiliation == "Shadow Guild"
+
+
+def test_close_truncated():
+    assert close_truncated('{"a": [1, 2') == {"a": [1, 2]}
+    assert close_truncated('{"a": "unfinished') == {"a": "unfinished"}
+    assert close_truncated('{"a": 1, "b": tr') == {"a": 1}
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import time
+
+from charTraits.character import Character
+from storyEngine.scheduler import FairScheduler
+from storyEngine.server import StoryServer
+
+
+class Story:
+    def __init__(self, topic, characters):
+        self.characters = characters
+        self.turn = 0
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def create_cast(topic):
+    time.sleep(0.05)  # long enough for concurrent requests to overlap
+    if topic == "broken":
+        raise RuntimeError("backend returned 500")
+    if topic == "empty":
+        return []
+    return [Character(name=name, affiliation="Hero Academy", skills=[], personality_traits=[])
+            for name in ("Akira", "Mei")]
+
+
+def play_turn(story):
+    story.turn += 1
+    speaker = story.characters[story.turn % 2].name
+    return speaker, f"{speaker}: line {story.turn}", "recent chat"
+
+
+def make_server(**kwargs):
+    kwargs.setdefault("scheduler", FairScheduler(max_concurrency=2))
+    return StoryServer(create_cast, Story, play_turn, **kwargs)
+
+
+def respond(server, method, path, body=None):
+    raw = json.dumps(body).encode() if body is not None else b""
+    return server._respond(method, path, raw)
+
+
+def test_concurrent_creates_respect_the_session_limit():
+    server = make_server(max_sessions=2)
+
+    async def scenario():
+        return await asyncio.gather(*(respond(server, "POST", "/sessions", {"topic": f"t{i}"})
+                                      for i in range(4)))
+
+    statuses = sorted(status for status, _ in asyncio.run(scenario()))
+    assert statuses == [201, 201, 503, 503]
+    assert len(server.sessions) == 2
+    assert server._creating == 0
+
+
+def test_closing_a_session_frees_its_slot():
+    server = make_server(max_sessions=1)
+
+    async def scenario():
+        status, created = await respond(server, "POST", "/sessions", {"topic": "a"})
+        assert status == 201
+        story = server.sessions[created["id"]].story
+        assert (await respond(server, "POST", "/sessions", {"topic": "b"}))[0] == 503
+        assert (await respond(server, "DELETE", f"/sessions/{created['id']}"))[0] == 200
+        assert story.closed
+        assert (await respond(server, "POST", "/sessions", {"topic": "b"}))[0] == 201
+
+    asyncio.run(scenario())
+
+
+def test_failed_creates_release_their_slot_and_scheduler_state():
+    scheduler = FairScheduler(max_concurrency=2)
+
+    def scheduled_cast(topic):
+        with scheduler.slot():  # an LLM call made under the new session
+            pass
+        return create_cast(topic)
+
+    server = StoryServer(scheduled_cast, Story, play_turn, scheduler, max_sessions=1)
+
+    async def scenario():
+        status, body = await respond(server, "POST", "/sessions", {"topic": "broken"})
+        assert status == 500 and "backend returned 500" in body["error"]
+        status, _ = await respond(server, "POST", "/sessions", {"topic": "empty"})
+        assert status == 500
+        assert (await respond(server, "POST", "/sessions", {"topic": "fine"}))[0] == 201
+
+    asyncio.run(scenario())
+    assert server._creating == 0
+    assert set(scheduler.stats()["sessions"]) == set(server.sessions)
+
+
+def test_bad_requests_are_400s():
+    server = make_server()
+
+    async def scenario():
+        _, created = await respond(server, "POST", "/sessions", {"topic": "a"})
+        turns = f"/sessions/{created['id']}/turns"
+        assert (await server._respond("POST", "/sessions", b"{not json"))[0] == 400
+        assert (await server._respond("POST", "/sessions", b"[1, 2]"))[0] == 400
+        assert (await respond(server, "POST", "/sessions", {}))[0] == 400
+        assert (await respond(server, "POST", "/sessions", {"topic": "a", "priority": "high"}))[0] == 400
+        assert (await respond(server, "POST", turns, {"count": 0}))[0] == 400
+        assert (await respond(server, "POST", turns, {"count": True}))[0] == 400
+        assert (await respond(server, "GET", "/sessions/nope"))[0] == 404
+        assert (await respond(server, "PUT", "/sessions"))[0] == 405
+
+    asyncio.run(scenario())
+
+
+def test_turns_and_background_panel_failures():
+    failures = []
+
+    def render_panels(recent_chat):
+        raise RuntimeError("circuit open")
+
+    server = make_server(render_panels=render_panels,
+                         on_panel_error=lambda session_id, e: failures.append(session_id))
+
+    async def scenario():
+        _, created = await respond(server, "POST", "/sessions", {"topic": "a"})
+        status, body = await respond(server, "POST", f"/sessions/{created['id']}/turns", {"count": 3})
+        assert status == 200
+        assert [turn["speaker"] for turn in body["turns"]] == ["Mei", "Akira", "Mei"]
+        while server._background:
+            await asyncio.sleep(0.01)
+        return created["id"], (await respond(server, "GET", f"/sessions/{created['id']}"))[1]
+
+    session_id, described = asyncio.run(scenario())
+    assert described["turn_count"] == 3
+    assert described["panel_errors"] == ["RuntimeError: circuit open"] * 3
+    assert failures == [session_id] * 3
+    assert server.panel_failures == 3
+
+
+def test_http_round_trip():
+    server = make_server()
+
+    async def scenario():
+        bound = asyncio.get_running_loop().create_future()
+        serving = asyncio.ensure_future(
+            server.serve("127.0.0.1", 0, ready=lambda host, port: bound.set_result(port)))
+        port = await bound
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps({"topic": "a duel"}).encode()
+        writer.write(b"POST /sessions HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n"
+                     % len(body) + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        serving.cancel()
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+        return response
+
+    head, _, payload = asyncio.run(scenario()).partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 201 Created")
+    assert [member["name"] for member in json.loads(payload)["cast"]] == ["Akira", "Mei"]
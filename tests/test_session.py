@@ -0,0 +1,121 @@
+from charTraits.character import Character, Relationship
+from charTraits.memory_consolidator import MemoryConsolidator
+from storyEngine.session import SessionState, StorySession, character_from_record
+
+
+def make_cast():
+    akira = Character(name="Akira", affiliation="Hero Academy", skills=["Flame Fist"],
+                      personality_traits=["Brave"], goals=["Win the tournament"])
+    mei = Character(name="Mei", affiliation="Shadow Guild", skills=["Stealth"],
+                    personality_traits=["Calm"])
+    for i in range(5):
+        akira.add_memory(f"Training day {i}", importance=i + 1, tags=["training"],
+                         related_characters=["Mei"])
+    akira.update_emotion("joy", 0.25)
+    akira.update_relationship("Mei", trust_change=0.2, friendship_change=-0.1, event="A duel")
+    return [akira, mei]
+
+
+def dump(characters):
+    return [character.model_dump() for character in characters]
+
+
+def start_session(tmp_path, state):
+    session = StorySession(str(tmp_path), flush_every=1)
+    session.start()
+    session.snapshot(state, state.summary, state.turns)
+    return session
+
+
+def record_turn(session, state, speaker, content):
+    session.record("turn", turn=state.turn, speaker=speaker, content=content,
+                   next_speaker=(state.speaker_idx + 1) % len(state.characters))
+    state.turns.append({"role": "assistant", "content": content})
+    state.turn += 1
+    state.speaker_idx = (state.speaker_idx + 1) % len(state.characters)
+
+
+def test_snapshot_round_trip(tmp_path):
+    state = SessionState("a tournament", make_cast(), summary="So far", speaker_idx=1, turn=3)
+    start_session(tmp_path, state).close()
+
+    restored = StorySession(str(tmp_path)).load()
+    assert restored.topic == "a tournament"
+    assert restored.summary == "So far"
+    assert (restored.speaker_idx, restored.turn) == (1, 3)
+    assert dump(restored.characters) == dump(state.characters)
+
+
+def test_replays_turns_logged_after_the_snapshot(tmp_path):
+    state = SessionState("a tournament", make_cast())
+    session = start_session(tmp_path, state)
+    record_turn(session, state, "Akira", "Akira: Ready?")
+    record_turn(session, state, "Mei", "Mei: Always.")
+    session.close()
+
+    loader = StorySession(str(tmp_path))
+    restored = loader.load()
+    assert restored.turns == state.turns
+    assert (restored.speaker_idx, restored.turn) == (state.speaker_idx, state.turn)
+    assert loader.seq == session.seq
+
+
+def test_a_new_snapshot_supersedes_the_log(tmp_path):
+    state = SessionState("a tournament", make_cast())
+    session = start_session(tmp_path, state)
+    record_turn(session, state, "Akira", "Akira: Ready?")
+    session.snapshot(state, "", state.turns)
+    record_turn(session, state, "Mei", "Mei: Always.")
+    session.close()
+
+    restored = StorySession(str(tmp_path)).load()
+    assert restored.turns == state.turns
+    assert restored.turn == 2
+
+
+def test_replays_memory_consolidations(tmp_path):
+    state = SessionState("a tournament", make_cast())
+    session = start_session(tmp_path, state)
+    record_merge = lambda character, keys, merged: session.record(
+        "consolidate", character=character.name, merged=[list(key) for key in keys],
+        content=merged.content, timestamp=merged.timestamp, importance=merged.importance,
+        tags=merged.tags, related=merged.related_characters)
+    consolidator = MemoryConsolidator(budget=3, batch=2, on_merge=record_merge)
+    akira = state.characters[0]
+    consolidator.maybe_consolidate(akira)
+    session.close()
+
+    assert consolidator.consolidations == 2  # 5 memories -> 4 -> 3
+    restored = StorySession(str(tmp_path)).load()
+    assert dump(restored.characters) == dump(state.characters)
+    assert len(restored.characters[0].memory) == 3
+
+
+def test_ignores_a_torn_final_line_and_unknown_characters(tmp_path):
+    state = SessionState("a tournament", make_cast())
+    session = start_session(tmp_path, state)
+    record_turn(session, state, "Akira", "Akira: Ready?")
+    session.record("consolidate", character="Nobody", merged=[], content="x", timestamp=0.0,
+                   importance=1, tags=[], related=[])
+    session.close()
+    with open(session.log_path, "ab") as log:
+        log.write(b'{"seq": 99, "kind": "turn", "cont')
+
+    restored = StorySession(str(tmp_path)).load()
+    assert restored.turns == state.turns
+    assert dump(restored.characters) == dump(state.characters)
+
+
+def test_reads_relationships_from_older_snapshots():
+    record = {
+        "name": "Akira", "affiliation": "Hero Academy", "skills": [], "personality_traits": [],
+        "beliefs": [], "goals": [], "backstory": "", "current_state": {"mood": 0.5},
+        "archetype": "Rival", "role": "Rival",
+        "memory": {"content": [], "timestamp": [], "importance": [], "tags": [], "related": []},
+        "emotions": {},
+        "relationships": {"Mei": [0.6, 0.4, ["A duel", "A truce"]]},
+    }
+    relationship = character_from_record(record).relationships["Mei"]
+    assert isinstance(relationship, Relationship)
+    assert relationship.history == ["A duel", "A truce"]
+    assert (relationship.interactions, relationship.positive, relationship.negative) == (2, 0, 0)